@@ -1,62 +1,195 @@
+import time
+_T0 = time.perf_counter()
+
 from pathlib import Path
 from datetime import datetime, timedelta
-from flask import Flask, json, jsonify, render_template, request, send_file, url_for
-import matplotlib
-matplotlib.use('Agg')
-import matplotlib.pyplot as plt
-import pandas as pd, re, io, os
-from subcarpeta import algoritmo_mochila
+from flask import Flask, Response, g, jsonify, render_template, request, send_file, url_for
+import re, io, os, sys, hashlib, importlib, threading
+from subcarpeta import trabajos, metricas
+from subcarpeta.cache_memoria import CacheMemoria
+
+# pandas, matplotlib y el motor de la mochila (OR-Tools) se importan dentro
+# de las funciones que los usan: "/" y las páginas que sólo renderizan una
+# plantilla arrancan sin ellos. precargar() los trae de una vez (ver abajo).
+PESADOS = ("pandas", "matplotlib.figure", "matplotlib.backends.backend_agg",
+           "subcarpeta.cache_csv", "subcarpeta.tabla_remota", "subcarpeta.algoritmo_mochila")
 
 app = Flask(__name__)
 
 DATA_FOLDER = os.path.join(os.path.dirname(__file__), 'data')
 BASE_DIR = os.path.dirname(__file__)
 DETALLE_DIR = os.path.join(BASE_DIR, 'csv')
+COLS_DETALLE = ["ID", "CLIENTE", "FECHA", "PRIORIDAD", "LITROS",
+                "GANANCIA", "GANANCIA_AJUST", "LITROS_RENTADOS"]
+MAX_DIAS_RANGO = 92     # /api/programacion: hasta un trimestre por llamada
+HILOS_GRAFICA  = 2      # gráficas dibujándose a la vez; el resto espera turno
+
+# la mochila corre en segundo plano; las páginas consultan /api/trabajos/<id>
+cola = trabajos.ColaTrabajos()
+
+# CSV leídos y respuestas derivadas, por (ruta, mtime, tamaño) — ver cache_memoria
+cache = CacheMemoria()
+turno_grafica = threading.BoundedSemaphore(HILOS_GRAFICA)
+
+def leer_frame(ruta, **kw):
+    """DataFrame compartido del CSV (no modificar: copiar antes)."""
+    from subcarpeta.cache_csv import leer_csv
+    ruta = os.fspath(ruta)
+    return cache.obtener(("csv", ruta, tuple(sorted(kw.items()))), lambda: leer_csv(ruta, **kw), [ruta])
+
+def ultimo(patron, carpeta=DETALLE_DIR):
+    """El archivo más reciente (orden de nombre) de `carpeta` que coincide con `patron`."""
+    def buscar():
+        archivos = sorted(Path(carpeta).glob(patron), reverse=True)
+        return archivos[0] if archivos else None
+    # la carpeta cambia de mtime al crear / borrar archivos
+    return cache.obtener(("glob", carpeta, patron), buscar, [carpeta])
+
+def json_cacheado(clave, rutas, calcular):
+    """
+    Respuesta JSON de calcular() → (objeto, status), serializada una sola
+    vez por versión de `rutas`.
+    """
+    def serializar():
+        obj, status = calcular()
+        return jsonify(obj).get_data(), status      # mismos bytes que jsonify
+    cuerpo, status = cache.obtener(clave, serializar, rutas)
+    return Response(cuerpo, status=status, mimetype="application/json")
+
+# ------------------------------------------------------------------
+# Latencia por ruta → /metrics. Se etiqueta con la regla ("/mochila/<fecha>")
+# y no con la URL, para que las series no crezcan con cada fecha.
+# ------------------------------------------------------------------
+def _ruta_metrica():
+    return request.url_rule.rule if request.url_rule else "sin_ruta"
+
+@app.before_request
+def _iniciar_peticion():
+    g.t_peticion = time.perf_counter()
+
+@app.after_request
+def _medir_peticion(resp):
+    metricas.peticion(_ruta_metrica(), request.method, resp.status_code,
+                      time.perf_counter() - g.t_peticion)
+    g.t_peticion = None
+    return resp
+
+@app.teardown_request
+def _medir_excepcion(exc):
+    # una excepción sin manejar no pasa por after_request
+    t = g.pop("t_peticion", None)
+    if exc is not None and t is not None:
+        metricas.peticion(_ruta_metrica(), request.method, 500, time.perf_counter() - t)
 
 @app.route('/')
 def index():
     return render_template('index.html')
 
+def dibujar_grafica(df, titulo, columna_x, columna_y):
+    """PNG (bytes) de columna_y vs columna_x; Figure propia, sin el estado global de pyplot."""
+    import pandas as pd
+    from matplotlib.figure import Figure
+
+    x = df[columna_x]
+    y = pd.to_numeric(df[columna_y], errors='coerce')
+    mask = y.notna()
+    x, y = x[mask], y[mask]
+
+    if not pd.api.types.is_datetime64_any_dtype(x):
+        x = x.astype(str)
+
+    fig = Figure(figsize=(10, 5))
+    ax = fig.subplots()
+    ax.plot(x, y, marker='o', linestyle='--')
+    ax.set_title(titulo)
+    ax.set_xlabel(columna_x.capitalize())
+    ax.set_ylabel(columna_y.capitalize())
+    ax.tick_params(axis='x', labelrotation=45)
+    ax.grid(True)
+    fig.tight_layout()
+
+    img = io.BytesIO()
+    with turno_grafica:
+        fig.savefig(img, format='png')
+    return img.getvalue()
+
 def generar_grafica(nombre_archivo, titulo, columna_x, columna_y):
     ruta_archivo = os.path.join(DATA_FOLDER, nombre_archivo)
     if not os.path.exists(ruta_archivo):
         return f"Archivo {nombre_archivo} no encontrado en /data", 404
 
-    try:
-        df = pd.read_csv(ruta_archivo)
+    def renderizar():
+        import pandas as pd
+        df = leer_frame(ruta_archivo)
+        if columna_x not in df.columns or columna_y not in df.columns:
+            return None, f"Las columnas '{columna_x}' o '{columna_y}' no existen en {nombre_archivo}."
         if 'fecha' in columna_x.lower():
-            df[columna_x] = pd.to_datetime(df[columna_x], dayfirst=True, errors='coerce')
+            df = df.assign(**{columna_x: pd.to_datetime(df[columna_x], dayfirst=True, errors='coerce')})
             df = df.dropna(subset=[columna_x])
+        png = dibujar_grafica(df, titulo, columna_x, columna_y)
+        return png, hashlib.blake2b(png, digest_size=16).hexdigest()
 
-        if columna_x not in df.columns or columna_y not in df.columns:
-            return f"Las columnas '{columna_x}' o '{columna_y}' no existen en {nombre_archivo}.", 400
-
-        x = df[columna_x]
-        y = pd.to_numeric(df[columna_y], errors='coerce')
-        mask = y.notna()
-        x, y = x[mask], y[mask]
-
-        if not pd.api.types.is_datetime64_any_dtype(x):
-            x = x.astype(str)
-
+    try:
+        # PNG + ETag por (archivo, mtime, tamaño, columnas, título)
+        png, etag = cache.obtener(("png", ruta_archivo, columna_x, columna_y, titulo),
+                                  renderizar, [ruta_archivo])
     except Exception as e:
         return f"Error al procesar {nombre_archivo}: {e}", 500
+    if png is None:
+        return etag, 400
+
+    # If-None-Match igual al ETag → 304 sin cuerpo
+    return send_file(io.BytesIO(png), mimetype='image/png', etag=etag, max_age=0)
+
+def correr_mochila():
+    """Trabajo de fondo: la simulación completa (un mensaje ❌ cuenta como error)."""
+    from subcarpeta import algoritmo_mochila
+    mensaje = algoritmo_mochila.ejecutar()
+    if mensaje.startswith("❌"):
+        raise RuntimeError(mensaje)
+    return mensaje
+
+def corrida_actual():
+    """(clave de las entradas y parámetros actuales, ID de su corrida en el almacén o None)."""
+    from subcarpeta import algoritmo_mochila
+    try:
+        clave = algoritmo_mochila.clave_corrida()
+    except (StopIteration, OSError):
+        raise FileNotFoundError("No se encontró prioridad_clientes*_A_*.csv o su pedidos_limpios en csv/")
+    return clave, algoritmo_mochila.almacen.corrida(clave)
 
-    plt.figure(figsize=(10, 5))
-    plt.plot(x, y, marker='o', linestyle='--')
-    plt.title(titulo)
-    plt.xlabel(columna_x.capitalize())
-    plt.ylabel(columna_y.capitalize())
-    plt.xticks(rotation=45)
-    plt.grid(True)
-    plt.tight_layout()
-
-    img = io.BytesIO()
-    plt.savefig(img, format='png')
-    img.seek(0)
-    plt.close()
+def enviar_mochila(clave):
+    """Encola la mochila; peticiones con los mismos CSV de entrada comparten la corrida."""
+    return cola.enviar(("mochila", clave), correr_mochila)
 
-    return send_file(img, mimetype='image/png')
+def responder_mochila(fecha):
+    """
+    Detalle de mochila de `fecha`: del almacén si ya hay corrida para las
+    entradas actuales, o encola la simulación y devuelve la página que
+    consulta su estado.
+    """
+    from subcarpeta import algoritmo_mochila
+    clave, corrida = corrida_actual()
+    mensaje = f"Detalle de mochila · {fecha}"
+
+    if corrida is None:
+        trabajo = enviar_mochila(clave)
+        if trabajo.pendiente:
+            return render_template("procesando.html",
+                                   mensaje=f"Ejecutando mochila para {fecha}…",
+                                   estado_url=url_for("api_trabajo", tid=trabajo.id),
+                                   destino_url=url_for("ver_mochila", fecha=fecha)), 202
+        if trabajo.error:
+            raise RuntimeError(trabajo.error)
+        _, corrida = corrida_actual()
+        mensaje = f"{trabajo.resultado}<br>{mensaje}"
+
+    df_dia = algoritmo_mochila.almacen.dia(corrida, fecha, COLS_DETALLE)
+    if df_dia.empty:
+        return render_template("resultado.html", mensaje=f"❌ No se encontró programación para la fecha {fecha}.",
+                               tabla=""), 404
+    return render_template("resultado.html", mensaje=mensaje,
+                           tabla=df_dia.to_html(classes="table", index=False))
 
 @app.route('/ver_resultados', methods=['POST'])
 def ver_resultados():
@@ -66,55 +199,74 @@ def ver_resultados():
 
     try:
         fecha = datetime.strptime(fecha_str, '%Y-%m-%d').date()
-        archivo = f"detalle_mochila_{fecha}.csv"
-        ruta = os.path.join(DETALLE_DIR, archivo)
-
-        if not os.path.exists(ruta):
-            algoritmo_mochila.ejecutar()
-            archivos = sorted(Path(DETALLE_DIR).glob("programacion_*.csv"), reverse=True)
-            if not archivos:
-                return "❌ No hay ningún archivo de programación generado."
-
-            df_total = pd.read_csv(archivos[0])
-            df_total.columns = (df_total.columns
-                        .str.replace(' ', '_')
-                        .str.upper())
+        return responder_mochila(fecha)
+    except Exception as e:
+        return f"❌ Error al procesar la fecha: {e}", 500
 
-            if 'FECHA_ASIGNADA' not in df_total.columns:
-                print(df_total.columns.tolist())  # Depuración correcta
-                raise ValueError("Columna FECHA_ASIGNADA no encontrada")
+@app.route('/mochila/<fecha>')
+def ver_mochila(fecha):
+    """Destino de la página de espera cuando el trabajo termina."""
+    try:
+        return responder_mochila(datetime.strptime(fecha, '%Y-%m-%d').date())
+    except Exception as e:
+        return render_template("resultado.html", mensaje=f"❌ Error: {e}", tabla=""), 500
 
+@app.route('/api/trabajos')
+def api_trabajos():
+    return jsonify(cola.listar())
 
-            df_total["FECHA_ASIGNADA"] = pd.to_datetime(df_total["FECHA_ASIGNADA"], errors="coerce")
-            df_dia = df_total[df_total["FECHA_ASIGNADA"].dt.date == fecha]
-            if df_dia.empty:
-                return f"❌ No se encontró programación para la fecha {fecha}.", 404
+@app.route('/api/trabajos/<tid>')
+def api_trabajo(tid):
+    trabajo = cola.obtener(tid)
+    if trabajo is None:
+        return jsonify({"error": "Trabajo no encontrado"}), 404
+    return jsonify(trabajo.a_dict())
 
-            cols = [c for c in ["ID", "CLIENTE", "FECHA", "PRIORIDAD", "LITROS", "GANANCIA", "GANANCIA_AJUST", "LITROS_RENTADOS"] if c in df_dia.columns]
-            df_dia[cols].to_csv(ruta, index=False)
+@app.route('/api/programacion')
+def api_programacion():
+    """
+    Fragmentos asignados entre ?desde= y ?hasta= (YYYY-MM-DD, inclusive;
+    ?cliente= opcional) de la corrida de las entradas actuales. Si aún no
+    hay corrida se encola y se responde 202 con el trabajo.
+    """
+    try:
+        desde = datetime.strptime(request.args["desde"], '%Y-%m-%d').date()
+        hasta = datetime.strptime(request.args.get("hasta", request.args["desde"]), '%Y-%m-%d').date()
+    except (KeyError, ValueError):
+        return jsonify({"error": "Use ?desde=YYYY-MM-DD&hasta=YYYY-MM-DD"}), 400
+    if hasta < desde or (hasta - desde).days > MAX_DIAS_RANGO:
+        return jsonify({"error": f"Rango inválido (máximo {MAX_DIAS_RANGO + 1} días)"}), 400
 
-        df = pd.read_csv(ruta)
-        return render_template('resultado.html', mensaje=f"Resultados para {fecha}", tabla=df.to_html(classes='table', index=False))
+    try:
+        clave, corrida = corrida_actual()
+    except FileNotFoundError as e:
+        return jsonify({"error": str(e)}), 404
+    if corrida is None:
+        trabajo = enviar_mochila(clave)
+        return jsonify({"trabajo": trabajo.a_dict(),
+                        "estado_url": url_for("api_trabajo", tid=trabajo.id)}), 202
+
+    from subcarpeta import algoritmo_mochila
+    df = algoritmo_mochila.almacen.rango(corrida, desde, hasta, COLS_DETALLE + ["FECHA_ASIGNADA"],
+                                         cliente=request.args.get("cliente"))
+    cuerpo = ('{"corrida":%d,"desde":"%s","hasta":"%s","columns":%s,"rows":%s}'
+              % (corrida, desde, hasta, app.json.dumps(list(df.columns)), df.to_json(orient="records")))
+    return Response(cuerpo, mimetype="application/json")
 
-    except Exception as e:
-        return f"❌ Error al procesar la fecha: {e}", 500
-    
 @app.route('/programacion_detallada')
 def ver_programacion_detallada():
     """
     Muestra el CSV más reciente que empiece con
     'programacion_detallada_' usando el mismo template 'resultado.html'.
     """
-    archivos = sorted(
-        Path(DETALLE_DIR).glob("programacion_detallada_*.csv"),
-        reverse=True
-    )
-    if not archivos:
+    ruta = ultimo("programacion_detallada_*.csv")   # el más nuevo
+    if ruta is None:
         return "❌ No existe ningún archivo programacion_detallada_*.csv", 404
 
-    ruta = archivos[0]              # el más nuevo
     try:
-        df = pd.read_csv(ruta)
+        # la tabla HTML es lo caro: se guarda ya renderizada
+        tabla = cache.obtener(("html", str(ruta)),
+                              lambda: leer_frame(ruta).to_html(classes='table', index=False), [ruta])
     except Exception as e:
         return f"❌ Error al leer {ruta.name}: {e}", 500
 
@@ -122,25 +274,29 @@ def ver_programacion_detallada():
     return render_template(
         "resultado.html",
         mensaje=mensaje,
-        tabla=df.to_html(classes='table', index=False)
+        tabla=tabla
     )
 
+def serie_utilidad(ruta_archivo):
+    """{labels, data} de Total_Utilidad por Año-Mes (con el status HTTP)."""
+    df = leer_frame(ruta_archivo).rename(columns=str.strip)
+
+    if 'Año-Mes' not in df.columns or 'Total_Utilidad' not in df.columns:
+        return {"error": "Columnas requeridas no encontradas"}, 400
+
+    return {
+        "labels": df['Año-Mes'].astype(str).tolist(),
+        "data"  : df['Total_Utilidad'].tolist()
+    }, 200
+
 @app.route('/api/utilidad_previa')
 def api_utilidad_previa():
     ruta_archivo = os.path.join(DATA_FOLDER, 'Utilidad_previa.csv')
     if not os.path.exists(ruta_archivo):
         return jsonify({"error": "CSV no encontrado"}), 404
 
-    df = pd.read_csv(ruta_archivo)
-    df.columns = [c.strip() for c in df.columns]
-
-    if 'Año-Mes' not in df.columns or 'Total_Utilidad' not in df.columns:
-        return jsonify({"error": "Columnas requeridas no encontradas"}), 400
-
-    return jsonify({
-        "labels": df['Año-Mes'].astype(str).tolist(),
-        "data"  : df['Total_Utilidad'].tolist()
-    })
+    return json_cacheado(("api", ruta_archivo), [ruta_archivo],
+                         lambda: serie_utilidad(ruta_archivo))
 
 @app.route('/grafica/utilidad_previa')
 def grafica_utilidad_previa():
@@ -153,16 +309,8 @@ def api_utilidad_posterior():
     if not os.path.exists(ruta_archivo):
         return jsonify({"error": "CSV no encontrado"}), 404
 
-    df = pd.read_csv(ruta_archivo)
-    df.columns = [c.strip() for c in df.columns]
-
-    if 'Año-Mes' not in df.columns or 'Total_Utilidad' not in df.columns:
-        return jsonify({"error": "Columnas requeridas no encontradas"}), 400
-
-    return jsonify({
-        "labels": df['Año-Mes'].astype(str).tolist(),
-        "data"  : df['Total_Utilidad'].tolist()
-    })
+    return json_cacheado(("api", ruta_archivo), [ruta_archivo],
+                         lambda: serie_utilidad(ruta_archivo))
 
 @app.route('/grafica/utilidad_posterior')
 def grafica_utilidad_posterior_html():
@@ -180,16 +328,19 @@ def api_utilidad_comparada():
     if not (os.path.exists(fn_prev) and os.path.exists(fn_post)):
         return jsonify({"error": "Alguno de los CSV no existe"}), 404
 
+    return json_cacheado("utilidad_comparada", [fn_prev, fn_post],
+                         lambda: comparar_utilidad(fn_prev, fn_post))
+
+def comparar_utilidad(fn_prev, fn_post):
+    """Previa vs. posterior por 'Año-Mes' (con el status HTTP)."""
     # Leer CSV → normalizar encabezados
-    prev  = pd.read_csv(fn_prev)
-    post  = pd.read_csv(fn_post)
-    for df in (prev, post):
-        df.columns = [c.strip() for c in df.columns]
+    prev = leer_frame(fn_prev).rename(columns=str.strip)
+    post = leer_frame(fn_post).rename(columns=str.strip)
 
     # Verificar columnas requeridas
     for df,n in ((prev,'previa'),(post,'posterior')):
         if not {'Año-Mes','Total_Utilidad'}.issubset(df.columns):
-            return jsonify({"error": f"Columnas faltantes en {n}"}), 400
+            return {"error": f"Columnas faltantes en {n}"}, 400
 
     # Combinar por 'Año-Mes'
     df = prev.merge(
@@ -197,11 +348,11 @@ def api_utilidad_comparada():
         suffixes=('_PREV','_POST')
     ).sort_values('Año-Mes')
 
-    return jsonify({
+    return {
         "labels"    : df['Año-Mes'].astype(str).tolist(),
         "prev_data" : df['Total_Utilidad_PREV'].fillna(0).tolist(),
         "post_data" : df['Total_Utilidad_POST'].fillna(0).tolist()
-    })
+    }, 200
 
 @app.route('/grafica/utilidad_comparada')
 def grafica_utilidad_comparada():
@@ -211,31 +362,56 @@ def grafica_utilidad_comparada():
         api_url=url_for('api_utilidad_comparada')
     )
 
-def tabla_json(pattern):
-    """Devuelve JSON {columns, rows} del CSV más reciente que coincida."""
-    archivos = sorted(Path(DETALLE_DIR).glob(pattern), reverse=True)
-    if not archivos:
+def tabla_indexada(pattern):
+    """TablaIndexada (compartida) del CSV más reciente que coincida, o None."""
+    from subcarpeta import tabla_remota
+    from subcarpeta.cache_csv import leer_csv
+    archivo = ultimo(pattern)
+    if archivo is None:
         return None
 
-    # detectar si el separador es ; o ,
-    with open(archivos[0], encoding="utf-8") as fh:
-        sample = fh.read(2048)
-        sep = ";" if sample.count(";") > sample.count(",") else ","
+    def indexar():
+        # detectar si el separador es ; o ,
+        with open(archivo, encoding="utf-8") as fh:
+            sample = fh.read(2048)
+            sep = ";" if sample.count(";") > sample.count(",") else ","
+        # la tabla se queda con su propio DataFrame (no se cuenta dos veces en cache)
+        return tabla_remota.TablaIndexada(leer_csv(archivo, sep=sep))
 
-    df = pd.read_csv(archivos[0], sep=sep)
-    # NaN/Nat -> null
-    rows = json.loads(df.to_json(orient="records"))
-    return jsonify({"columns": list(df.columns), "rows": rows})
+    return archivo, cache.obtener(("tabla", str(archivo)), indexar, [archivo])
+
+def tabla_json(pattern):
+    """
+    JSON del CSV más reciente que coincida. Con ?page=… sólo la página
+    pedida (modo remoto de Tabulator, ver tabla_remota); sin page, todo
+    {columns, rows} como antes. ?formato=csv descarga lo filtrado.
+    """
+    encontrado = tabla_indexada(pattern)
+    if encontrado is None:
+        return jsonify({"error": "CSV no encontrado"}), 404
+    archivo, tabla = encontrado
+
+    from subcarpeta import tabla_remota
+    pagina, tam, filtros, orden, q = tabla_remota.parametros(request.args)
+    try:
+        if request.args.get("formato") == "csv":
+            return Response(tabla.csv(filtros, orden, q), mimetype="text/csv", headers={
+                "Content-Disposition": f"attachment; filename={Path(archivo).name}"})
+        if "page" not in request.args:
+            cuerpo = cache.obtener(("tabla_completa", str(archivo)), tabla.completa, [archivo])
+        else:
+            cuerpo = tabla.pagina(pagina, tam, filtros, orden, q)
+    except (KeyError, ValueError) as e:
+        return jsonify({"error": str(e).strip("'\"")}), 400
+    return Response(cuerpo, mimetype="application/json")
 
 @app.route("/api/pedidos_limpios")
 def api_pedidos_limpios():
-    data = tabla_json("[Pp]edidos_limpios_*.csv")
-    return data if data else jsonify({"error": "CSV no encontrado"}), 404
+    return tabla_json("[Pp]edidos_limpios_*.csv")
 
 @app.route("/api/pedidos_cancelados")
 def api_pedidos_cancelados():
-    data = tabla_json("[Pp]edidosCancelados.csv")   # admite guion bajo
-    return data if data else jsonify({"error": "CSV no encontrado"}), 404
+    return tabla_json("[Pp]edidosCancelados.csv")   # admite guion bajo
 
 
 # Páginas Tabulator
@@ -259,37 +435,8 @@ def ejecutar_mochila():
                                mensaje="⚠️ Selecciona primero una fecha.")
 
     try:
-        fecha   = datetime.strptime(fecha_str,"%Y-%m-%d").date()
-        archivo = f"detalle_mochila_{fecha}.csv"
-        ruta    = Path(DETALLE_DIR) / archivo
-
-        # Si el detalle YA existe → responder al instante
-        if ruta.exists():
-            df = pd.read_csv(ruta)
-            msg = f"Detalle de mochila · {fecha}"
-            return render_template("resultado.html",
-                                   mensaje=msg,
-                                   tabla=df.to_html(classes="table", index=False))
-
-        # Caso contrario: ejecutar mochila una sola vez
-        mensaje_alg = algoritmo_mochila.ejecutar()
-
-        # la ejecución siempre produce programacion_detallada y programacion_
-        prog = sorted(Path(DETALLE_DIR).glob("programacion_*.csv"), reverse=True)[0]
-        df_total = pd.read_csv(prog)
-        df_total.columns = df_total.columns.str.replace(" ","_").str.upper()
-        df_total["FECHA_ASIGNADA"] = pd.to_datetime(df_total["FECHA_ASIGNADA"],
-                                                    errors="coerce")
-        df_dia = df_total[df_total["FECHA_ASIGNADA"].dt.date == fecha]
-
-        cols = [c for c in ["ID","CLIENTE","FECHA","PRIORIDAD","LITROS",
-                            "GANANCIA","GANANCIA_AJUST","LITROS_RENTADOS"]
-                if c in df_dia.columns]
-        df_dia[cols].to_csv(ruta, index=False)          # cachear para la próxima
-
-        return render_template("resultado.html",
-                               mensaje=f"{mensaje_alg}<br>Detalle de mochila · {fecha}",
-                               tabla=df_dia[cols].to_html(classes="table", index=False))
+        fecha = datetime.strptime(fecha_str,"%Y-%m-%d").date()
+        return responder_mochila(fecha)
 
     except Exception as e:
         return render_template("resultado.html",
@@ -297,5 +444,81 @@ def ejecutar_mochila():
                                tabla="")
 
 
+# ------------------------------------------------------------------
+# Arranque: tiempos y precarga opcional
+#
+# Para servidores pre-fork (gunicorn --preload, uWSGI sin lazy-apps) con
+# TSO_PRECARGAR=1 el maestro importa lo pesado y deja en cache las
+# respuestas de utilidades y tablas antes de crear los workers, que lo
+# heredan ya cargado. `python app.py --precargar` hace lo mismo en local.
+# ------------------------------------------------------------------
+PRECARGA_URLS = ("/api/utilidad_previa", "/api/utilidad_posterior", "/api/utilidad_comparada",
+                 "/api/pedidos_limpios?page=1", "/api/pedidos_cancelados?page=1")
+
+ARRANQUE = {"importar_s": None, "precarga_s": None}
+
+def precargar(datos=True):
+    """Importa PESADOS y, con datos=True, calienta la cache con PRECARGA_URLS."""
+    t = time.perf_counter()
+    for modulo in PESADOS:
+        importlib.import_module(modulo)
+    if datos:
+        cliente = app.test_client()
+        for url in PRECARGA_URLS:
+            try:
+                cliente.get(url)
+            except Exception as e:                 # una tabla rota no debe tumbar el arranque
+                print(f"⚠️ Precarga de {url}: {e}", file=sys.stderr)
+    ARRANQUE["precarga_s"] = round(time.perf_counter() - t, 3)
+    return ARRANQUE["precarga_s"]
+
+@app.route('/api/arranque')
+def api_arranque():
+    """Tiempos de arranque de este proceso y qué dependencias pesadas ya cargó."""
+    return jsonify(dict(ARRANQUE, cargados={m: m in sys.modules for m in PESADOS}))
+
+@metricas.registro.recolector
+def _metricas_app():
+    """Estado de este proceso leído en cada /metrics: caches, cola y arranque."""
+    mem = cache.resumen()
+    trabajos_por_estado = {}
+    for t in cola.listar():
+        trabajos_por_estado[t["estado"]] = trabajos_por_estado.get(t["estado"], 0) + 1
+    muestras = [
+        ("tso_cache_memoria_bytes", "gauge", "Bytes en la cache de CSV y respuestas", [({}, mem["bytes"])]),
+        ("tso_cache_memoria_entradas", "gauge", "Entradas en la cache de CSV y respuestas",
+         [({}, mem["entradas"])]),
+        ("tso_cache_memoria_consultas_total", "counter", "Consultas a la cache de CSV y respuestas",
+         [({"resultado": "acierto"}, mem["aciertos"]), ({"resultado": "fallo"}, mem["fallos"])]),
+        ("tso_trabajos", "gauge", "Trabajos de fondo recordados por estado",
+         [({"estado": e}, n) for e, n in trabajos_por_estado.items()]),
+        ("tso_arranque_segundos", "gauge", "Tiempo de import app y de precargar()",
+         [({"fase": f[:-2]}, v) for f, v in ARRANQUE.items() if v is not None]),
+    ]
+    # la cache de la mochila sólo si el motor ya se importó (no cargar OR-Tools por un scrape)
+    motor = sys.modules.get("subcarpeta.algoritmo_mochila")
+    if motor is not None:
+        st = motor.cache.stats()
+        muestras += [
+            ("tso_cache_mochila_consultas_total", "counter", "Consultas a la cache de la mochila",
+             [({"resultado": "acierto"}, st["aciertos"]), ({"resultado": "acierto_disco"}, st["aciertos_disco"]),
+              ({"resultado": "fallo"}, st["fallos"])]),
+            ("tso_cache_mochila_segundos_ahorrados_total", "counter",
+             "Tiempo de solver ahorrado por la cache de la mochila", [({}, st["segundos_ahorrados"])]),
+        ]
+    return muestras
+
+@app.route('/metrics')
+def metrics():
+    """Métricas del proceso en formato de texto de Prometheus."""
+    return Response(metricas.registro.exposicion(), mimetype="text/plain; version=0.0.4")
+
+ARRANQUE["importar_s"] = round(time.perf_counter() - _T0, 3)
+
+if os.environ.get("TSO_PRECARGAR") == "1":
+    precargar()
+
 if __name__ == '__main__':
+    if "--precargar" in sys.argv:
+        precargar()
     app.run(debug=True)
\ No newline at end of file
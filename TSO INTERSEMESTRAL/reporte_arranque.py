@@ -0,0 +1,91 @@
+# -------------------------------------------------------------------
+# Reporte de tiempo de arranque de la app.
+#
+# Importa app.py en intérpretes nuevos (`python -X importtime`) y
+# reporta:
+#   • tiempo total de `import app` (mediana de N corridas en frío)
+#   • los módulos que más tardan (acumulado, de la última corrida)
+#   • qué dependencias pesadas quedaron cargadas al importar
+#   • opcional: lo que tarda precargar()
+#
+# Uso (desde esta carpeta, como la app):
+#   python reporte_arranque.py                   → reporte en pantalla
+#   python reporte_arranque.py -n 7 --precarga
+#   python reporte_arranque.py --json arranque.jsonl   → agrega una línea
+#     (fecha, commit, python, tiempos) para seguirlo entre versiones
+# -------------------------------------------------------------------
+
+import argparse, json, os, platform, re, statistics, subprocess, sys
+from datetime import datetime
+
+PROBAR = """
+import json, sys, time
+t = time.perf_counter()
+import app
+importar = time.perf_counter() - t
+cargados = {{m: m in sys.modules for m in app.PESADOS}}
+precarga = app.precargar() if {precarga} else None
+print("@@" + json.dumps({{"importar_s": importar, "precarga_s": precarga, "cargados": cargados}}))
+"""
+
+LINEA = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)")
+
+def corrida(precarga=False):
+    """Un `import app` en frío; devuelve (resumen, [(acumulado_us, profundidad, módulo)])."""
+    res = subprocess.run([sys.executable, "-X", "importtime", "-c", PROBAR.format(precarga=precarga)],
+                         capture_output=True, text=True, env=dict(os.environ, TSO_PRECARGAR="0"))
+    if res.returncode != 0:
+        sys.exit(f"❌ No se pudo importar app.py:\n{res.stderr[-2000:]}")
+    resumen = json.loads(next(l[2:] for l in res.stdout.splitlines() if l.startswith("@@")))
+    modulos = [(int(m[2]), len(m[3]) // 2, m[4]) for m in map(LINEA.match, res.stderr.splitlines()) if m]
+    return resumen, modulos
+
+def commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def main():
+    ap = argparse.ArgumentParser(description="Tiempo de arranque de app.py")
+    ap.add_argument("-n", type=int, default=5, help="corridas en frío (default 5)")
+    ap.add_argument("--top", type=int, default=15, help="módulos a listar (default 15)")
+    ap.add_argument("--precarga", action="store_true", help="medir también precargar()")
+    ap.add_argument("--json", metavar="ARCHIVO", help="agregar el resultado como línea JSON")
+    args = ap.parse_args()
+
+    corridas = [corrida(args.precarga) for _ in range(max(1, args.n))]
+    importar = [r["importar_s"] for r, _ in corridas]
+    resumen, modulos = corridas[-1]
+
+    print(f"import app: mediana {statistics.median(importar)*1e3:.0f} ms  "
+          f"(min {min(importar)*1e3:.0f} · max {max(importar)*1e3:.0f}, {len(importar)} corridas)")
+    if args.precarga:
+        precarga = [r["precarga_s"] for r, _ in corridas]
+        print(f"precargar(): mediana {statistics.median(precarga)*1e3:.0f} ms")
+
+    print("\nDependencias pesadas cargadas al importar:")
+    for m, cargado in resumen["cargados"].items():
+        print(f"  {'sí' if cargado else 'no':>2}  {m}")
+
+    print("\nMódulos más lentos (acumulado, ms):")
+    for us, prof, nombre in sorted(modulos, reverse=True)[:args.top]:
+        print(f"  {us/1e3:8.1f}  {'  ' * prof}{nombre}")
+
+    if args.json:
+        fila = {
+            "fecha":       datetime.now().isoformat(timespec="seconds"),
+            "commit":      commit(),
+            "python":      platform.python_version(),
+            "corridas":    len(importar),
+            "importar_ms": round(statistics.median(importar) * 1e3, 1),
+            "precarga_ms": round(statistics.median(precarga) * 1e3, 1) if args.precarga else None,
+            "cargados":    resumen["cargados"],
+        }
+        with open(args.json, "a", encoding="utf-8") as fh:
+            fh.write(json.dumps(fila, ensure_ascii=False) + "\n")
+        print(f"\n→ Agregado a {args.json}")
+
+if __name__ == "__main__":
+    main()
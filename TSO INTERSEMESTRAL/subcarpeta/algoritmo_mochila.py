@@ -1,7 +1,12 @@
-import pandas as pd, re, math, sys
+import pandas as pd, numpy as np, re, math, os, time
 from pathlib import Path
 from datetime import datetime, timedelta
-from ortools.algorithms.python import knapsack_solver
+from .solver_mochila import LIMITE_S, VERSION as VERSION_SOLVER
+from .cache_mochila import CacheMochila
+from .almacen_pedidos import AlmacenPedidos
+from .almacen_programacion import AlmacenProgramacion, clave_entradas
+from .cache_csv import leer_csv
+from . import metricas
 
 # ---------------- Parámetros del negocio ----------------
 CSV_DIR         = Path("csv")
@@ -10,107 +15,245 @@ CAP_PIPA        = 64_000
 PENALIZ         = 0.05
 MAX_DIAS_ESPERA = 2
 VALOR_MAP       = {1: 3, 2: 2, 3: 1}
+SOLVER          = "auto"            # backend de mochila (ver solver_mochila)
+CACHE_DISCO     = os.environ.get("TSO_CACHE_MOCHILA")   # ruta SQLite opcional; None → sólo memoria
+ALMACEN         = CSV_DIR / "programacion.sqlite"    # corridas consultables por día
+
+cache   = CacheMochila(ruta=CACHE_DISCO)
+almacen = AlmacenProgramacion(ALMACEN)
+
+UN_DIA = timedelta(days=1)
+
+def fragmentar(raw, cap=CAP_PROPIA):
+    """
+    Parte los pedidos > cap en sub-pedidos ID-1, ID-2, … de `cap` litros
+    y un último fragmento con el remanente. Vectorizado: repite cada fila
+    según su número de partes y calcula el índice de fragmento con offsets
+    acumulados, sin crear una Series por fragmento. Conserva los dtypes.
+    Los pedidos con LITROS <= 0 no generan fragmentos.
+    """
+    litros = raw["LITROS"].to_numpy(dtype=float)
+    if np.isnan(litros).any():
+        raise ValueError("Hay pedidos sin LITROS; no se pueden fragmentar")
+    partes = np.maximum(np.ceil(litros / cap), 0).astype(np.int64)
+
+    fila   = np.repeat(np.arange(len(raw)), partes)
+    parte  = np.arange(len(fila)) - np.repeat(np.cumsum(partes) - partes, partes)
+    ultima = parte == partes[fila] - 1
+
+    df = raw.iloc[fila].reset_index(drop=True)
+    df["LITROS"] = np.where(ultima, litros[fila] - cap * (partes[fila] - 1), cap)
+    df["ID"]     = df["ID"].astype(str) + "-" + (parte + 1).astype(str)
+    return df
+
+# Algoritmo mochila helper
+def solve_knapsack(pesos, valores, capacidad, metodo=SOLVER, limite_s=LIMITE_S):
+    """(posiciones seleccionadas, info del solver: metodo, gap, cache…)."""
+    sel, info = cache.resolver(pesos.tolist(), valores.tolist(), capacidad, metodo, limite_s)
+    return np.asarray(sel, dtype=np.int64), info
+
+def penalizar(ganancia, litros, rentados, penaliz=PENALIZ):
+    """Ganancia tras descontar `penaliz` sobre los litros rentados (vectorizado)."""
+    gxl = np.divide(ganancia, litros, out=np.zeros_like(ganancia), where=litros != 0)
+    return np.where(rentados > 0, ganancia - rentados * gxl * penaliz, ganancia)
+
+def simular(alm, desde_dt, cap_propia=CAP_PROPIA, cap_pipa=CAP_PIPA,
+            penaliz=PENALIZ, max_espera=MAX_DIAS_ESPERA, metodo=SOLVER,
+            inicio=None, backlog=(), bitacora=None):
+    """
+    Simulación diaria dirigida por eventos sobre un AlmacenPedidos.
+
+    En lugar de avanzar día por día revisando todos los pedidos, usa una
+    cola de liberación ordenada por FECHA_DISP; el vencimiento por
+    FECHA_ENTREGA se evalúa como máscara sobre el backlog activo. El
+    calendario salta directo al siguiente día con trabajo y los pedidos
+    cuyo deadline pasa sin asignarse quedan con FECHA_ASIGNADA vacía
+    (terminan en pendientes_*.csv). Costo ~ O(pedidos·log + días activos).
+
+    Para reanudar desde un checkpoint: `inicio` es el primer día a simular
+    (sólo se encolan los pedidos que se liberan desde ese día) y `backlog`
+    los índices que ya estaban esperando. Si se pasa `bitacora` (dict) se
+    registra en cada corte de día lo asignado, lo vencido y el backlog
+    (ver checkpoint_mochila). Cada día resuelto se reporta a
+    metricas.dia() (candidatos, tiempo de solver, pipas).
+
+    Modifica `alm` en sitio y devuelve {fecha: pipas rentadas}.
+    """
+    un_dia = pd.Timedelta(UN_DIA).value
+    desde  = pd.Timestamp(desde_dt).value
+    fecha  = pd.Timestamp(inicio or desde_dt).value
+
+    todos   = np.arange(len(alm))
+    if fecha > desde:
+        todos = todos[alm.disp > fecha - un_dia]
+    liberar = todos[np.argsort(alm.disp[todos], kind="stable")]
+    disp    = alm.disp[liberar]
+    activos = np.sort(np.asarray(backlog, dtype=np.int64))
+    pipas_rentadas = {}
+    k = 0
+
+    while k < len(liberar) or len(activos):
+        # sin backlog → saltar al siguiente día con liberaciones
+        if not len(activos) and disp[k] > fecha:
+            fecha += un_dia * -(-(disp[k] - fecha) // un_dia)
+
+        j = np.searchsorted(disp, fecha, side="right")
+        if j > k:
+            activos = np.sort(np.concatenate((activos, liberar[k:j])))
+            k = j
+
+        # deadline vencido → se queda sin asignar
+        vence    = alm.entrega[activos] < fecha
+        vencidos = activos[vence]
+        activos  = activos[~vence]
+
+        dia = pd.Timestamp(fecha)
+        if not len(activos):
+            if bitacora is not None and len(vencidos):
+                bitacora[dia] = _corte(alm, vencidos=vencidos)
+            metricas.solo_vencidos(len(vencidos))
+            continue
+
+        alm.espera[activos] += 1
+        cand = activos[alm.espera[activos] <= max_espera]
+
+        t = time.perf_counter()
+        pos, info = solve_knapsack(alm.peso[cand], alm.valor[cand], cap_propia, metodo)
+        segundos  = time.perf_counter() - t
+        sel = cand[pos]
+        alm.asignada[sel] = fecha
+
+        # resto → rentada
+        rent = activos[alm.sin_asignar(activos)]
+        alm.asignada[rent]       = fecha
+        alm.rentados[rent]       = alm.litros[rent]
+        alm.ganancia_ajust[rent] = penalizar(alm.ganancia[rent], alm.litros[rent],
+                                             alm.rentados[rent], penaliz)
+        pipas_rentadas[dia.date()] = math.ceil(alm.litros[rent].sum() / cap_pipa)
+
+        hoy     = activos
+        activos = activos[alm.sin_asignar(activos)]
+        if bitacora is not None:
+            bitacora[dia] = _corte(alm, hoy[~alm.sin_asignar(hoy)], vencidos, activos,
+                                   pipas_rentadas[dia.date()])
+        metricas.dia(dia, len(cand), len(hoy), len(sel), len(rent), len(vencidos),
+                     pipas_rentadas[dia.date()], info, segundos)
+        fecha += un_dia
+
+    return pipas_rentadas
+
+def _corte(alm, asignados=(), vencidos=(), espera=(), pipas=None):
+    """Estado compacto de un corte de día, indexado por ID de fragmento."""
+    asignados, vencidos, espera = (np.asarray(x, dtype=np.int64) for x in (asignados, vencidos, espera))
+    return {
+        "asignados": dict(zip(alm.id[asignados], zip(alm.asignada[asignados].tolist(),
+                                                     alm.rentados[asignados].tolist(),
+                                                     alm.ganancia_ajust[asignados].tolist(),
+                                                     alm.espera[asignados].tolist()))),
+        "vencidos":  dict(zip(alm.id[vencidos], alm.espera[vencidos].tolist())),
+        "backlog":   dict(zip(alm.id[espera],   alm.espera[espera].tolist())),
+        "pipas":     pipas,
+    }
+
+def entradas(csv_dir=CSV_DIR):
+    """(prioridad_clientes_<rango>.csv, pedidos_limpios_<rango>.csv) que lee cargar()."""
+    prior_csv = next(csv_dir.glob("prioridad_clientes*_A_*.csv"))
+    ped_csv   = csv_dir / f"pedidos_limpios{prior_csv.stem.replace('prioridad_clientes','')}.csv"
+    return prior_csv, ped_csv
+
+def parametros():
+    """Parámetros de negocio y versión del solver con que se programa (llave de corrida)."""
+    return {"cap_propia": CAP_PROPIA, "cap_pipa": CAP_PIPA, "penaliz": PENALIZ,
+            "max_espera": MAX_DIAS_ESPERA, "valor_map": VALOR_MAP, "solver": SOLVER,
+            "version_solver": VERSION_SOLVER}
+
+def clave_corrida(csv_dir=CSV_DIR):
+    """Clave en el almacén de la corrida con las entradas y parámetros actuales."""
+    return clave_entradas(entradas(csv_dir), parametros())
+
+def cargar(csv_dir=CSV_DIR):
+    """
+    Localiza prioridad_clientes_<rango>.csv y su pedidos_limpios_<rango>.csv.
+    Devuelve (raw, prio_map, desde_dt, hasta_dt).
+    """
+    prior_csv, ped_csv = entradas(csv_dir)
+
+    # Extraer fechas del nombre
+    m = re.search(r'_(\d{4}-\d{2}-\d{2})_A_(\d{4}-\d{2}-\d{2})', prior_csv.stem, re.I)
+    if not m:
+        raise ValueError("El nombre de prioridad debe contener rango _YYYY-MM-DD_A_YYYY-MM-DD")
+    desde_dt, hasta_dt = map(datetime.fromisoformat, m.groups())
+
+    # Cargar prioridad
+    prio_map = leer_csv(prior_csv).set_index("CLIENTE")["Prioridad"]
+
+    # Cargar pedidos
+    raw = con_entrega(leer_csv(ped_csv, parse_dates=["FECHA"]))
+    return raw, prio_map, desde_dt, hasta_dt
+
+def con_entrega(raw):
+    """Agrega FECHA_ENTREGA (deadline); sin columna o vacía → sin restricción."""
+    if "FECHA ENTREGA" in raw.columns:
+        entrega = pd.to_datetime(raw["FECHA ENTREGA"], dayfirst=True, errors="coerce")\
+                    .fillna(pd.Timestamp.max)
+    else:
+        entrega = pd.Timestamp.max
+    return raw.assign(FECHA_ENTREGA=entrega)
+
+def preparar(raw, prio_map, cap_propia=CAP_PROPIA, valor_map=VALOR_MAP):
+    """Fragmenta e inicializa las columnas de la simulación."""
+    df = fragmentar(raw, cap_propia)
+    df["GANANCIA"]        = pd.to_numeric(df["UTILIDAD"], errors="coerce").fillna(0)
+    df["FECHA_DISP"]      = df["FECHA"] + timedelta(days=5)
+    df["PRIORIDAD"]       = df["PRIORIDAD"].fillna(df["CLIENTE"].map(prio_map)).astype(int)
+    df["VALOR"]           = df["PRIORIDAD"].map(valor_map)
+    df["FECHA_ASIGNADA"]  = pd.NaT
+    df["LITROS_RENTADOS"] = 0
+    df["GANANCIA_AJUST"]  = df["GANANCIA"]
+    df["ESPERA_DIAS"]     = 0
+    return df
 
 def ejecutar():
     try:
-        # Buscar archivo de prioridad
-        prior_csv = next(CSV_DIR.glob("prioridad_clientes*_A_*.csv"))
-        ped_csv   = CSV_DIR / f"pedidos_limpios{prior_csv.stem.replace('prioridad_clientes','')}.csv"
-
-        # Extraer fechas del nombre
-        m = re.search(r'_(\d{4}-\d{2}-\d{2})_A_(\d{4}-\d{2}-\d{2})', prior_csv.stem, re.I)
-        if not m:
-            return "❌ El nombre de prioridad debe contener rango _YYYY-MM-DD_A_YYYY-MM-DD"
-        desde_dt, hasta_dt = map(datetime.fromisoformat, m.groups())
-
-        # Cargar prioridad
-        prio_map = pd.read_csv(prior_csv).set_index("CLIENTE")["Prioridad"]
-
-        # Cargar pedidos
-        raw = pd.read_csv(ped_csv, parse_dates=["FECHA"])
-        if "FECHA ENTREGA" in raw.columns:
-            raw["FECHA_ENTREGA"] = pd.to_datetime(raw["FECHA ENTREGA"], dayfirst=True, errors="coerce")
-        else:
-            raw["FECHA_ENTREGA"] = pd.Timestamp.max
-
-        # Fragmentar pedidos grandes
-        fragmentos = []
-        for _, r in raw.iterrows():
-            litros = r["LITROS"]
-            partes = math.ceil(litros / CAP_PROPIA)
-            for i in range(partes):
-                frag = r.copy()
-                frag["LITROS"] = CAP_PROPIA if i < partes-1 else litros - CAP_PROPIA*(partes-1)
-                frag["ID"]     = f"{r['ID']}-{i+1}"
-                fragmentos.append(frag)
-        df = pd.DataFrame(fragmentos)
-
-        # Inicializar columnas
-        df["GANANCIA"]        = pd.to_numeric(df["UTILIDAD"], errors="coerce").fillna(0)
-        df["FECHA_DISP"]      = df["FECHA"] + timedelta(days=5)
-        df["PRIORIDAD"]       = df["PRIORIDAD"].fillna(df["CLIENTE"].map(prio_map)).astype(int)
-        df["VALOR"]           = df["PRIORIDAD"].map(VALOR_MAP)
-        df["FECHA_ASIGNADA"]  = pd.NaT
-        df["LITROS_RENTADOS"] = 0
-        df["GANANCIA_AJUST"]  = df["GANANCIA"]
-        df["ESPERA_DIAS"]     = 0
-
-        pend = df.to_dict("records")
-        pipas_rentadas = {}
-        fecha = desde_dt
-
-        # Algoritmo mochila helper
-        def solve_knapsack(cands, capacidad):
-            pesos   = [int(p['LITROS']) for p in cands]
-            valores = [int(p['VALOR'])  for p in cands]
-            solver = knapsack_solver.KnapsackSolver(
-                knapsack_solver.SolverType.KNAPSACK_DYNAMIC_PROGRAMMING_SOLVER, "knap")
-            solver.init(valores, [pesos], [capacidad])
-            solver.solve()
-            return [i for i in range(len(cands)) if solver.best_solution_contains(i)]
-
-        def penalizar(p, rentados):
-            if rentados <= 0: return p["GANANCIA"]
-            gxl = p["GANANCIA"]/p["LITROS"] if p["LITROS"] else 0
-            return p["GANANCIA"] - rentados * gxl * PENALIZ
-
-        # Simulación diaria
-        while any(pd.isna(p["FECHA_ASIGNADA"]) for p in pend):
-            hoy = [p for p in pend if pd.isna(p["FECHA_ASIGNADA"]) and p["FECHA_DISP"] <= fecha and fecha <= p["FECHA_ENTREGA"]]
-            if not hoy:
-                fecha += timedelta(days=1)
-                continue
-
-            for p in hoy: p["ESPERA_DIAS"] += 1
-            cand = [p for p in hoy if p["ESPERA_DIAS"] <= MAX_DIAS_ESPERA]
-
-            idx_sel = solve_knapsack(cand, CAP_PROPIA)
-            sel_set  = {id(cand[i]) for i in idx_sel}
-            for p in cand:
-                if id(p) in sel_set:
-                    p["FECHA_ASIGNADA"] = fecha
-
-            rent_total = 0
-            for p in hoy:
-                if pd.notna(p["FECHA_ASIGNADA"]): continue
-                p["FECHA_ASIGNADA"]  = fecha
-                p["LITROS_RENTADOS"] = p["LITROS"]
-                rent_total          += p["LITROS"]
-                p["GANANCIA_AJUST"]  = penalizar(p, p["LITROS"])
-            pipas_rentadas[fecha.date()] = math.ceil(rent_total / CAP_PIPA)
-            fecha += timedelta(days=1)
-
-        # Exportar archivos
-        sel_df = pd.DataFrame(pend)
-        suf = f"{desde_dt:%Y-%m-%d}_A_{hasta_dt:%Y-%m-%d}"
-        sel_df.to_csv(CSV_DIR/f"programacion_{suf}.csv", index=False)
-        sel_df[pd.isna(sel_df["FECHA_ASIGNADA"])]\
-              .to_csv(CSV_DIR/f"pendientes_{suf}.csv", index=False)
-        
-        sel_df[pd.notna(sel_df["FECHA_ASIGNADA"])]\
-        .to_csv(CSV_DIR / f"programacion_detallada_{suf}.csv", index=False)
-
-        return f"✓ Programación terminada. Fragmentos: {len(fragmentos)}. Pipas rentadas: {sum(pipas_rentadas.values())}"
+        from . import checkpoint_mochila
+
+        clave = clave_corrida()                       # antes de leer: la corrida es de estas entradas
+        with metricas.corrida("mochila") as corrida:
+            with metricas.etapa("lectura"):
+                raw, prio_map, desde_dt, hasta_dt = cargar()
+            with metricas.etapa("fragmentacion"):
+                df = preparar(raw, prio_map)
+            suf = f"{desde_dt:%Y-%m-%d}_A_{hasta_dt:%Y-%m-%d}"
+
+            # Simulación diaria (por eventos), reanudando desde el checkpoint
+            # en el primer día afectado por pedidos nuevos o modificados
+            with metricas.etapa("mochila"):
+                alm = AlmacenPedidos(df)
+                ckpt_path = CSV_DIR / f"checkpoint_{suf}.json"
+                pipas_rentadas, ckpt, inicio = checkpoint_mochila.replanificar(
+                    alm, desde_dt, checkpoint_mochila.cargar(ckpt_path), prio_map=prio_map)
+                checkpoint_mochila.guardar(ckpt_path, ckpt)
+
+            # Exportar archivos
+            with metricas.etapa("exportar"):
+                sel_df = alm.a_dataframe(df)
+                sel_df.to_csv(CSV_DIR/f"programacion_{suf}.csv", index=False)
+                sel_df[pd.isna(sel_df["FECHA_ASIGNADA"])]\
+                      .to_csv(CSV_DIR/f"pendientes_{suf}.csv", index=False)
+
+                sel_df[pd.notna(sel_df["FECHA_ASIGNADA"])]\
+                .to_csv(CSV_DIR / f"programacion_detallada_{suf}.csv", index=False)
+                almacen.guardar(sel_df, clave, origen=f"programacion_{suf}.csv")
+
+            # los días anteriores a `inicio` vienen del checkpoint: no aparecen en "dias"
+            corrida.extra.update(desde=f"{desde_dt:%Y-%m-%d}", hasta=f"{hasta_dt:%Y-%m-%d}",
+                                 replaneado_desde=f"{inicio:%Y-%m-%d}", fragmentos=len(df),
+                                 cache_mochila=cache.stats())
+        corrida.guardar(CSV_DIR / f"metricas_{suf}.json")
+
+        return (f"✓ Programación terminada. Fragmentos: {len(df)}. Pipas rentadas: {sum(pipas_rentadas.values())}"
+                f". Replaneado desde {inicio:%Y-%m-%d}"
+                f". Cache mochila: {cache.aciertos + cache.aciertos_disco} aciertos / {cache.fallos} fallos")
 
     except StopIteration:
         return "❌ No se encontró ningún archivo 'prioridad_clientes*_A_*.csv' en la carpeta csv/"
@@ -0,0 +1,127 @@
+# ---------------------------------------------------------------
+# Almacén SQLite de las programaciones que produce la mochila.
+#
+# Cada ejecución es una "corrida" identificada por la firma (ruta,
+# mtime, tamaño) de sus CSV de entrada más los parámetros de negocio y
+# la versión del solver (ver algoritmo_mochila.clave_corrida): con otros
+# parámetros es otra corrida aunque los CSV no cambien. Sus fragmentos
+# van a la tabla
+# programacion con índices (corrida, FECHA_ASIGNADA) y (corrida,
+# CLIENTE), así que el detalle de un día o de un rango de días es una
+# búsqueda por índice en lugar de releer y filtrar programacion_*.csv.
+#
+# Las fechas se guardan como texto ISO (YYYY-MM-DD): ordenan igual que
+# las fechas y BETWEEN usa el índice. Se conservan las últimas
+# MAX_CORRIDAS corridas.
+# ---------------------------------------------------------------
+
+import json, os, sqlite3, threading, time
+import pandas as pd
+
+from .cache_memoria import firma_archivos
+
+MAX_CORRIDAS = 20
+
+# columna → tipo SQLite (las que falten en el DataFrame quedan NULL)
+COLUMNAS = {
+    "ID": "TEXT", "CLIENTE": "TEXT", "FECHA": "TEXT", "FECHA_DISP": "TEXT",
+    "FECHA_ASIGNADA": "TEXT", "PRIORIDAD": "INTEGER", "VALOR": "INTEGER",
+    "LITROS": "REAL", "UTILIDAD": "REAL", "GANANCIA": "REAL", "GANANCIA_AJUST": "REAL",
+    "LITROS_RENTADOS": "REAL", "ESPERA_DIAS": "INTEGER",
+}
+FECHAS = ("FECHA", "FECHA_DISP", "FECHA_ASIGNADA")
+
+ESQUEMA = f"""
+CREATE TABLE IF NOT EXISTS corridas (
+    id     INTEGER PRIMARY KEY AUTOINCREMENT,
+    clave  TEXT UNIQUE NOT NULL,
+    origen TEXT,
+    creada REAL,
+    filas  INTEGER
+);
+CREATE TABLE IF NOT EXISTS programacion (
+    corrida INTEGER NOT NULL REFERENCES corridas(id),
+    {", ".join(f"{c} {t}" for c, t in COLUMNAS.items())}
+);
+CREATE INDEX IF NOT EXISTS ix_prog_fecha   ON programacion (corrida, FECHA_ASIGNADA);
+CREATE INDEX IF NOT EXISTS ix_prog_cliente ON programacion (corrida, CLIENTE);
+"""
+
+def clave_entradas(rutas, parametros=None):
+    """Clave de corrida: firma de los CSV de entrada y `parametros` (dict), como texto."""
+    return json.dumps({"entradas": firma_archivos(rutas), "parametros": parametros},
+                      sort_keys=True)
+
+def _iso(serie):
+    """Fechas → 'YYYY-MM-DD' (None si no hay fecha)."""
+    f = pd.to_datetime(serie, errors="coerce")
+    return f.dt.strftime("%Y-%m-%d").astype(object).where(f.notna(), None)
+
+class AlmacenProgramacion:
+    def __init__(self, ruta):
+        self.ruta = ruta
+        self._lock = threading.Lock()
+        self._con = self._pid = None
+
+    def _conexion(self):
+        if self._con is None or self._pid != os.getpid():   # no heredar conexiones tras fork
+            self._con = sqlite3.connect(self.ruta, timeout=30, check_same_thread=False)
+            self._con.executescript(ESQUEMA)
+            self._pid = os.getpid()
+        return self._con
+
+    def guardar(self, df, clave, origen=""):
+        """Guarda la programación `df` como corrida `clave` (si ya existe no la duplica)."""
+        cols = [c for c in COLUMNAS if c in df.columns]
+        datos = df[cols].assign(**{c: _iso(df[c]) for c in FECHAS if c in cols})
+        datos = datos.astype(object).where(datos.notna(), None)
+
+        with self._lock:
+            con = self._conexion()
+            with con:
+                previa = con.execute("SELECT id FROM corridas WHERE clave = ?", (clave,)).fetchone()
+                if previa:
+                    return previa[0]
+                cur = con.execute("INSERT INTO corridas (clave, origen, creada, filas) VALUES (?, ?, ?, ?)",
+                                  (clave, origen, time.time(), len(datos)))
+                corrida = cur.lastrowid
+                con.executemany(
+                    f"INSERT INTO programacion (corrida, {', '.join(cols)}) "
+                    f"VALUES (?{', ?' * len(cols)})",
+                    ((corrida, *fila) for fila in datos.itertuples(index=False, name=None)))
+                self._recortar(con)
+        return corrida
+
+    def _recortar(self, con):
+        viejas = [r[0] for r in con.execute(
+            "SELECT id FROM corridas ORDER BY id DESC LIMIT -1 OFFSET ?", (MAX_CORRIDAS,))]
+        if viejas:
+            marcas = ", ".join("?" * len(viejas))
+            con.execute(f"DELETE FROM programacion WHERE corrida IN ({marcas})", viejas)
+            con.execute(f"DELETE FROM corridas WHERE id IN ({marcas})", viejas)
+
+    def corrida(self, clave=None):
+        """ID de la corrida con `clave` (o la más reciente si clave es None), o None."""
+        with self._lock:
+            con = self._conexion()
+            if clave is None:
+                fila = con.execute("SELECT MAX(id) FROM corridas").fetchone()
+            else:
+                fila = con.execute("SELECT id FROM corridas WHERE clave = ?", (clave,)).fetchone()
+        return fila[0] if fila else None
+
+    def rango(self, corrida, desde, hasta, columnas=None, cliente=None):
+        """Fragmentos asignados entre `desde` y `hasta` (fechas, inclusive)."""
+        cols = [c for c in (columnas or COLUMNAS) if c in COLUMNAS]
+        sql = (f"SELECT {', '.join(cols)} FROM programacion "
+               f"WHERE corrida = ? AND FECHA_ASIGNADA BETWEEN ? AND ?")
+        params = [corrida, f"{desde:%Y-%m-%d}", f"{hasta:%Y-%m-%d}"]
+        if cliente:
+            sql += " AND CLIENTE = ?"
+            params.append(cliente)
+        sql += " ORDER BY FECHA_ASIGNADA, rowid"
+        with self._lock:
+            return pd.read_sql_query(sql, self._conexion(), params=params)
+
+    def dia(self, corrida, fecha, columnas=None):
+        return self.rango(corrida, fecha, fecha, columnas)
@@ -0,0 +1,184 @@
+# ---------------------------------------------------------------
+# Cache binaria de los CSV de entrada (Pedidos, PedidosCancelados,
+# pedidos_limpios_*, programacion_*, …).
+#
+# La primera lectura parsea el CSV como siempre (incluidas fechas) y
+# guarda el DataFrame tipado en <carpeta del CSV>/.cache/ como Parquet
+# (si hay pyarrow) o como .npz de NumPy: cada columna numérica o de
+# fechas tal cual y las de texto como UTF-8 más una máscara de nulos,
+# leído con allow_pickle=False. Nunca pickle: cargar la cache no puede
+# ejecutar código. Lo que no cabe en esos formatos (texto mezclado con
+# números, categorías, …) simplemente no se guarda. Las siguientes
+# lecturas cargan el binario directamente.
+#
+# La llave incluye los argumentos de read_csv, la `variante` de quien
+# llama (su esquema / versión de preparación), VERSION y la versión de
+# pandas: si cambia cualquiera de ellos se vuelve a parsear.
+#
+# Invalidación: si cambian mtime o tamaño del CSV se recalcula su hash
+# de contenido; sólo si el hash también cambió se vuelve a parsear
+# (copiar o "tocar" el archivo no fuerza re-parseo).
+# ---------------------------------------------------------------
+
+import hashlib, json, os
+from pathlib import Path
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow  # noqa: F401  (sólo para saber si hay Parquet)
+    PARQUET = True
+except ImportError:
+    PARQUET = False
+
+ACTIVA      = True              # False → pd.read_csv directo
+CARPETA     = ".cache"
+BLOQUE_HASH = 1 << 20
+VERSION     = 2                 # formato del binario; súbase al cambiarlo
+SEP         = "\x00"            # separador de los textos de una columna
+
+stats = {"aciertos": 0, "fallos": 0}
+
+def huella_archivo(ruta):
+    """blake2b del contenido, leído por bloques."""
+    h = hashlib.blake2b(digest_size=16)
+    with open(ruta, "rb") as fh:
+        for bloque in iter(lambda: fh.read(BLOQUE_HASH), b""):
+            h.update(bloque)
+    return h.hexdigest()
+
+def _base(ruta, kw, variante):
+    h = hashlib.blake2b(digest_size=8)
+    h.update(repr((sorted(kw.items()), variante, VERSION, pd.__version__)).encode())
+    return ruta.parent / CARPETA / f"{ruta.name}.{h.hexdigest()}"
+
+def _leer_meta(ruta_meta):
+    try:
+        with open(ruta_meta, encoding="utf-8") as fh:
+            return json.load(fh)
+    except (OSError, ValueError):
+        return None
+
+def _escribir(destino, escribir):
+    """Escritura atómica: archivo temporal + os.replace."""
+    tmp = destino.with_name(f"{destino.name}.{os.getpid()}.tmp")
+    escribir(tmp)
+    os.replace(tmp, destino)
+
+def _a_arreglos(df):
+    """
+    (arreglos, columnas) para np.savez sin objetos de Python: numéricas,
+    booleanas y fechas sin zona tal cual; texto como bytes UTF-8 unidos
+    por SEP más su máscara de nulos. ValueError si alguna no se puede.
+    """
+    if not df.index.equals(pd.RangeIndex(len(df))):
+        raise ValueError("sólo se guardan frames con índice 0..n-1")
+    arreglos, columnas = {}, []
+    for i, (nombre, s) in enumerate(df.items()):
+        clave = f"c{i}"
+        if isinstance(s.dtype, np.dtype) and s.dtype.kind in "biufmM":
+            arreglos[clave] = s.to_numpy()
+            columnas.append([nombre, str(s.dtype), "arreglo"])
+            continue
+        nulo  = s.isna().to_numpy()
+        vals  = s.to_numpy(dtype=object)[~nulo]
+        if len(vals) and pd.api.types.infer_dtype(vals, skipna=False) != "string":
+            raise ValueError(f"columna {nombre!r}: {s.dtype} no es texto")
+        texto = SEP.join(vals)
+        if texto.count(SEP) != max(len(vals) - 1, 0):
+            raise ValueError(f"columna {nombre!r}: el texto contiene el separador")
+        arreglos[clave] = np.frombuffer(texto.encode("utf-8"), dtype=np.uint8)
+        arreglos[f"{clave}_nulo"] = nulo
+        columnas.append([nombre, str(s.dtype), "texto"])
+    return arreglos, columnas
+
+def _de_arreglos(npz, columnas, filas):
+    datos = {}
+    for i, (nombre, dtype, tipo) in enumerate(columnas):
+        a = npz[f"c{i}"]
+        if tipo == "arreglo":
+            datos[nombre] = a
+            continue
+        nulo = npz[f"c{i}_nulo"]
+        vals = np.full(len(nulo), np.nan, dtype=object)
+        if not nulo.all():
+            vals[~nulo] = a.tobytes().decode("utf-8").split(SEP)
+        datos[nombre] = pd.Series(vals, dtype=dtype)
+    return pd.DataFrame(datos, index=pd.RangeIndex(filas))
+
+def _escribir_npz(ruta, arreglos):
+    with open(ruta, "wb") as fh:        # con el archivo abierto savez no agrega .npz
+        np.savez(fh, **arreglos)
+
+def _guardar(base, df, meta):
+    """Guarda el binario y su meta; si el frame no cabe en ningún formato, nada."""
+    base.parent.mkdir(exist_ok=True)
+    if PARQUET:
+        try:
+            _escribir(Path(f"{base}.parquet"), lambda p: df.to_parquet(p))
+            meta["formato"] = "parquet"
+        except Exception:               # columnas object mixtas, etc.
+            meta["formato"] = None
+    if meta.get("formato") is None:
+        try:
+            arreglos, columnas = _a_arreglos(df)
+        except ValueError:
+            return
+        _escribir(Path(f"{base}.npz"), lambda p: _escribir_npz(p, arreglos))
+        meta.update(formato="npz", columnas=columnas, filas=len(df))
+    _guardar_meta(base, meta)
+
+def _guardar_meta(base, meta):
+    _escribir(Path(f"{base}.json"),
+              lambda p: p.write_text(json.dumps(meta), encoding="utf-8"))
+
+def _cargar(base, meta):
+    if meta["formato"] == "parquet":
+        return pd.read_parquet(f"{base}.parquet")
+    if meta["formato"] == "npz":
+        with np.load(f"{base}.npz", allow_pickle=False) as npz:
+            return _de_arreglos(npz, meta["columnas"], meta["filas"])
+    raise ValueError(f"formato desconocido: {meta['formato']!r}")
+
+def leer_csv(ruta, preparar=None, variante="", **kw):
+    """
+    pd.read_csv(ruta, **kw) a través de la cache binaria.
+
+    `preparar(df) → df` se aplica antes de guardar (p. ej. parsear o
+    limpiar columnas) y `variante` lo distingue en la llave, junto con
+    los argumentos de read_csv: quien pase `preparar` debe cambiar la
+    variante cuando cambie lo que ésta devuelve.
+    """
+    ruta = Path(ruta)
+    if not ACTIVA:
+        df = pd.read_csv(ruta, **kw)
+        return preparar(df) if preparar else df
+
+    st   = ruta.stat()
+    base = _base(ruta, kw, variante)
+    meta = _leer_meta(f"{base}.json")
+
+    if meta is not None:
+        vigente = meta["mtime_ns"] == st.st_mtime_ns and meta["size"] == st.st_size
+        if not vigente and meta["size"] == st.st_size and meta["hash"] == huella_archivo(ruta):
+            meta.update(mtime_ns=st.st_mtime_ns)        # mismo contenido, otro mtime
+            _guardar_meta(base, meta)
+            vigente = True
+        if vigente:
+            try:
+                df = _cargar(base, meta)
+                stats["aciertos"] += 1
+                return df
+            except Exception:
+                pass                                    # binario dañado → re-parsear
+
+    stats["fallos"] += 1
+    meta = {"mtime_ns": st.st_mtime_ns, "size": st.st_size, "hash": huella_archivo(ruta)}
+    df = pd.read_csv(ruta, **kw)
+    if preparar:
+        df = preparar(df)
+    try:
+        _guardar(base, df, meta)
+    except OSError:
+        pass                                            # carpeta de sólo lectura: sin cache
+    return df
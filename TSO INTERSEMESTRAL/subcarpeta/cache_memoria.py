@@ -0,0 +1,83 @@
+# ---------------------------------------------------------------
+# Cache en memoria (por proceso) de lo que la app lee y deriva de los
+# CSV: DataFrames, payloads JSON ya serializados, tablas HTML, el
+# resultado de un glob…
+#
+# Cada entrada se guarda junto con la firma (ruta, mtime, tamaño) de
+# los archivos de los que depende; si la firma cambió se recalcula y
+# reemplaza. LRU acotado por bytes aproximados (memory_usage de los
+# DataFrames, len de bytes/str). Los valores se comparten entre
+# peticiones: quien los use no debe modificarlos.
+# ---------------------------------------------------------------
+
+import os, sys, threading
+from collections import OrderedDict
+
+MAX_BYTES = 2**30                # 1 GiB: alcanza para tablas de millones de filas
+
+def firma_archivos(rutas):
+    """(ruta, mtime, tamaño) de cada archivo o carpeta; los que no existen cuentan como None."""
+    firma = []
+    for ruta in rutas:
+        try:
+            st = os.stat(ruta)
+            firma.append((os.fspath(ruta), st.st_mtime_ns, st.st_size))
+        except FileNotFoundError:
+            firma.append((os.fspath(ruta), None))
+    return tuple(firma)
+
+def tamano(valor):
+    """Bytes aproximados de un valor cacheado."""
+    if hasattr(valor, "memory_usage"):          # DataFrame / Series, sin importar pandas
+        uso = valor.memory_usage(deep=True)
+        return int(uso.sum() if hasattr(uso, "sum") else uso)
+    if isinstance(valor, (bytes, str)):
+        return len(valor)
+    if isinstance(valor, (tuple, list)):
+        return sum(tamano(v) for v in valor)
+    if hasattr(valor, "nbytes"):                # ndarray, TablaIndexada…
+        return int(valor.nbytes)
+    return sys.getsizeof(valor)
+
+class CacheMemoria:
+    def __init__(self, max_bytes=MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.bytes     = 0
+        self._datos    = OrderedDict()          # clave → (firma, valor, bytes)
+        self._lock     = threading.Lock()
+        self.aciertos = self.fallos = 0
+
+    def obtener(self, clave, calcular, rutas=()):
+        """Valor de `clave` vigente para la firma de `rutas`; si no, calcular()."""
+        firma = firma_archivos(rutas)
+        with self._lock:
+            entrada = self._datos.get(clave)
+            if entrada is not None and entrada[0] == firma:
+                self._datos.move_to_end(clave)
+                self.aciertos += 1
+                return entrada[1]
+            self.fallos += 1
+
+        valor = calcular()                      # fuera del lock: puede tardar
+        n = tamano(valor)
+        with self._lock:
+            previa = self._datos.pop(clave, None)
+            if previa is not None:
+                self.bytes -= previa[2]
+            if n <= self.max_bytes:
+                self._datos[clave] = (firma, valor, n)
+                self.bytes += n
+                while self.bytes > self.max_bytes:
+                    _, (_, _, m) = self._datos.popitem(last=False)
+                    self.bytes -= m
+        return valor
+
+    def limpiar(self):
+        with self._lock:
+            self._datos.clear()
+            self.bytes = 0
+
+    def resumen(self):
+        with self._lock:
+            return {"entradas": len(self._datos), "bytes": self.bytes,
+                    "aciertos": self.aciertos, "fallos": self.fallos}
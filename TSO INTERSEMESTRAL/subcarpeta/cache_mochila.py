@@ -0,0 +1,127 @@
+# ---------------------------------------------------------------
+# Cache de resultados de la mochila diaria.
+#
+# La llave es una huella canónica de (versión del solver, capacidad,
+# método, pares (litros, valor) ordenados): el mismo conjunto de
+# candidatos produce la misma huella aunque llegue en otro orden. La selección se guarda
+# en posiciones del orden canónico y se traduce de vuelta a los
+# índices de quien llama.
+#
+# Dos niveles: LRU en memoria (acotado) y, opcional, SQLite en disco
+# para compartir entre corridas / procesos. En disco cada resultado va
+# como JSON (posiciones + info), nunca pickle: TSO_CACHE_MOCHILA puede
+# apuntar a cualquier archivo. Sólo se guardan óptimos probados (gap 0):
+# lo que salió cortado por limite_s depende del límite y de la máquina.
+# Lleva contadores de aciertos y fallos y el tiempo de solver que se
+# ahorró.
+# ---------------------------------------------------------------
+
+import hashlib, json, os, sqlite3, threading
+from collections import OrderedDict
+import numpy as np
+
+from .solver_mochila import resolver, LIMITE_S, VERSION
+
+MAX_ENTRADAS = 4096
+
+def huella(pesos, valores, capacidad, metodo):
+    """Devuelve (llave, orden canónico) para un conjunto de candidatos."""
+    pares = np.array([pesos, valores], dtype=np.int64).reshape(2, -1)
+    orden = np.lexsort((pares[1], pares[0]))            # por litros, luego valor (estable)
+    h = hashlib.blake2b(digest_size=16)
+    h.update(f"{VERSION}|{capacidad}|{metodo}|".encode())
+    h.update(np.ascontiguousarray(pares[:, orden]).tobytes())
+    return h.hexdigest(), orden
+
+class CacheMochila:
+    def __init__(self, max_entradas=MAX_ENTRADAS, ruta=None):
+        self.max_entradas = max_entradas
+        self.ruta = ruta
+        self._mem = OrderedDict()
+        self._lock = threading.Lock()
+        self._con = self._pid = None
+        self.aciertos = self.aciertos_disco = self.fallos = 0
+        self.segundos_ahorrados = 0.0
+
+    # --- nivel disco ----------------------------------------------
+    def _disco(self):
+        if self.ruta is None:
+            return None
+        if self._con is None or self._pid != os.getpid():   # no heredar conexiones tras fork
+            self._con = sqlite3.connect(self.ruta, timeout=30, check_same_thread=False)
+            self._con.execute("CREATE TABLE IF NOT EXISTS mochila (llave TEXT PRIMARY KEY, dato BLOB)")
+            self._pid = os.getpid()
+        return self._con
+
+    def _leer_disco(self, llave):
+        con = self._disco()
+        if con is None:
+            return None
+        fila = con.execute("SELECT dato FROM mochila WHERE llave = ?", (llave,)).fetchone()
+        if fila is None:
+            return None
+        try:
+            posiciones, info = json.loads(fila[0])
+            return [int(j) for j in posiciones], dict(info)
+        except (ValueError, TypeError):                 # fila ajena o de un formato viejo
+            return None
+
+    def _escribir_disco(self, llave, dato):
+        con = self._disco()
+        if con is not None:
+            with con:
+                texto = json.dumps([[int(j) for j in dato[0]], dato[1]],
+                                   default=lambda x: x.item())     # escalares de numpy
+                con.execute("INSERT OR REPLACE INTO mochila VALUES (?, ?)", (llave, texto))
+
+    # --- nivel memoria --------------------------------------------
+    def _guardar(self, llave, dato):
+        self._mem[llave] = dato
+        self._mem.move_to_end(llave)
+        while len(self._mem) > self.max_entradas:
+            self._mem.popitem(last=False)
+
+    def resolver(self, pesos, valores, capacidad, metodo="auto", limite_s=LIMITE_S):
+        """Igual que solver_mochila.resolver() pero memoizado."""
+        llave, orden = huella(pesos, valores, capacidad, metodo)
+        with self._lock:
+            dato = self._mem.get(llave)
+            if dato is not None:
+                self._mem.move_to_end(llave)
+                self.aciertos += 1
+            else:
+                dato = self._leer_disco(llave)
+                if dato is not None:
+                    self._guardar(llave, dato)
+                    self.aciertos_disco += 1
+            if dato is not None:
+                posiciones, info = dato
+                self.segundos_ahorrados += info["segundos"]
+                return sorted(int(orden[j]) for j in posiciones), dict(info, cache=True)
+
+        # se resuelve siempre sobre el orden canónico → mismo resultado con o sin cache
+        sel, info = resolver([pesos[i] for i in orden], [valores[i] for i in orden],
+                             capacidad, metodo, limite_s)
+        with self._lock:
+            self.fallos += 1
+            if info["gap"] == 0:
+                self._guardar(llave, (sel, info))
+                self._escribir_disco(llave, (sel, info))
+        return sorted(int(orden[j]) for j in sel), dict(info, cache=False)
+
+    def stats(self):
+        total = self.aciertos + self.aciertos_disco + self.fallos
+        return {
+            "aciertos":           self.aciertos,
+            "aciertos_disco":     self.aciertos_disco,
+            "fallos":             self.fallos,
+            "tasa_acierto":       (self.aciertos + self.aciertos_disco) / total if total else 0.0,
+            "segundos_ahorrados": self.segundos_ahorrados,
+            "entradas":           len(self._mem),
+        }
+
+    def limpiar(self):
+        with self._lock:
+            self._mem.clear()
+            self.aciertos = self.aciertos_disco = self.fallos = 0
+            self.segundos_ahorrados = 0.0
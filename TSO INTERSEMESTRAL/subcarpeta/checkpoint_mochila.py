@@ -0,0 +1,120 @@
+# ---------------------------------------------------------------
+# Checkpoint y replaneación incremental de la simulación de mochila.
+#
+# Cada corrida guarda, por corte de día, lo asignado ese día, lo vencido,
+# el backlog (ID → ESPERA_DIAS) y las pipas rentadas, más una firma de
+# cada fragmento (FECHA_DISP, FECHA_ENTREGA, LITROS, VALOR, GANANCIA).
+#
+# Al volver a correr con pedidos nuevos o modificados se busca el primer
+# día afectado (el día en que se libera la versión vieja o la nueva de
+# cualquier fragmento distinto); los días anteriores se reutilizan tal
+# cual y la simulación se reanuda desde ahí con el backlog guardado.
+#
+# Se guarda en JSON (no pickle): leer un checkpoint de csv/ no ejecuta
+# nada, y uno dañado o de otro formato sólo obliga a correr completo.
+# ---------------------------------------------------------------
+
+import hashlib, json, math
+import pandas as pd
+
+from .algoritmo_mochila import (simular, UN_DIA, CAP_PROPIA, CAP_PIPA, PENALIZ,
+                                MAX_DIAS_ESPERA, SOLVER, VALOR_MAP)
+from . import solver_mochila
+
+def firma(alm):
+    return dict(zip(alm.id, zip(alm.disp.tolist(), alm.entrega.tolist(), alm.litros.tolist(),
+                                alm.valor.tolist(), alm.ganancia.tolist())))
+
+def dia_liberacion(disp, desde_dt):
+    """Primer día del calendario (alineado a desde_dt) en que el pedido entra."""
+    disp, desde = pd.Timestamp(disp), pd.Timestamp(desde_dt)
+    if disp <= desde:
+        return desde
+    return desde + UN_DIA * math.ceil((disp - desde) / UN_DIA)
+
+def primer_dia_afectado(vieja, nueva, desde_dt):
+    """Menor día de liberación entre los fragmentos agregados, quitados o cambiados."""
+    dias = [dia_liberacion(f[0], desde_dt)
+            for clave in vieja.keys() | nueva.keys()
+            if vieja.get(clave) != nueva.get(clave)
+            for f in (vieja.get(clave), nueva.get(clave)) if f is not None]
+    return min(dias, default=None)
+
+def _tupla(x):
+    return tuple(_tupla(v) for v in x) if isinstance(x, list) else x
+
+def cargar(ruta):
+    """Checkpoint guardado con guardar(); None si no existe o no se puede leer."""
+    try:
+        with open(ruta, encoding="utf-8") as fh:
+            d = json.load(fh)
+        return {
+            "params": _tupla(d["params"]),
+            "desde":  pd.Timestamp(d["desde"]),
+            "firma":  {k: tuple(v) for k, v in d["firma"].items()},
+            "dias":   {pd.Timestamp(f): dict(c, asignados={k: tuple(v) for k, v in c["asignados"].items()})
+                       for f, c in d["dias"].items()},
+        }
+    except (OSError, ValueError, KeyError, TypeError, AttributeError):
+        return None
+
+def guardar(ruta, ckpt):
+    d = dict(ckpt, desde=pd.Timestamp(ckpt["desde"]).isoformat(),
+             dias={f.isoformat(): c for f, c in ckpt["dias"].items()})
+    with open(ruta, "w", encoding="utf-8") as fh:
+        json.dump(d, fh)
+
+def huella_prioridades(prio_map):
+    """Huella de la tabla CLIENTE → Prioridad (cambia → no se reutiliza el checkpoint)."""
+    if prio_map is None:
+        return None
+    h = hashlib.blake2b(digest_size=16)
+    h.update(pd.util.hash_pandas_object(prio_map.sort_index(), index=True).to_numpy().tobytes())
+    return h.hexdigest()
+
+def replanificar(alm, desde_dt, ckpt=None, cap_propia=CAP_PROPIA, cap_pipa=CAP_PIPA,
+                 penaliz=PENALIZ, max_espera=MAX_DIAS_ESPERA, metodo=SOLVER,
+                 valor_map=VALOR_MAP, prio_map=None):
+    """
+    Como simular(), pero reutiliza los días de `ckpt` anteriores al primer
+    día afectado. Sin checkpoint compatible (otros parámetros, otro
+    VALOR_MAP o tabla de prioridades, otra versión del solver u otro
+    desde_dt) corre el horizonte completo.
+
+    Devuelve (pipas_rentadas, nuevo_ckpt, día desde el que se simuló).
+    """
+    params = (cap_propia, cap_pipa, penaliz, max_espera, metodo,
+              tuple(sorted(valor_map.items())), huella_prioridades(prio_map),
+              solver_mochila.VERSION)
+    nueva  = firma(alm)
+    dias   = {}
+
+    if ckpt and ckpt.get("params") == params and ckpt.get("desde") == desde_dt:
+        inicio = primer_dia_afectado(ckpt["firma"], nueva, desde_dt)
+        if inicio is None:                              # nada cambió
+            inicio = max(ckpt["dias"], default=pd.Timestamp(desde_dt) - UN_DIA) + UN_DIA
+        dias = {f: c for f, c in ckpt["dias"].items() if f < inicio}
+    else:
+        inicio = pd.Timestamp(desde_dt)
+
+    # reponer lo ya decidido antes de `inicio`
+    idx = {clave: i for i, clave in enumerate(alm.id)}
+    pipas_rentadas, backlog = {}, {}
+    for fecha in sorted(dias):
+        c = dias[fecha]
+        for clave, (asig, rent, gan, espera) in c["asignados"].items():
+            i = idx[clave]
+            alm.asignada[i], alm.rentados[i], alm.ganancia_ajust[i], alm.espera[i] = \
+                asig, rent, gan, espera
+        for clave, espera in c["vencidos"].items():
+            alm.espera[idx[clave]] = espera
+        backlog = c["backlog"]
+        if c["pipas"] is not None:
+            pipas_rentadas[fecha.date()] = c["pipas"]
+    for clave, espera in backlog.items():
+        alm.espera[idx[clave]] = espera
+
+    pipas_rentadas.update(simular(alm, desde_dt, cap_propia, cap_pipa, penaliz, max_espera, metodo,
+                                  inicio=inicio, backlog=[idx[c] for c in backlog], bitacora=dias))
+    ckpt = {"params": params, "desde": desde_dt, "firma": nueva, "dias": dias}
+    return pipas_rentadas, ckpt, inicio
@@ -0,0 +1,95 @@
+# ---------------------------------------------------------------
+# Barrido de escenarios "what-if" sobre los parámetros de negocio.
+#
+# Recibe una rejilla {PARAMETRO: [valores…]} con cualquiera de
+#   CAP_PROPIA, CAP_PIPA, PENALIZ, MAX_DIAS_ESPERA, VALOR_MAP
+# y corre la simulación de mochila para cada combinación en un pool
+# de procesos. Los pedidos se leen una sola vez y se entregan a cada
+# worker en su inicializador (no por tarea).
+#
+# Resultado: una tabla con litros rentados, pipas y ganancia ajustada
+# por escenario → csv/escenarios_<rango>.csv
+#
+# Uso (desde la carpeta de la app):
+#   python -m subcarpeta.escenarios CAP_PIPA=64000,32000 PENALIZ=0.05,0.1 VALOR_MAP=3/2/1,5/2/1
+# ---------------------------------------------------------------
+
+import itertools, os, sys
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+
+from . import algoritmo_mochila as am
+
+PARAMETROS = ("CAP_PROPIA", "CAP_PIPA", "PENALIZ", "MAX_DIAS_ESPERA", "VALOR_MAP")
+
+_raw = _prio_map = _desde_dt = None      # copia por worker
+
+def _init(raw, prio_map, desde_dt):
+    global _raw, _prio_map, _desde_dt
+    _raw, _prio_map, _desde_dt = raw, prio_map, desde_dt
+
+def _valor_texto(vm):
+    return "/".join(str(vm[k]) for k in sorted(vm))
+
+def correr(esc, raw=None, prio_map=None, desde_dt=None):
+    """Simula un escenario y devuelve su fila resumen."""
+    raw      = _raw      if raw      is None else raw
+    prio_map = _prio_map if prio_map is None else prio_map
+    desde_dt = _desde_dt if desde_dt is None else desde_dt
+    p = {k: getattr(am, k) for k in PARAMETROS} | esc
+
+    alm   = am.AlmacenPedidos(am.preparar(raw, prio_map, p["CAP_PROPIA"], p["VALOR_MAP"]))
+    pipas = am.simular(alm, desde_dt, p["CAP_PROPIA"], p["CAP_PIPA"],
+                       p["PENALIZ"], p["MAX_DIAS_ESPERA"])
+
+    fila = {k: (_valor_texto(v) if k == "VALOR_MAP" else v) for k, v in esc.items()}
+    fila.update({
+        "Fragmentos":      len(alm),
+        "Pendientes":      int(alm.sin_asignar().sum()),
+        "Litros_Rentados": float(alm.rentados.sum()),
+        "Pipas_Rentadas":  sum(pipas.values()),
+        "Ganancia_Ajust":  float(alm.ganancia_ajust.sum()),
+    })
+    return fila
+
+def rejilla(grid):
+    """{PARAM: [v…]} → lista de dicts con el producto cartesiano."""
+    desconocidos = set(grid) - set(PARAMETROS)
+    if desconocidos:
+        raise ValueError(f"Parámetros no soportados: {', '.join(sorted(desconocidos))}")
+    claves = list(grid)
+    return [dict(zip(claves, combo)) for combo in itertools.product(*(grid[k] for k in claves))]
+
+def barrer(grid, csv_dir=am.CSV_DIR, procesos=None, exportar=True):
+    """
+    Corre todos los escenarios de `grid` en paralelo (uno por núcleo por
+    defecto) y devuelve la tabla comparativa ordenada por Ganancia_Ajust.
+    """
+    raw, prio_map, desde_dt, hasta_dt = am.cargar(csv_dir)
+    escenarios = rejilla(grid)
+    procesos   = procesos or min(len(escenarios), os.cpu_count() or 1)
+
+    if procesos <= 1:
+        filas = [correr(e, raw, prio_map, desde_dt) for e in escenarios]
+    else:
+        with ProcessPoolExecutor(procesos, initializer=_init,
+                                 initargs=(raw, prio_map, desde_dt)) as pool:
+            filas = list(pool.map(correr, escenarios))
+
+    tabla = pd.DataFrame(filas).sort_values("Ganancia_Ajust", ascending=False, ignore_index=True)
+    if exportar:
+        suf = f"{desde_dt:%Y-%m-%d}_A_{hasta_dt:%Y-%m-%d}"
+        tabla.to_csv(csv_dir / f"escenarios_{suf}.csv", index=False)
+    return tabla
+
+def _leer_argumento(arg):
+    nombre, valores = arg.split("=", 1)
+    nombre = nombre.strip().upper()
+    if nombre == "VALOR_MAP":
+        return nombre, [dict(zip((1, 2, 3), map(int, v.split("/")))) for v in valores.split(",")]
+    tipo = float if nombre == "PENALIZ" else int
+    return nombre, [tipo(v) for v in valores.split(",")]
+
+if __name__ == "__main__":
+    grid = dict(_leer_argumento(a) for a in sys.argv[1:]) or {"CAP_PIPA": [am.CAP_PIPA]}
+    print(barrer(grid).to_string(index=False))
@@ -0,0 +1,350 @@
+# ---------------------------------------------------------------
+# Instrumentación compartida: etapas del pipeline, días de la mochila
+# y peticiones de la app.
+#
+# Dos destinos:
+#   • registro   métricas acumuladas del proceso (contadores, medidores
+#                e histogramas) en formato de texto de Prometheus → /metrics
+#   • Corrida    lo de una ejecución (pipeline / mochila): tiempo y pico
+#                de memoria por etapa y una fila por día simulado, que se
+#                guarda como metricas_<rango>.json junto a los CSV
+#
+# La corrida activa es por hilo: la mochila de fondo no se mezcla con
+# las peticiones. Sin corrida activa etapa() y dia() sólo alimentan el
+# registro.
+#
+# Memoria: pico de RSS por etapa leyendo VmHWM de /proc/self/status y
+# reiniciándolo con /proc/self/clear_refs al entrar a cada etapa (Linux).
+# El reinicio es de todo el proceso, así que sólo se hace si ningún otro
+# hilo tiene una etapa abierta (los hilos de peticiones de la app no
+# abren etapas); si otro hilo abre una mientras tanto, o donde no se
+# puede reiniciar, la etapa reporta el pico del proceso y queda marcada
+# como "pico_proceso". Sin /proc ni `resource` no se mide. No se usa
+# tracemalloc: cuadruplica el tiempo de las etapas de pandas.
+# ---------------------------------------------------------------
+
+import json, math, os, sys, threading, time
+from contextlib import contextmanager
+from datetime import datetime
+
+try:
+    import resource
+except ImportError:                 # Windows
+    resource = None
+
+CUBETAS_S = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300)
+CUBETAS_N = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 5000)
+MAS_LENTOS = 10                     # días con más tiempo de solver en el resumen
+
+# ---------------------------- registro ------------------------------
+def _escapar(valor):
+    return str(valor).replace("\\", r"\\").replace('"', r'\"').replace("\n", r"\n")
+
+def _etiquetas(pares):
+    return "{" + ",".join(f'{k}="{_escapar(v)}"' for k, v in pares) + "}" if pares else ""
+
+def _numero(v):
+    if isinstance(v, float):
+        return "+Inf" if v == math.inf else repr(v)
+    return str(v)
+
+class Serie:
+    """Una familia de métricas (contador, medidor o histograma) con etiquetas."""
+
+    def __init__(self, nombre, tipo, ayuda, cubetas=None, lock=None):
+        self.nombre, self.tipo, self.ayuda = nombre, tipo, ayuda
+        self.cubetas = tuple(cubetas or ())
+        self._valores = {}                      # etiquetas → valor | [cuentas, suma, n]
+        self._lock = lock or threading.Lock()
+
+    def sumar(self, valor=1, **etiquetas):
+        clave = tuple(etiquetas.items())
+        with self._lock:
+            self._valores[clave] = self._valores.get(clave, 0) + valor
+
+    def fijar(self, valor, **etiquetas):
+        with self._lock:
+            self._valores[tuple(etiquetas.items())] = valor
+
+    def observar(self, valor, **etiquetas):
+        clave = tuple(etiquetas.items())
+        with self._lock:
+            h = self._valores.get(clave)
+            if h is None:
+                h = self._valores[clave] = [[0] * len(self.cubetas), 0.0, 0]
+            for i, limite in enumerate(self.cubetas):
+                if valor <= limite:
+                    h[0][i] += 1
+                    break
+            h[1] += valor
+            h[2] += 1
+
+    def lineas(self):
+        with self._lock:
+            valores = [(k, (list(v[0]), v[1], v[2]) if self.tipo == "histogram" else v)
+                       for k, v in self._valores.items()]
+        salida = [f"# HELP {self.nombre} {self.ayuda}", f"# TYPE {self.nombre} {self.tipo}"]
+        for pares, v in valores:
+            if self.tipo != "histogram":
+                salida.append(f"{self.nombre}{_etiquetas(pares)} {_numero(v)}")
+                continue
+            cuentas, suma, n = v
+            acumulado = 0
+            for limite, c in zip(self.cubetas + (math.inf,), cuentas + [n - sum(cuentas)]):
+                acumulado += c
+                salida.append(f"{self.nombre}_bucket{_etiquetas(pares + (('le', _numero(float(limite))),))} "
+                              f"{acumulado}")
+            salida.append(f"{self.nombre}_sum{_etiquetas(pares)} {_numero(suma)}")
+            salida.append(f"{self.nombre}_count{_etiquetas(pares)} {n}")
+        return salida
+
+class Registro:
+    def __init__(self):
+        self._series = {}
+        self._recolectores = []
+        self._lock = threading.Lock()
+
+    def _serie(self, nombre, tipo, ayuda, cubetas=None):
+        with self._lock:
+            if nombre not in self._series:
+                self._series[nombre] = Serie(nombre, tipo, ayuda, cubetas)
+            return self._series[nombre]
+
+    def contador(self, nombre, ayuda):
+        return self._serie(nombre, "counter", ayuda)
+
+    def medidor(self, nombre, ayuda):
+        return self._serie(nombre, "gauge", ayuda)
+
+    def histograma(self, nombre, ayuda, cubetas=CUBETAS_S):
+        return self._serie(nombre, "histogram", ayuda, cubetas)
+
+    def recolector(self, fn):
+        """fn() → [(nombre, tipo, ayuda, [(etiquetas dict, valor)])], leído en cada exposición."""
+        with self._lock:
+            self._recolectores.append(fn)
+        return fn
+
+    def exposicion(self):
+        """Texto para /metrics (formato de exposición 0.0.4 de Prometheus)."""
+        with self._lock:
+            series, recolectores = list(self._series.values()), list(self._recolectores)
+        lineas = [l for s in series for l in s.lineas()]
+        for fn in recolectores:
+            for nombre, tipo, ayuda, muestras in fn():
+                lineas += [f"# HELP {nombre} {ayuda}", f"# TYPE {nombre} {tipo}"]
+                lineas += [f"{nombre}{_etiquetas(tuple(e.items()))} {_numero(v)}" for e, v in muestras]
+        return "\n".join(lineas) + "\n"
+
+registro = Registro()
+
+ETAPA_S      = registro.histograma("tso_etapa_segundos", "Duración de cada etapa del pipeline")
+ETAPA_PICO   = registro.medidor("tso_etapa_pico_rss_bytes", "Pico de RSS del proceso en la última ejecución de la etapa")
+DIA_CAND     = registro.histograma("tso_mochila_candidatos", "Candidatos por mochila diaria", CUBETAS_N)
+DIA_SOLVER_S = registro.histograma("tso_mochila_solver_segundos", "Tiempo de resolver la mochila de un día")
+DIAS         = registro.contador("tso_mochila_dias_total", "Mochilas diarias resueltas")
+PIPAS        = registro.contador("tso_mochila_pipas_rentadas_total", "Pipas rentadas")
+VENCIDOS     = registro.contador("tso_mochila_vencidos_total", "Fragmentos vencidos sin asignar")
+HTTP_S       = registro.histograma("tso_http_peticion_segundos", "Latencia de las peticiones por ruta")
+HTTP_N       = registro.contador("tso_http_peticiones_total", "Peticiones por ruta, método y status")
+
+# ---------------------------- memoria -------------------------------
+STATUS, CLEAR_REFS = "/proc/self/status", "/proc/self/clear_refs"
+
+def _rss():
+    """(RSS actual, pico de RSS) en bytes; actual es None si sólo se conoce el pico."""
+    try:
+        with open(STATUS, encoding="utf-8", errors="replace") as fh:
+            campos = dict(l.split(":", 1) for l in fh if l.startswith(("VmRSS", "VmHWM")))
+        return int(campos["VmRSS"].split()[0]) * 1024, int(campos["VmHWM"].split()[0]) * 1024
+    except (OSError, KeyError, ValueError):
+        pass
+    if resource is not None:
+        pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return None, pico if sys.platform == "darwin" else pico * 1024     # macOS: bytes; Linux: kB
+    return None
+
+def _reiniciar_pico():
+    try:
+        with open(CLEAR_REFS, "w") as fh:
+            fh.write("5")
+        return True
+    except OSError:
+        return False
+
+def _modo_memoria():
+    mem = _rss()
+    if mem is None:
+        return None
+    return "rss_por_etapa" if mem[0] is not None and os.access(CLEAR_REFS, os.W_OK) else "pico_proceso"
+
+MEMORIA = _modo_memoria()
+
+# ---------------------------- corridas ------------------------------
+_local = threading.local()
+_abiertas = {}                                  # hilo → su pila, mientras tenga etapas abiertas
+_lock_pico = threading.Lock()                   # reinicio de VmHWM y _abiertas
+
+def _pila():
+    if not hasattr(_local, "pila"):
+        _local.pila = []                        # [rss al entrar, pico visto, alcance] por etapa abierta
+    return _local.pila
+
+class Corrida:
+    def __init__(self, nombre):
+        self.nombre = nombre
+        self.inicio = datetime.now()
+        self._t0    = time.perf_counter()
+        self.fin    = self._segundos = None
+        self.etapas = {}                        # nombre → {segundos, pico_rss_mb, delta_mb, memoria, veces}
+        self.dias   = []
+        self.extra  = {}
+
+    def etapa(self, nombre, segundos, pico, delta, alcance=None):
+        e = self.etapas.setdefault(nombre, {"segundos": 0.0, "pico_rss_mb": None,
+                                            "delta_mb": None, "memoria": None, "veces": 0})
+        e["segundos"] = round(e["segundos"] + segundos, 4)
+        e["veces"] += 1
+        if pico is not None:
+            e["pico_rss_mb"] = round(max(e["pico_rss_mb"] or 0, pico / 2**20), 1)
+            e["delta_mb"]    = round(max(e["delta_mb"] or 0, delta / 2**20), 1)
+            # basta una ejecución sin reinicio para que el pico sea del proceso
+            e["memoria"] = "pico_proceso" if "pico_proceso" in (e["memoria"], alcance) else alcance
+
+    def mochila(self):
+        """Agregado de los días simulados: dónde se fue el tiempo de la etapa mochila."""
+        if not self.dias:
+            return None
+        solver = sorted(d["solver_s"] for d in self.dias)
+        cand   = sorted(d["candidatos"] for d in self.dias)
+        por_metodo = {}
+        for d in self.dias:
+            m = por_metodo.setdefault(d["metodo"], {"dias": 0, "segundos": 0.0, "cache": 0})
+            m["dias"] += 1
+            m["segundos"] = round(m["segundos"] + d["solver_s"], 4)
+            m["cache"] += d["cache"]
+        total = sum(solver)
+        etapa = self.etapas.get("mochila", {}).get("segundos")
+        return {
+            "dias":            len(self.dias),
+            "solver_s":        round(total, 4),
+            "fuera_solver_s":  round(etapa - total, 4) if etapa is not None else None,
+            "solver_p50_s":    solver[len(solver) // 2],
+            "solver_p95_s":    solver[min(len(solver) - 1, int(len(solver) * 0.95))],
+            "solver_max_s":    solver[-1],
+            "candidatos_p50":  cand[len(cand) // 2],
+            "candidatos_max":  cand[-1],
+            "pipas":           sum(d["pipas"] for d in self.dias),
+            "vencidos":        sum(d["vencidos"] for d in self.dias),
+            "por_metodo":      por_metodo,
+            "mas_lentos":      sorted(self.dias, key=lambda d: -d["solver_s"])[:MAS_LENTOS],
+        }
+
+    def resumen(self):
+        fin = self.fin or datetime.now()
+        return {
+            "corrida":  self.nombre,
+            "inicio":   self.inicio.isoformat(timespec="seconds"),
+            "fin":      fin.isoformat(timespec="seconds"),
+            "segundos": round(self._segundos if self.fin else time.perf_counter() - self._t0, 3),
+            "memoria":  MEMORIA,
+            **self.extra,
+            "etapas":   self.etapas,
+            "mochila":  self.mochila(),
+            "dias":     self.dias,
+        }
+
+    def cerrar(self):
+        self._segundos = time.perf_counter() - self._t0
+        self.fin = datetime.now()
+
+    def guardar(self, ruta):
+        """Escribe el resumen como JSON (metricas_<rango>.json junto a los CSV)."""
+        with open(ruta, "w", encoding="utf-8") as fh:
+            json.dump(self.resumen(), fh, indent=1, ensure_ascii=False, default=str)
+        return ruta
+
+def actual():
+    """Corrida activa en este hilo, o None."""
+    return getattr(_local, "corrida", None)
+
+@contextmanager
+def corrida(nombre):
+    """Abre una corrida; si ya hay una activa en el hilo se reutiliza esa."""
+    previa = actual()
+    if previa is not None:
+        yield previa
+        return
+    c = _local.corrida = Corrida(nombre)
+    try:
+        yield c
+    finally:
+        c.cerrar()
+        _local.corrida = None
+
+@contextmanager
+def etapa(nombre):
+    """Mide tiempo y pico de memoria de una etapa (anidable)."""
+    pila, mem = _pila(), _rss() if MEMORIA else None
+    if mem is not None:
+        rss, pico = mem
+        if pila:
+            pila[-1][1] = max(pila[-1][1], pico)
+        hilo = threading.get_ident()
+        with _lock_pico:
+            # clear_refs es de todo el proceso: con etapas abiertas en otro hilo se
+            # pisarían los picos, y las de ellos ya no son sólo suyos
+            otras = [e for h, p in _abiertas.items() if h != hilo for e in p]
+            for e in otras:
+                e[2] = "pico_proceso"
+            if MEMORIA == "rss_por_etapa" and not otras and _reiniciar_pico():
+                pila.append([rss, rss, "rss_etapa"])
+            else:                               # sin reinicio: cuánto creció el pico del proceso
+                pila.append([pico, pico, "pico_proceso"])
+            _abiertas[hilo] = pila
+    t = time.perf_counter()
+    try:
+        yield
+    finally:
+        segundos = time.perf_counter() - t
+        pico = delta = alcance = None
+        if mem is not None:
+            with _lock_pico:
+                base, visto, alcance = pila.pop()
+                if not pila:
+                    _abiertas.pop(threading.get_ident(), None)
+            pico = max(visto, _rss()[1])
+            delta = pico - base
+            if pila:
+                pila[-1][1] = max(pila[-1][1], pico)
+            ETAPA_PICO.fijar(pico, etapa=nombre)
+        ETAPA_S.observar(segundos, etapa=nombre)
+        c = actual()
+        if c is not None:
+            c.etapa(nombre, segundos, pico, delta, alcance)
+
+def dia(fecha, candidatos, activos, asignados, rentados, vencidos, pipas, info, segundos):
+    """Registra la mochila de un día simulado."""
+    metodo, cache = info.get("metodo", "?"), bool(info.get("cache"))
+    DIA_CAND.observar(candidatos)
+    DIA_SOLVER_S.observar(segundos, metodo=metodo)
+    DIAS.sumar(metodo=metodo, cache=str(cache).lower())
+    if pipas:
+        PIPAS.sumar(pipas)
+    if vencidos:
+        VENCIDOS.sumar(vencidos)
+    c = actual()
+    if c is not None:
+        c.dias.append({"fecha": f"{fecha:%Y-%m-%d}", "candidatos": candidatos, "activos": activos,
+                       "asignados": asignados, "rentados": rentados, "vencidos": vencidos,
+                       "pipas": pipas, "metodo": metodo, "cache": int(cache),
+                       "gap": round(info.get("gap", 0.0), 6), "solver_s": round(segundos, 6)})
+
+def solo_vencidos(n):
+    """Fragmentos que vencieron en un día sin candidatos (no hubo mochila)."""
+    if n:
+        VENCIDOS.sumar(n)
+
+def peticion(ruta, metodo, status, segundos):
+    HTTP_S.observar(segundos, ruta=ruta, metodo=metodo)
+    HTTP_N.sumar(ruta=ruta, metodo=metodo, status=str(status))
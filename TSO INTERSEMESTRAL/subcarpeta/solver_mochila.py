@@ -0,0 +1,329 @@
+# ---------------------------------------------------------------
+# Capa de solvers para la mochila diaria (una sola restricción).
+#
+# Backends disponibles:
+#   • "dp"      OR-Tools programación dinámica (exacto, costo n × capacidad)
+#   • "bb"      OR-Tools branch-and-bound (exacto si termina en el tiempo)
+#   • "cpsat"   OR-Tools CP-SAT (exacto, reporta cota si corta por tiempo)
+#   • "greedy"  razón valor/litro (cota rápida, no exacto)
+#   • "dp_q"    DP sobre pesos cuantizados (factible, reporta gap)
+#   • "clases"  exacto para ≤ 3 valores distintos (VALOR_MAP), sin tabla DP;
+#               entre empates de valor busca el de más litros propios
+#
+# `resolver()` elige el backend según tamaño de la instancia y el
+# presupuesto de tiempo por día, y ataja el caso trivial en que todos
+# los candidatos caben. Antes de cualquier DP se dividen los pesos entre
+# su MCD (exacto) para reducir la tabla.
+# ---------------------------------------------------------------
+
+import math, time
+import numpy as np
+from ortools.algorithms.python import knapsack_solver
+from ortools.sat.python import cp_model
+
+LIMITE_S        = 1.0          # presupuesto de tiempo por día (s)
+MAX_CELDAS_DP   = 5_000_000    # n × capacidad máxima para usar DP exacta
+MAX_ITEMS_BB    = 64           # hasta aquí se intenta branch-and-bound
+MAX_CLASES      = 3            # valores distintos para el solver por clases
+INTENTOS        = 16           # repartos por clase que se rellenan con intercambios
+VECINOS         = 4            # parejas que se prueban por intercambio
+MAX_PARES       = 1_000_000    # celdas por bloque de repartos / intercambios por paso (memoria)
+VERSION         = 4            # cambia cuando cambia la selección → invalida la cache de mochila
+
+def _ortools(tipo, pesos, valores, capacidad, limite_s=None):
+    solver = knapsack_solver.KnapsackSolver(tipo, "knap")
+    solver.init(valores, [pesos], [capacidad])
+    if limite_s:
+        solver.set_time_limit(limite_s)
+    solver.solve()
+    sel = [i for i in range(len(pesos)) if solver.best_solution_contains(i)]
+    return sel, solver.is_solution_optimal()
+
+def _cpsat(pesos, valores, capacidad, limite_s):
+    modelo = cp_model.CpModel()
+    x = [modelo.new_bool_var(f"x{i}") for i in range(len(pesos))]
+    modelo.add(sum(w * xi for w, xi in zip(pesos, x)) <= capacidad)
+    modelo.maximize(sum(v * xi for v, xi in zip(valores, x)))
+    solver = cp_model.CpSolver()
+    solver.parameters.max_time_in_seconds = limite_s
+    solver.parameters.num_workers = 1
+    estado = solver.solve(modelo)
+    if estado not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+        return [], solver.best_objective_bound
+    sel = [i for i, xi in enumerate(x) if solver.value(xi)]
+    return sel, solver.best_objective_bound
+
+def cota_lp(pesos, valores, capacidad):
+    """Cota superior de Dantzig (relajación lineal)."""
+    cota, libre = 0.0, capacidad
+    for i in sorted(range(len(pesos)), key=lambda i: -valores[i] / max(pesos[i], 1e-9)):
+        if pesos[i] <= libre:
+            cota += valores[i]; libre -= pesos[i]
+        else:
+            return cota + valores[i] * libre / pesos[i]
+    return cota
+
+def greedy(pesos, valores, capacidad):
+    """Llena por valor/litro; compara contra el mejor artículo suelto (½-aprox)."""
+    sel, libre = [], capacidad
+    for i in sorted(range(len(pesos)), key=lambda i: -valores[i] / max(pesos[i], 1e-9)):
+        if pesos[i] <= libre:
+            sel.append(i); libre -= pesos[i]
+    mejor = max(range(len(pesos)), key=lambda i: valores[i], default=None)
+    if mejor is not None and valores[mejor] > sum(valores[i] for i in sel):
+        sel = [mejor]
+    return sorted(sel)
+
+def escalar_mcd(pesos, capacidad):
+    """Divide pesos y capacidad entre su MCD; no altera el óptimo."""
+    g = math.gcd(capacidad, *pesos) or 1
+    return [w // g for w in pesos], capacidad // g, g
+
+def cuantizar(pesos, capacidad, celdas=MAX_CELDAS_DP):
+    """
+    Redondea pesos hacia arriba a múltiplos de q para que la tabla DP
+    tenga ≤ `celdas`. Toda solución cuantizada es factible en litros reales.
+    """
+    q = max(1, math.ceil(len(pesos) * capacidad / celdas))
+    return [-(-w // q) for w in pesos], capacidad // q, q
+
+def por_clases(pesos, valores, capacidad):
+    """
+    Mochila exacta cuando los valores toman pocas clases (VALOR 3/2/1).
+
+    Dentro de una clase siempre conviene llevar los más ligeros, así que
+    el óptimo es un prefijo de cada clase ordenada por litros. Se recorre
+    k1 y, vectorizado sobre k2, se busca el mayor k3 que cabe con sumas
+    prefijo + searchsorted: O(n1·n2·log n3) en el peor caso (la cota LP
+    corta casi siempre mucho antes) y memoria O(n2) por k1. Eso da el
+    valor óptimo; entre los empates de valor (que no tienen por qué ser
+    prefijos) max_litros() busca el que más litros propios usa (menos
+    renta).
+    """
+    clases = sorted(set(valores), reverse=True)
+    if len(clases) > MAX_CLASES:
+        raise ValueError(f"por_clases admite ≤ {MAX_CLASES} valores distintos")
+    grupos = [sorted((i for i in range(len(pesos)) if valores[i] == c), key=lambda i: pesos[i])
+              for c in clases]
+    while len(grupos) < MAX_CLASES:
+        grupos.append([]); clases.append(0)
+    (g1, g2, g3), (v1, v2, v3) = grupos, clases
+    P1, P2, P3 = (np.concatenate(([0], np.cumsum([pesos[i] for i in g], dtype=np.int64)))
+                  for g in grupos)
+
+    # cota LP de las clases 2 y 3 para cada k1 → se visitan los k1 más
+    # prometedores primero y se corta en cuanto la cota no alcanza al mejor
+    resto = capacidad - P1[P1 <= capacidad]
+    w23 = np.array([pesos[i] for i in g2 + g3], dtype=float)
+    v23 = np.array([v2] * len(g2) + [v3] * len(g3), dtype=float)
+    orden = np.argsort(-v23 / np.maximum(w23, 1e-9), kind="stable")
+    W = np.concatenate(([0], np.cumsum(w23[orden]))); V = np.concatenate(([0], np.cumsum(v23[orden])))
+    j = np.searchsorted(W, resto, side="right") - 1
+    razon = np.append(v23[orden] / np.maximum(w23[orden], 1e-9), 0)
+    cota = v1 * np.arange(len(resto)) + V[j] + razon[j] * (resto - W[j])
+
+    mejor = (-1, -1, 0, 0, 0)                     # (valor, litros, k1, k2, k3)
+    for k1 in np.argsort(-cota, kind="stable"):
+        if math.floor(cota[k1] + 1e-9) < mejor[0]:
+            break
+        k1 = int(k1)
+        k2 = np.arange(np.searchsorted(P2, resto[k1], side="right"))
+        k3 = np.searchsorted(P3, resto[k1] - P2[k2], side="right") - 1
+        val = v1 * k1 + v2 * k2 + v3 * k3
+        lit = P1[k1] + P2[k2] + P3[k3]
+        m   = np.lexsort((lit, val))[-1]
+        cand = (int(val[m]), int(lit[m]), k1, int(k2[m]), int(k3[m]))
+        if cand[:2] > mejor[:2]:
+            mejor = cand
+
+    valor, litros, k1, k2, k3 = mejor
+    if not valor or litros >= capacidad:
+        return sorted(g1[:k1] + g2[:k2] + g3[:k3])
+    return sorted(max_litros(pesos, valores, capacidad, grupos, clases, valor, (k1, k2, k3)))
+
+def _repartos(W, clases, capacidad, valor):
+    """
+    Repartos (k1, k2, k3) que suman `valor` y caben con los más ligeros de
+    cada clase, con su carga mínima (los k más ligeros) y máxima (los k
+    más pesados). Genera bloques de k1 de ≤ MAX_PARES celdas: la malla
+    k1 × k2 completa es O(n1·n2) en memoria.
+    """
+    P = [np.concatenate(([0], np.cumsum(w))) for w in W]
+    S = [np.concatenate(([0], np.cumsum(w[::-1]))) for w in W]
+    (v1, v2, v3), n3 = clases, len(W[2])
+    # k1 < m1 y k2 < m2: con más pedidos de la clase ni los más ligeros caben
+    m1, m2 = (int(np.searchsorted(p, capacidad, side="right")) for p in P[:2])
+    filas  = max(1, MAX_PARES // m2)
+    for desde in range(0, m1, filas):
+        bloque = np.arange(desde, min(desde + filas, m1))
+        k1, k2 = np.repeat(bloque, m2), np.tile(np.arange(m2), len(bloque))
+        resto  = valor - v1 * k1 - v2 * k2
+        if v3:
+            k3 = resto // v3
+            ok = (resto >= 0) & (resto % v3 == 0) & (k3 <= n3)
+        else:
+            k3, ok = np.zeros_like(resto), resto == 0
+        ks = np.stack([k1[ok], k2[ok], k3[ok]], axis=1)
+        lo = sum(P[c][ks[:, c]] for c in range(MAX_CLASES))
+        hi = sum(S[c][ks[:, c]] for c in range(MAX_CLASES))
+        cabe = lo <= capacidad
+        yield ks[cabe], lo[cabe], hi[cabe]
+
+def _intercambios(W, dentro, capacidad):
+    """
+    Sube la carga de `dentro` (máscara por clase) sin pasar `capacidad` ni
+    cambiar cuántos lleva cada clase: en cada paso aplica el intercambio
+    (sale uno, entra otro de la misma clase) o el par de intercambios que
+    más litros suma dentro de la holgura. Devuelve la carga final.
+    Cada paso ordena los k·(n − k) intercambios de cada clase; si pasan
+    de MAX_PARES no se intenta y queda la carga de `dentro`.
+    """
+    carga = sum(int(w[d].sum()) for w, d in zip(W, dentro))
+    pares = sum(int(d.sum()) * int((~d).sum()) for d in dentro)
+    while carga < capacidad and pares <= MAX_PARES:
+        holgura = capacidad - carga
+        gan, sale, entra, clase = [], [], [], []
+        for c, (w, d) in enumerate(zip(W, dentro)):
+            si, no = np.flatnonzero(d), np.flatnonzero(~d)
+            gan.append((w[no][None, :] - w[si][:, None]).ravel())
+            sale.append(np.repeat(si, len(no))); entra.append(np.tile(no, len(si)))
+            clase.append(np.full(len(si) * len(no), c))
+        orden = np.argsort(np.concatenate(gan), kind="stable")
+        gan, sale, entra, clase = (np.concatenate(x)[orden] for x in (gan, sale, entra, clase))
+        if not len(gan):
+            break
+
+        k = np.searchsorted(gan, holgura, side="right") - 1
+        mejor, pasos = (int(gan[k]), (k,)) if k >= 0 and gan[k] > 0 else (0, ())
+        # pares: uno que se pasa de la holgura compensado por otro que resta
+        par = np.searchsorted(gan, holgura - gan, side="right") - 1
+        for desp in range(VECINOS):
+            j = np.maximum(par - desp, 0)
+            suma = gan + gan[j]
+            ok = ((par - desp >= 0) & (j != np.arange(len(gan))) & (suma > mejor) & (suma <= holgura)
+                  & ~((clase == clase[j]) & ((sale == sale[j]) | (entra == entra[j]))))
+            if ok.any():
+                m = int(np.argmax(np.where(ok, suma, -1)))
+                mejor, pasos = int(suma[m]), (m, int(j[m]))
+        if not mejor:
+            break
+        for m in pasos:
+            dentro[clase[m]][sale[m]], dentro[clase[m]][entra[m]] = False, True
+        carga += mejor
+    return carga
+
+def max_litros(pesos, valores, capacidad, grupos, clases, valor, ks):
+    """
+    Entre las selecciones con valor `valor`, la que más litros propios
+    carga sin pasar `capacidad`. Dentro de una clase sólo importa cuántos
+    se llevan: si el mejor reparto cabe con los más pesados de cada clase
+    ése es el óptimo; si no, desde los más ligeros de los INTENTOS
+    repartos más cargados se intercambian pedidos hasta no poder acercarse
+    más. Exacta cuando llega a `capacidad` o a la carga máxima de un
+    reparto; nunca carga menos que el prefijo `ks`. Con tabla chica
+    (n × capacidad ≤ MAX_CELDAS_DP) es la DP exacta sobre (valor, litros).
+    """
+    if len(pesos) * capacidad <= MAX_CELDAS_DP:
+        m = capacidad + 1
+        sel, _ = _ortools(knapsack_solver.SolverType.KNAPSACK_DYNAMIC_PROGRAMMING_SOLVER,
+                          pesos, [v * m + w for v, w in zip(valores, pesos)], capacidad)
+        return sel
+    W = [np.array([pesos[i] for i in g], dtype=np.int64) for g in grupos]
+    # 1ª pasada: el reparto que cabe entero con los más pesados
+    litros, mejor = -1, None
+    for rep, lo, hi in _repartos(W, clases, capacidad, valor):
+        enteros = hi <= capacidad
+        if enteros.any() and hi[enteros].max() > litros:
+            a = int(np.flatnonzero(enteros)[np.argmax(hi[enteros])])
+            litros, mejor = int(hi[a]), [np.arange(len(w)) >= len(w) - k for w, k in zip(W, rep[a])]
+
+    # 2ª pasada: los INTENTOS repartos abiertos con más carga mínima (orden estable entre bloques)
+    repartos, cargas = np.empty((0, MAX_CLASES), dtype=np.int64), np.empty(0, dtype=np.int64)
+    for rep, lo, hi in _repartos(W, clases, capacidad, valor):
+        abiertos = (hi > capacidad) & (hi > litros)
+        repartos = np.concatenate((repartos, rep[abiertos]))
+        cargas   = np.concatenate((cargas, lo[abiertos]))
+        orden    = np.argsort(-cargas, kind="stable")[:INTENTOS]
+        repartos, cargas = repartos[orden], cargas[orden]
+
+    for r in repartos:
+        dentro = [np.arange(len(w)) < k for w, k in zip(W, r)]
+        carga  = _intercambios(W, dentro, capacidad)
+        if carga > litros:
+            litros, mejor = carga, dentro
+        if litros == capacidad:
+            break
+    if mejor is None:                               # no debería pasar: el prefijo siempre cabe
+        return [i for g, k in zip(grupos, ks) for i in g[:k]]
+    return [g[j] for g, d in zip(grupos, mejor) for j in np.flatnonzero(d)]
+
+def resolver(pesos, valores, capacidad, metodo="auto", limite_s=LIMITE_S):
+    """
+    Resuelve max Σv·x s.a. Σw·x ≤ capacidad.
+
+    Devuelve (índices seleccionados, info) con info = {metodo, valor,
+    cota, gap, segundos}. gap = 0 cuando el resultado es óptimo probado.
+    """
+    t0   = time.perf_counter()
+    n    = len(pesos)
+    cabe = [i for i in range(n) if pesos[i] <= capacidad and valores[i] > 0]
+    info = {"metodo": metodo, "cota": None}
+
+    if sum(pesos[i] for i in cabe) <= capacidad:   # todos caben
+        sel, info["metodo"], info["cota"] = cabe, "trivial", sum(valores[i] for i in cabe)
+    else:
+        w = [pesos[i] for i in cabe]; v = [valores[i] for i in cabe]
+        w, cap, _ = escalar_mcd(w, capacidad)
+
+        if metodo == "auto":
+            if len(set(v)) <= MAX_CLASES:
+                metodo = "clases"
+            elif len(w) * cap <= MAX_CELDAS_DP:
+                metodo = "dp"
+            elif len(w) <= MAX_ITEMS_BB:
+                metodo = "bb"
+            else:
+                metodo = "cpsat"
+
+        if metodo == "clases":
+            loc = por_clases(w, v, cap)
+            info["cota"] = sum(v[i] for i in loc)
+        elif metodo == "dp":
+            loc, _ = _ortools(knapsack_solver.SolverType.KNAPSACK_DYNAMIC_PROGRAMMING_SOLVER, w, v, cap)
+            info["cota"] = sum(v[i] for i in loc)
+        elif metodo == "bb":
+            loc, optimo = _ortools(
+                knapsack_solver.SolverType.KNAPSACK_MULTIDIMENSION_BRANCH_AND_BOUND_SOLVER,
+                w, v, cap, limite_s)
+            if optimo:
+                info["cota"] = sum(v[i] for i in loc)
+            else:                                   # se acabó el tiempo → CP-SAT
+                metodo = "cpsat"
+                restante = max(limite_s - (time.perf_counter() - t0), 0.05)
+                loc, info["cota"] = _cpsat(w, v, cap, restante)
+        elif metodo == "cpsat":
+            loc, info["cota"] = _cpsat(w, v, cap, limite_s)
+        elif metodo == "greedy":
+            loc = greedy(w, v, cap)
+        elif metodo == "dp_q":
+            wq, capq, _ = cuantizar(w, cap)
+            loc, _ = _ortools(knapsack_solver.SolverType.KNAPSACK_DYNAMIC_PROGRAMMING_SOLVER, wq, v, capq)
+        else:
+            raise ValueError(f"Método de mochila desconocido: {metodo}")
+
+        # si CP-SAT no encontró nada o es heurístico, greedy da piso garantizado
+        if metodo in ("cpsat", "greedy", "dp_q"):
+            if info["cota"] is None:
+                info["cota"] = math.floor(cota_lp(w, v, cap))
+            alt = greedy(w, v, cap)
+            if sum(v[i] for i in alt) > sum(v[i] for i in loc):
+                loc = alt
+        info["metodo"] = metodo
+        sel = [cabe[i] for i in loc]
+
+    info["valor"]    = sum(valores[i] for i in sel)
+    cota             = max(info["cota"], info["valor"])
+    info["cota"]     = cota
+    info["gap"]      = (cota - info["valor"]) / cota if cota else 0.0
+    info["segundos"] = time.perf_counter() - t0
+    return sorted(sel), info
@@ -0,0 +1,180 @@
+# ---------------------------------------------------------------
+# Tablas en modo remoto para Tabulator: paginado, filtros y orden del
+# lado del servidor.
+#
+# TablaIndexada envuelve el DataFrame de un CSV y va guardando, por
+# columna y sólo cuando se piden, el rango denso de sus valores y la
+# permutación ya ordenada asc / desc. Las posiciones que resultan de
+# cada combinación filtro + orden quedan en un LRU chico, así que pasar
+# de página es sólo cortar un arreglo y serializar esas filas.
+#
+# Los CSV llegan con fechas dd/mm/aaaa y montos "$1,234.50" como texto:
+# una columna de texto cuyos valores son todos fecha o todos número se
+# ordena por el valor ya convertido, no por el texto.
+#
+# Parámetros (los que manda Tabulator con paginationMode="remote"):
+#   page, size
+#   sort[i][field], sort[i][dir]                 asc | desc
+#   filter[i][field], filter[i][type], [value]   like | = | != | < | <= | > | >=
+#   q                                            búsqueda en todas las columnas
+# ---------------------------------------------------------------
+
+import json, math, re, threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+
+TAM_PAGINA   = 20
+MAX_PAGINA   = 1000           # filas máximas por petición
+MAX_CONSULTAS = 8             # combinaciones filtro+orden recordadas por tabla
+
+_PARAM = re.compile(r"^(sort|filter)\[(\d+)\]\[(\w+)\]$")
+
+_NUMERO = r"-?\$?\s*\d[\d,]*(?:\.\d+)?"          # 1500 · -2.5 · $1,234.50 (sin notación 1e5)
+_FECHAS = (                                         # (patrón, argumentos de to_datetime)
+    (r"\d{1,2}/\d{1,2}/\d{4}(?:\s+\d{1,2}:\d{2}(?::\d{2})?)?", {"dayfirst": True, "format": "mixed"}),
+    (r"\d{4}-\d{2}-\d{2}(?:[ T]\d{2}:\d{2}(?::\d{2})?)?",    {"format": "ISO8601"}),
+)
+
+def parametros(args):
+    """(página, tamaño, filtros, orden, q) a partir de request.args."""
+    def entero(nombre, defecto):
+        try:
+            return int(args.get(nombre, defecto))
+        except (TypeError, ValueError):
+            return defecto
+
+    listas = {"sort": {}, "filter": {}}
+    for k, v in args.items():
+        m = _PARAM.match(k)
+        if m:
+            listas[m[1]].setdefault(int(m[2]), {})[m[3]] = v
+
+    orden   = tuple((s["field"], s.get("dir", "asc") == "desc")
+                    for _, s in sorted(listas["sort"].items()) if s.get("field"))
+    filtros = tuple((f["field"], f.get("type", "like"), f.get("value", ""))
+                    for _, f in sorted(listas["filter"].items())
+                    if f.get("field") and f.get("value", "") != "")
+    pagina  = max(1, entero("page", 1))
+    tam     = min(max(1, entero("size", TAM_PAGINA)), MAX_PAGINA)
+    return pagina, tam, filtros, orden, args.get("q", "").strip().lower()
+
+class TablaIndexada:
+    def __init__(self, df):
+        self.df       = df
+        self._rango   = {}                       # columna → rango denso (nulos al final)
+        self._perm    = {}                       # (columna, desc) → permutación ordenada
+        self._consultas = OrderedDict()          # (filtros, q, orden) → posiciones
+        self._lock    = threading.Lock()
+
+    @property
+    def nbytes(self):
+        """Cota de memoria: el DataFrame más todo lo que pueda llegar a indexarse."""
+        base = int(self.df.memory_usage(deep=True).sum())
+        # rango + 2 permutaciones por columna y las posiciones de cada consulta
+        return base + 8 * len(self.df) * (3 * len(self.df.columns) + MAX_CONSULTAS)
+
+    def _columna(self, col):
+        if col not in self.df.columns:
+            raise KeyError(f"Columna desconocida: {col}")
+        return self.df[col]
+
+    def llave(self, col):
+        """Valores por los que se ordena `col`: texto que es todo fecha o todo número, convertido."""
+        s = self._columna(col)
+        if not (s.dtype == object or pd.api.types.is_string_dtype(s)):
+            return s
+        t = s.dropna().astype(str).str.strip()
+        if t.empty:
+            return s
+        if t.str.fullmatch(_NUMERO).all():
+            return pd.to_numeric(t.str.replace(r"[$,\s]", "", regex=True)).reindex(s.index)
+        for patron, kw in _FECHAS:
+            if t.str.fullmatch(patron).all():
+                return pd.to_datetime(t, errors="coerce", **kw).reindex(s.index)
+        return s
+
+    def rango(self, col):
+        if col not in self._rango:
+            self._rango[col] = (self.llave(col).rank(method="dense", na_option="bottom")
+                                .to_numpy(dtype=np.int64))
+        return self._rango[col]
+
+    def permutacion(self, col, desc=False):
+        clave = (col, desc)
+        if clave not in self._perm:
+            r = self.rango(col)
+            self._perm[clave] = np.argsort(-r if desc else r, kind="stable")
+        return self._perm[clave]
+
+    def texto(self, col):
+        """Columna como texto en minúsculas (nulos → ""); no se guarda: la máscara sí."""
+        s = self._columna(col)
+        return s.astype(str).str.lower().where(s.notna(), "")
+
+    def _mascara(self, filtros, q):
+        mask = np.ones(len(self.df), dtype=bool)
+        for col, tipo, valor in filtros:
+            if tipo == "like":
+                mask &= self.texto(col).str.contains(str(valor).lower(), regex=False).to_numpy()
+                continue
+            s = self._columna(col)
+            if pd.api.types.is_numeric_dtype(s):
+                valor = pd.to_numeric(valor, errors="coerce")
+            comparar = {"=": s.eq, "!=": s.ne, "<": s.lt, "<=": s.le, ">": s.gt, ">=": s.ge}.get(tipo)
+            if comparar is None:
+                raise ValueError(f"Tipo de filtro no soportado: {tipo}")
+            mask &= comparar(valor).fillna(False).to_numpy(dtype=bool)
+        if q:
+            hay = np.zeros(len(self.df), dtype=bool)
+            for col in self.df.columns:
+                hay |= self.texto(col).str.contains(q, regex=False).to_numpy()
+            mask &= hay
+        return mask
+
+    def posiciones(self, filtros=(), orden=(), q=""):
+        """Posiciones (iloc) de las filas que pasan los filtros, en el orden pedido."""
+        clave = (filtros, q, orden)
+        with self._lock:
+            if clave in self._consultas:
+                self._consultas.move_to_end(clave)
+                return self._consultas[clave]
+
+        mask = self._mascara(filtros, q) if (filtros or q) else None
+        if not orden:
+            pos = np.flatnonzero(mask) if mask is not None else np.arange(len(self.df))
+        elif len(orden) == 1:
+            pos = self.permutacion(*orden[0])
+            if mask is not None:
+                pos = pos[mask[pos]]
+        else:
+            # varias columnas: lexsort sobre los rangos (la última llave manda)
+            pos  = np.flatnonzero(mask) if mask is not None else np.arange(len(self.df))
+            keys = [-self.rango(c)[pos] if d else self.rango(c)[pos] for c, d in reversed(orden)]
+            pos  = pos[np.lexsort(keys)]
+
+        with self._lock:
+            self._consultas[clave] = pos
+            while len(self._consultas) > MAX_CONSULTAS:
+                self._consultas.popitem(last=False)
+        return pos
+
+    def pagina(self, pagina=1, tam=TAM_PAGINA, filtros=(), orden=(), q=""):
+        """JSON (str) de una página en el formato remoto de Tabulator."""
+        pos   = self.posiciones(filtros, orden, q)
+        total = len(pos)
+        ultima = max(1, math.ceil(total / tam))
+        pagina = min(pagina, ultima)
+        filas  = self.df.iloc[pos[(pagina - 1) * tam : pagina * tam]]
+        # una sola serialización: las filas van tal cual salen de to_json (NaN → null)
+        return ('{"columns":%s,"data":%s,"last_page":%d,"last_row":%d}'
+                % (json.dumps(list(self.df.columns)), filas.to_json(orient="records"), ultima, total))
+
+    def completa(self):
+        """JSON (str) {columns, rows} con todas las filas, como antes del modo remoto."""
+        return ('{"columns":%s,"rows":%s}'
+                % (json.dumps(list(self.df.columns)), self.df.to_json(orient="records")))
+
+    def csv(self, filtros=(), orden=(), q=""):
+        """CSV de todas las filas filtradas / ordenadas (botón de descarga)."""
+        return self.df.iloc[self.posiciones(filtros, orden, q)].to_csv(index=False)
@@ -0,0 +1,99 @@
+# ---------------------------------------------------------------
+# Cola de trabajos en segundo plano para la app (mochila, etc.).
+#
+# Cada trabajo corre en un ThreadPoolExecutor y se identifica con un
+# ID; la petición HTTP sólo lo encola y la página consulta su estado.
+#
+# Single-flight: los trabajos llevan una llave (p. ej. la huella de los
+# CSV de entrada). Si llega otro con la misma llave mientras el primero
+# está en cola / corriendo, o si ya terminó bien con esas mismas
+# entradas, se devuelve el existente en lugar de lanzar otra corrida.
+# Un trabajo con error no se reutiliza: el siguiente reintenta.
+# ---------------------------------------------------------------
+
+import threading, time, traceback, uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+HILOS        = 1              # la simulación ya usa todo el CPU que le toca
+MAX_TRABAJOS = 200            # historial que se conserva para /api/trabajos
+
+EN_COLA, CORRIENDO, LISTO, ERROR = "en_cola", "corriendo", "listo", "error"
+
+class Trabajo:
+    __slots__ = ("id", "clave", "estado", "resultado", "error", "creado", "inicio", "fin")
+
+    def __init__(self, clave):
+        self.id        = uuid.uuid4().hex
+        self.clave     = clave
+        self.estado    = EN_COLA
+        self.resultado = self.error = self.inicio = self.fin = None
+        self.creado    = time.time()
+
+    @property
+    def pendiente(self):
+        return self.estado in (EN_COLA, CORRIENDO)
+
+    def a_dict(self):
+        """Estado serializable (sin el resultado, que puede no serlo)."""
+        fin = self.fin or time.time()
+        return {
+            "id":        self.id,
+            "estado":    self.estado,
+            "error":     self.error,
+            "creado":    self.creado,
+            "inicio":    self.inicio,
+            "fin":       self.fin,
+            "segundos":  round(fin - self.inicio, 3) if self.inicio else None,
+        }
+
+class ColaTrabajos:
+    def __init__(self, hilos=HILOS, max_trabajos=MAX_TRABAJOS):
+        self._pool     = ThreadPoolExecutor(hilos, thread_name_prefix="trabajo")
+        self._lock     = threading.Lock()
+        self._trabajos = OrderedDict()         # id → Trabajo (más viejo primero)
+        self._por_clave = {}                   # clave → Trabajo vigente
+        self.max_trabajos = max_trabajos
+
+    def enviar(self, clave, fn, *args, **kw):
+        """Encola fn(*args, **kw) salvo que ya haya uno vigente con `clave`."""
+        with self._lock:
+            previo = self._por_clave.get(clave)
+            if previo is not None and previo.estado != ERROR:
+                return previo
+            trabajo = Trabajo(clave)
+            self._trabajos[trabajo.id] = self._por_clave[clave] = trabajo
+            self._recortar()
+        self._pool.submit(self._correr, trabajo, fn, args, kw)
+        return trabajo
+
+    def _correr(self, trabajo, fn, args, kw):
+        trabajo.estado, trabajo.inicio = CORRIENDO, time.time()
+        try:
+            trabajo.resultado = fn(*args, **kw)
+            trabajo.estado    = LISTO
+        except Exception as e:
+            trabajo.error  = str(e) or traceback.format_exc(limit=1)
+            trabajo.estado = ERROR
+        finally:
+            trabajo.fin = time.time()
+
+    def _recortar(self):
+        """Olvida los trabajos terminados más viejos por encima de max_trabajos."""
+        for tid in list(self._trabajos):
+            if len(self._trabajos) <= self.max_trabajos:
+                break
+            t = self._trabajos[tid]
+            if t.pendiente:
+                continue
+            del self._trabajos[tid]
+            if self._por_clave.get(t.clave) is t:
+                del self._por_clave[t.clave]
+
+    def obtener(self, tid):
+        with self._lock:
+            return self._trabajos.get(tid)
+
+    def listar(self):
+        with self._lock:
+            return [t.a_dict() for t in reversed(self._trabajos.values())]
@@ -0,0 +1,230 @@
+# -------------------------------------------------------------------
+# Benchmark de todas las etapas del pipeline sobre datos sintéticos
+# (datos_sinteticos.py, con semilla fija).
+#
+# Etapas, en el orden de pipeline.correr:
+#   lectura        cargar_pedidos / cargar_cancelados (sin cache binaria)
+#   prioridad      prioridad_cliente.calcular_prioridades
+#   limpieza       limpiar_datos.limpiar_pedidos
+#   fragmentacion  con_entrega + preparar (fragmentar > CAP_PROPIA)
+#   mochila        simulación diaria (cache de mochila vacía, sin disco)
+#   pipas          programacion_final.detallar
+#   validacion     validador_final.validar + infracciones
+#   utilidad       utilidad_previa + utilidad_posterior + resultados.comparar
+#
+# De cada etapa se toma el mejor tiempo de --repeticiones corridas, su
+# fracción del tiempo total y el pico de memoria (tracemalloc) de una
+# corrida aparte, y se compara con la línea base guardada en BASE. La
+# base registra el equipo donde se midió: en el mismo equipo se comparan
+# segundos; en otro, la fracción del total de cada etapa (los segundos
+# de otra máquina no dicen nada). Una etapa es regresión si pasa el
+# umbral relativo y además la diferencia absoluta supera MIN_SEGUNDOS /
+# MIN_MB (para no fallar por ruido en etapas de milisegundos). Con
+# alguna regresión el script sale con código 1.
+#
+# Uso:
+#   python benchmark.py                          → 10k y 100k contra la base
+#   python benchmark.py --tamanos 10k 100k 1m
+#   python benchmark.py --guardar-base           → reemplaza la base de esos tamaños
+#   python benchmark.py --umbral 0.4 --repeticiones 3 --json resultado.json
+# -------------------------------------------------------------------
+
+import argparse, contextlib, gc, io, json, os, platform, sys, time, tracemalloc
+from pathlib import Path
+from datetime import datetime
+
+import datos_sinteticos
+from lector_pedidos import cargar_pedidos, cargar_cancelados
+from prioridad_cliente import calcular_prioridades
+from limpiar_datos import limpiar_pedidos
+from programacion_final import detallar
+from validador_final import validar, infracciones
+from utilidad_previa import utilidad_previa
+from utilidad_posterior import utilidad_posterior
+from resultados import comparar
+from subcarpeta import algoritmo_mochila as am, cache_csv
+from subcarpeta.cache_mochila import CacheMochila
+
+BASE           = Path("benchmark_base.json")
+DATOS_DIR      = Path("csv_sintetico")
+TAMANOS        = ("10k", "100k")
+SEMILLA        = 0
+REPETICIONES   = 3             # mejor de N: el ruido de una sola corrida ronda el 25 %
+UMBRAL         = 0.25          # +25 % sobre la base → regresión
+UMBRAL_MEMORIA = 0.25
+MIN_SEGUNDOS   = 0.05
+MIN_MB         = 5.0
+
+# ---------------------------- etapas --------------------------------
+def _prio_map(r):
+    return r["prioridades"].set_index("CLIENTE")["Prioridad"]
+
+def _lectura(r):
+    return {"pedidos": cargar_pedidos(r["rutas"][0]), "cancelados": cargar_cancelados(r["rutas"][1])}
+
+def _mochila(r):
+    anterior, am.cache = am.cache, CacheMochila(ruta=None)     # sin aciertos de corridas anteriores
+    try:
+        alm = am.AlmacenPedidos(r["fragmentos"])
+        pipas = am.simular(alm, r["desde"])
+    finally:
+        am.cache = anterior
+    return {"programacion": alm.a_dataframe(r["fragmentos"]), "pipas": pipas}
+
+ETAPAS = [
+    ("lectura",       _lectura),
+    ("prioridad",     lambda r: {"prioridades": calcular_prioridades(r["pedidos"], r["cancelados"],
+                                                                     r["desde"], r["hasta"])}),
+    ("limpieza",      lambda r: {"limpios": limpiar_pedidos(r["pedidos"], _prio_map(r),
+                                                            r["desde"], r["hasta"])}),
+    ("fragmentacion", lambda r: {"fragmentos": am.preparar(am.con_entrega(r["limpios"]), _prio_map(r))}),
+    ("mochila",       _mochila),
+    ("pipas",         lambda r: {"detallada": detallar(r["programacion"], r["desde"], r["hasta"])[0]}),
+    ("validacion",    lambda r: {"validacion":   validar(r["programacion"]),
+                                 "infracciones": infracciones(r["programacion"], r["limpios"],
+                                                              pipas=r["pipas"])}),
+    ("utilidad",      lambda r: {"utilidad_final": comparar(
+                                     utilidad_previa(r["pedidos"], r["desde"], r["hasta"]),
+                                     utilidad_posterior(r["programacion"], r["desde"], r["hasta"]))}),
+]
+
+# ---------------------------- medición ------------------------------
+def tamano(texto):
+    """'10k' → 10_000, '1m' → 1_000_000, '2500' → 2500."""
+    t = texto.strip().lower()
+    mult = {"k": 1_000, "m": 1_000_000}.get(t[-1:], 1)
+    return int(float(t.rstrip("km")) * mult)
+
+def datos(n, semilla):
+    """Rutas de los CSV sintéticos de (n, semilla); se generan una sola vez."""
+    carpeta = DATOS_DIR / f"{n}_{semilla}"
+    rutas = carpeta / "Pedidos.csv", carpeta / "PedidosCancelados.csv"
+    desde_dt, hasta_dt, _ = datos_sinteticos.rango(n)
+    if not all(r.exists() for r in rutas):
+        print(f"  generando {n:,} pedidos sintéticos en {carpeta}…")
+        datos_sinteticos.escribir(carpeta, n, semilla)
+    return rutas, desde_dt, hasta_dt
+
+def medir(fn, r, repeticiones, memoria):
+    """(salida, mejor tiempo, pico MB o None); la salida de stdout de la etapa se descarta."""
+    tiempos = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(max(1, repeticiones)):
+            gc.collect()
+            t = time.perf_counter()
+            salida = fn(r)
+            tiempos.append(time.perf_counter() - t)
+        pico = None
+        if memoria:
+            gc.collect()
+            tracemalloc.start()
+            fn(r)
+            pico = tracemalloc.get_traced_memory()[1] / 2**20
+            tracemalloc.stop()
+    return salida, min(tiempos), pico
+
+def equipo():
+    """Identifica la máquina de una medición (los segundos sólo se comparan en la misma)."""
+    return {"nodo": platform.node(), "procesador": platform.processor() or platform.machine(),
+            "cpus": os.cpu_count(), "python": platform.python_version()}
+
+def correr(n, semilla=SEMILLA, repeticiones=REPETICIONES, memoria=True):
+    """{etapa: {"segundos", "fraccion", "pico_mb"}} de todas las etapas para n pedidos."""
+    rutas, desde_dt, hasta_dt = datos(n, semilla)
+    r = {"rutas": rutas, "desde": desde_dt, "hasta": hasta_dt}
+    res = {}
+    for nombre, fn in ETAPAS:
+        salida, seg, pico = medir(fn, r, repeticiones, memoria)
+        r.update(salida)
+        res[nombre] = {"segundos": round(seg, 4), "pico_mb": None if pico is None else round(pico, 1)}
+        print(f"  {nombre:<14}{seg:9.3f} s" + ("" if pico is None else f"{pico:10.1f} MB"))
+    total = sum(res[e]["segundos"] for e, _ in ETAPAS)
+    for e, _ in ETAPAS:
+        res[e]["fraccion"] = round(res[e]["segundos"] / total, 4) if total else 0.0
+    res["_filas"] = {"pedidos": len(r["pedidos"]), "fragmentos": len(r["fragmentos"]),
+                     "asignados": int(r["programacion"]["FECHA_ASIGNADA"].notna().sum())}
+    return res
+
+# ---------------------------- comparación ---------------------------
+def comparar_base(actual, base, umbral=UMBRAL, umbral_mem=UMBRAL_MEMORIA, mismo_equipo=True):
+    """
+    Filas del reporte: (etapa, seg, seg_base, Δ%, MB, MB_base, estado).
+    Con mismo_equipo=False, seg_base es la fracción de la base llevada al
+    total de esta corrida y Δ% compara fracciones.
+    """
+    filas = []
+    total = sum(actual[e]["segundos"] for e, _ in ETAPAS)
+    for etapa, _ in ETAPAS:
+        a, b = actual[etapa], (base or {}).get(etapa)
+        if not b or (not mismo_equipo and "fraccion" not in b):
+            filas.append((etapa, a["segundos"], None, None, a["pico_mb"], None, "sin base"))
+            continue
+        seg_b = b["segundos"] if mismo_equipo else b["fraccion"] * total
+        delta = a["segundos"] / seg_b - 1 if seg_b else 0.0
+        lento = delta > umbral and a["segundos"] - seg_b > MIN_SEGUNDOS
+        gordo = (a["pico_mb"] is not None and b.get("pico_mb")
+                 and a["pico_mb"] > b["pico_mb"] * (1 + umbral_mem)
+                 and a["pico_mb"] - b["pico_mb"] > MIN_MB)
+        estado = " + ".join(e for e, si in (("REGRESIÓN tiempo", lento), ("REGRESIÓN memoria", gordo)) if si)
+        filas.append((etapa, a["segundos"], seg_b, delta, a["pico_mb"], b.get("pico_mb"),
+                      estado or "ok"))
+    return filas
+
+def imprimir(n, filas):
+    fmt = lambda v, f: format(v, f) if v is not None else "—".rjust(int(f.lstrip("+").split(".")[0]))
+    print(f"\n{n:,} pedidos")
+    print(f"  {'etapa':<14}{'seg':>9}{'base':>9}{'Δ':>8}{'MB':>9}{'base':>9}  estado")
+    for etapa, seg, seg_b, delta, mb, mb_b, estado in filas:
+        print(f"  {etapa:<14}{seg:9.3f}{fmt(seg_b, '9.3f')}{fmt(delta, '+8.0%')}"
+              f"{fmt(mb, '9.1f')}{fmt(mb_b, '9.1f')}  {estado}")
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark por etapa sobre datos sintéticos")
+    ap.add_argument("--tamanos", nargs="+", default=list(TAMANOS), help="p. ej. 10k 100k 1m")
+    ap.add_argument("--semilla", type=int, default=SEMILLA)
+    ap.add_argument("--repeticiones", type=int, default=REPETICIONES, help="corridas por etapa (mejor tiempo)")
+    ap.add_argument("--sin-memoria", action="store_true", help="no medir el pico con tracemalloc")
+    ap.add_argument("--umbral", type=float, default=UMBRAL, help="regresión de tiempo relativa")
+    ap.add_argument("--umbral-memoria", type=float, default=UMBRAL_MEMORIA)
+    ap.add_argument("--base", type=Path, default=BASE)
+    ap.add_argument("--guardar-base", action="store_true", help="guardar estos resultados como base")
+    ap.add_argument("--json", type=Path, help="escribir los resultados de esta corrida")
+    args = ap.parse_args()
+
+    cache_csv.ACTIVA = False                 # medir el parseo real de los CSV
+    base = json.loads(args.base.read_text()) if args.base.exists() else {}
+    mismo_equipo = base.get("_meta", {}).get("equipo") == equipo()
+    if base and not mismo_equipo:
+        print("(base de otro equipo: se compara la fracción del tiempo total de cada etapa)")
+    resultados, regresiones = {}, []
+
+    for t in args.tamanos:
+        n = tamano(t)
+        print(f"→ {n:,} pedidos (semilla {args.semilla})")
+        res = correr(n, args.semilla, args.repeticiones, not args.sin_memoria)
+        resultados[str(n)] = res
+        filas = comparar_base(res, base.get(str(n)), args.umbral, args.umbral_memoria, mismo_equipo)
+        imprimir(n, filas)
+        regresiones += [(n, f[0], f[-1]) for f in filas if f[-1].startswith("REGRESIÓN")]
+
+    meta = {"fecha": datetime.now().isoformat(timespec="seconds"), "equipo": equipo(),
+            "semilla": args.semilla, "repeticiones": args.repeticiones}
+    if args.json:
+        args.json.write_text(json.dumps({"_meta": meta, **resultados}, indent=2, ensure_ascii=False))
+    if args.guardar_base:
+        base.update(resultados)
+        base["_meta"] = meta
+        args.base.write_text(json.dumps(base, indent=2, ensure_ascii=False) + "\n")
+        print(f"\n✓ Línea base guardada en {args.base}")
+        return 0
+
+    if regresiones:
+        print(f"\n❌ {len(regresiones)} regresión(es):")
+        for n, etapa, estado in regresiones:
+            print(f"   {n:,} · {etapa}: {estado}")
+        return 1
+    print("\n✓ Sin regresiones" + ("" if base else f" (no hay base en {args.base}; use --guardar-base)"))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,143 @@
+# -------------------------------------------------------------------
+# Generador reproducible de Pedidos.csv / PedidosCancelados.csv
+# sintéticos, con el mismo formato que los reales:
+#   • fechas dd/mm/yyyy en Pedidos e ISO en Cancelados
+#   • LITROS REALES como texto con miles ("21,002.00")
+#   • nombres de cliente con variantes (acentos, minúsculas, puntos,
+#     espacios) que claves_cliente tiene que unificar
+#
+# La forma de los datos imita la muestra de csv/: ~POR_DIA pedidos por
+# día con días cargados (≈ 1 de cada 5 pasa de CAP_PROPIA y hay que
+# rentar), litros alrededor de 21 000 y 31 600 L, pocos clientes con mucho
+# volumen (Zipf) y ~10 % de cancelaciones. Con más pedidos se alarga el
+# calendario en lugar de amontonar más pedidos por día, así cada
+# mochila diaria se parece a la real. Unos pocos pedidos superan
+# CAP_PROPIA para que haya fragmentación.
+#
+# Uso:
+#   python datos_sinteticos.py 100000                 → csv_sintetico/
+#   python datos_sinteticos.py 1000000 --semilla 7 --carpeta /tmp/bench
+# -------------------------------------------------------------------
+
+import argparse, math
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from datetime import datetime, timedelta
+
+POR_DIA      = 55                       # pedidos/día de la muestra de 6 meses
+FORMA_DIA    = 7                        # gamma de la carga diaria: CV ≈ 0.38, como la muestra
+DESDE        = datetime(2024, 12, 1)
+FRAC_CANCEL  = 0.10
+FRAC_GIGANTE = 0.0002                   # pedidos > CAP_PROPIA (se fragmentan)
+
+RAICES  = ["COMBUSTIBLES", "GASOLINERA", "DISTRIBUIDORA", "PETRO", "SERVICIO",
+           "AUTOTRANSPORTES", "GAS", "CORPORATIVO", "ESTACION", "LUBRICANTES"]
+APELLIDOS = ["DEL SURESTE", "ATENAS", "DE DELICIAS", "J.V.", "ARPE", "MEXTEPEC",
+             "SAN LUIS", "DEL NORTE", "TOLUCA", "QUERÉTARO", "PEÑA", "MARTÍNEZ"]
+
+def _clientes(k, rng):
+    """k nombres distintos y sus pesos de volumen (Zipf)."""
+    raiz = rng.choice(RAICES, k)
+    ape  = rng.choice(APELLIDOS, k)
+    nombres = [f"{r} {a} {i:04d}" for i, (r, a) in enumerate(zip(raiz, ape))]
+    pesos = 1 / np.arange(1, k + 1) ** 1.1
+    return np.array(nombres, dtype=object), pesos / pesos.sum()
+
+def _variantes(nombres, rng, frac=0.1):
+    """Misma clave de cliente, distinta escritura en una fracción de las filas."""
+    nombres = nombres.copy()
+    idx = np.flatnonzero(rng.random(len(nombres)) < frac)
+    tipo = rng.integers(0, 3, len(idx))
+    s = pd.Series(nombres[idx])
+    nombres[idx] = np.select([tipo == 0, tipo == 1],
+                             [s.str.lower(), s.str.replace(" ", "  ", n=1)],
+                             s.str.replace(" ", ". ", n=1)).astype(object)
+    return nombres
+
+def _litros(n, rng):
+    grupo  = rng.random(n)
+    litros = np.where(grupo < 0.6, rng.normal(21_000, 800, n),
+             np.where(grupo < 0.9, rng.normal(31_600, 1_000, n), rng.uniform(1_000, 47_000, n)))
+    gigante = rng.random(n) < FRAC_GIGANTE
+    litros[gigante] = rng.uniform(2_000_000, 5_000_000, gigante.sum())
+    return np.round(np.clip(litros, 500, None))
+
+def _fechas(dias, n, rng, desde=DESDE, carga=None):
+    """n fechas en `dias` días; `carga` (pesos por día) hace unos días más pesados que otros."""
+    dia = rng.choice(dias, n, p=carga) if carga is not None else rng.integers(0, dias, n)
+    return pd.Timestamp(desde) + pd.to_timedelta(dia, unit="D")
+
+def rango(n, desde=DESDE, por_dia=POR_DIA):
+    """(desde_dt, hasta_dt, días) que cubren n pedidos a por_dia por día."""
+    dias = max(1, math.ceil(n / por_dia))
+    return desde, desde + timedelta(days=dias - 1), dias
+
+def generar(n, semilla=0, desde=DESDE, por_dia=POR_DIA):
+    """
+    (pedidos, cancelados, desde_dt, hasta_dt): DataFrames de texto tal como
+    quedan en los CSV, y el rango de fechas que cubren.
+    """
+    rng  = np.random.default_rng(semilla)
+    desde, hasta, dias = rango(n, desde, por_dia)
+    nombres, pesos = _clientes(max(40, n // 50), rng)
+
+    cli    = rng.choice(len(nombres), n, p=pesos)
+    carga  = rng.gamma(FORMA_DIA, 1.0, dias)
+    pedido = _fechas(dias, n, rng, desde, carga / carga.sum())
+    factura = pedido + pd.to_timedelta(rng.integers(0, 4, n), unit="D")
+    litros = _litros(n, rng)
+    margen = rng.uniform(0.08, 0.30, n)
+
+    pedidos = pd.DataFrame({
+        "IDPEDIDO":            pd.Series(rng.permutation(n)).map("{:08x}".format),
+        "CLIENTE":             _variantes(nombres[cli], rng),
+        "FECHA DE PEDIDO":     pedido.strftime("%d/%m/%Y"),
+        "FECHA FACTURA VENTA": factura.strftime("%d/%m/%Y"),
+        "LITROS REALES":       pd.Series(litros).map("{:,.2f}".format),
+        "UTILIDAD":            np.round(litros * margen, 2),
+        "MONTO":               np.round(litros * 22.0, 2),
+        "COSTO":               np.round(litros * 20.0, 2),
+    })
+
+    # cancelaciones: más probables en los clientes chicos (cola de la Zipf)
+    m = int(n * FRAC_CANCEL)
+    p_cancel = np.sqrt(pesos[::-1]); p_cancel /= p_cancel.sum()
+    c_cli = rng.choice(len(nombres), m, p=p_cancel)
+    fecha = _fechas(dias, m, rng, desde)
+    cant  = np.round(rng.uniform(5_000, 40_000, m), 2)
+    monto = np.round(cant * 19.13, 2)
+    cancelados = pd.DataFrame({
+        "fac_venta": np.arange(10_000, 10_000 + m), "fecha_fac": fecha.strftime("%Y-%m-%d"),
+        "status": "Cancelada", "total_fac": monto, "cve_factu": "E", "cant_surt": cant,
+        "nom_fac": "DIS", "cliente": _variantes(nombres[c_cli], rng),
+        "producto": rng.choice(["GASOLINA REGULAR", "GASOLINA PREMIUM", "DIESEL"], m),
+        "fac_compra": rng.integers(300_000, 400_000, m), "vendedor": "VENDEDOR",
+        "DIS": rng.integers(10_000, 20_000, m), "iva": 16.0, "mes numero": fecha.month,
+        "mes": fecha.month_name(), "semana": "SEMANA " + ((fecha.day - 1) // 7 + 1).astype(str),
+        "mes_concatenado": "", "no_nota": "NULL", "fecha_nota": "NULL", "tot_nota": "NULL",
+        "cantidad": "NULL", "no_estado": "NULL", "Monto Total": monto, "Litros Reales": cant,
+    })
+
+    return pedidos, cancelados, desde, hasta
+
+def escribir(carpeta, n, semilla=0, **kw):
+    """Escribe Pedidos.csv y PedidosCancelados.csv en `carpeta`; devuelve (rutas, desde_dt, hasta_dt)."""
+    carpeta = Path(carpeta)
+    carpeta.mkdir(parents=True, exist_ok=True)
+    pedidos, cancelados, desde_dt, hasta_dt = generar(n, semilla, **kw)
+    rutas = carpeta / "Pedidos.csv", carpeta / "PedidosCancelados.csv"
+    pedidos.to_csv(rutas[0], index=False)
+    cancelados.to_csv(rutas[1], index=False)
+    return rutas, desde_dt, hasta_dt
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Pedidos / cancelaciones sintéticos")
+    ap.add_argument("n", type=int, help="número de pedidos")
+    ap.add_argument("--semilla", type=int, default=0)
+    ap.add_argument("--carpeta", default="csv_sintetico")
+    args = ap.parse_args()
+
+    rutas, desde_dt, hasta_dt = escribir(args.carpeta, args.n, args.semilla)
+    print(f"✓ {args.n} pedidos del {desde_dt:%d/%m/%Y} al {hasta_dt:%d/%m/%Y} → "
+          + ", ".join(str(r) for r in rutas))
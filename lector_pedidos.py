@@ -0,0 +1,135 @@
+# -------------------------------------------------------------------
+# Lectura por bloques de Pedidos.csv / PedidosCancelados.csv
+#
+# Para historiales grandes: en lugar de cargar el archivo completo con
+# low_memory=False, se lee en bloques de CHUNK filas con sólo las
+# columnas necesarias (usecols) y dtype explícito (texto), se parsea la
+# fecha y se filtra el rango bloque por bloque. Las etapas agregan por
+# bloque (litros por cliente, cancelaciones, utilidad mensual) y la
+# memoria queda acotada por el tamaño del bloque y el de los agregados.
+#
+# Es además el único lugar donde se tipan: ESQUEMA_PEDIDOS y
+# ESQUEMA_CANCELADOS declaran el formato de cada fecha y qué columnas son
+# numéricas; tipar() las parsea una sola vez (sin deducir formatos fila a
+# fila) y las etapas reciben el frame ya tipado. cargar_pedidos() /
+# cargar_cancelados() leen el archivo completo así.
+#
+# La lectura por bloques siempre va sobre el texto, para que la memoria
+# quede acotada por `chunksize` sea cual sea el tamaño del archivo. Las
+# lecturas completas (cargar_*) pasan por la cache binaria
+# (subcarpeta/cache_csv); leer_csv se re-exporta para que los demás
+# scripts lean sus CSV por ahí.
+# -------------------------------------------------------------------
+
+import sys
+import pandas as pd
+from pathlib import Path
+from pandas.api.types import is_numeric_dtype, is_datetime64_any_dtype
+
+# la cache binaria de CSV vive en el paquete de la app
+sys.path.insert(0, str(Path(__file__).resolve().parent / "TSO INTERSEMESTRAL"))
+from subcarpeta.cache_csv import leer_csv
+
+CHUNK     = 200_000             # filas por bloque
+FMT_FECHA = "%d/%m/%Y"
+VERSION   = 1                   # de tipar() / limpiar_num(); súbase al cambiarlas (llave de la cache)
+
+PEDIDOS_CSV    = Path("csv") / "Pedidos.csv"
+CANCELADOS_CSV = Path("csv") / "PedidosCancelados.csv"
+
+# ---------------- esquemas declarados -------------------------------
+# fechas: columna → formato ; numericas: texto con $ , … → float
+# (el resto de las columnas se queda como texto)
+ESQUEMA_PEDIDOS = {
+    "fechas":    {'FECHA FACTURA VENTA': FMT_FECHA,
+                  'FECHA DE PEDIDO':     FMT_FECHA,
+                  'FECHA DE ENTREGA':    FMT_FECHA},
+    "numericas": ['LITROS REALES', 'UTILIDAD', 'MONTO', 'COSTO'],
+}
+ESQUEMA_CANCELADOS = {
+    "fechas":    {'fecha_fac': "%Y-%m-%d"},
+    "numericas": ['total_fac', 'cant_surt', 'Monto Total', 'Litros Reales'],
+}
+
+def encabezado(ruta):
+    return list(pd.read_csv(ruta, nrows=0).columns)
+
+def limpiar_num(serie):
+    """Texto con $ , espacios… → float (vacío / inválido → 0). Si ya es numérica sólo rellena."""
+    if is_numeric_dtype(serie):
+        return serie.astype(float).fillna(0.0)
+    return pd.to_numeric(serie.astype(str).str.replace(r'[^0-9.\-]', '', regex=True),
+                         errors='coerce').fillna(0.0)
+
+def tipar(df, esquema=ESQUEMA_PEDIDOS):
+    """
+    Copia de `df` con las fechas del esquema parseadas con su formato y
+    las numéricas como float limpio. Lo que ya viene tipado no se vuelve
+    a parsear, así que las etapas pueden llamarla sobre lo que reciban.
+    """
+    tipadas = {}
+    for col, formato in esquema["fechas"].items():
+        if col in df.columns and not is_datetime64_any_dtype(df[col]):
+            tipadas[col] = pd.to_datetime(df[col], format=formato, errors='coerce')
+    for col in esquema["numericas"]:
+        if col in df.columns:
+            tipadas[col] = limpiar_num(df[col])
+    return df.assign(**tipadas)
+
+def _bloques(ruta, cols, esquema, chunksize):
+    """Bloques de `chunksize` filas leídos del texto y tipados uno por uno."""
+    for parte in pd.read_csv(ruta, usecols=cols, dtype=str, chunksize=chunksize):
+        yield tipar(parte, esquema)
+
+def leer_por_partes(ruta, usecols, col_fecha=None, desde_dt=None, hasta_dt=None,
+                    esquema=ESQUEMA_PEDIDOS, chunksize=CHUNK):
+    """
+    Itera sobre bloques de `ruta` ya filtrados al rango [desde_dt, hasta_dt]
+    sobre `col_fecha`. Las columnas de `usecols` que no existan en el
+    archivo se ignoran; las del `esquema` llegan tipadas y el resto como
+    texto. Los bloques que quedan vacíos tras el filtro no se entregan.
+    """
+    cols = [c for c in encabezado(ruta) if c in set(usecols)]
+    for parte in _bloques(ruta, cols, esquema, chunksize):
+        if col_fecha and desde_dt:
+            parte = parte[parte[col_fecha] >= desde_dt]
+        if col_fecha and hasta_dt:
+            parte = parte[parte[col_fecha] <= hasta_dt]
+        if not parte.empty:
+            yield parte
+
+def leer_rango(ruta, usecols, col_fecha=None, desde_dt=None, hasta_dt=None, **kw):
+    """Concatena los bloques filtrados (el resultado ocupa lo que ocupa el rango)."""
+    partes = list(leer_por_partes(ruta, usecols, col_fecha, desde_dt, hasta_dt, **kw))
+    if not partes:
+        return pd.DataFrame(columns=[c for c in encabezado(ruta) if c in set(usecols)])
+    return pd.concat(partes, ignore_index=True)
+
+def cargar_pedidos(ruta=PEDIDOS_CSV, usecols=None):
+    """Pedidos.csv completo y tipado según ESQUEMA_PEDIDOS (vía cache binaria)."""
+    return leer_csv(ruta, preparar=tipar, variante=(VERSION, repr(ESQUEMA_PEDIDOS)),
+                    usecols=usecols, dtype=str)
+
+def cargar_cancelados(ruta=CANCELADOS_CSV, usecols=None):
+    """PedidosCancelados.csv completo y tipado según ESQUEMA_CANCELADOS."""
+    return leer_csv(ruta, preparar=lambda d: tipar(d, ESQUEMA_CANCELADOS),
+                    variante=(VERSION, repr(ESQUEMA_CANCELADOS)), usecols=usecols, dtype=str)
+
+class Acumulador:
+    """
+    Suma agregados por clave a lo largo de los bloques y conserva el
+    orden de primera aparición de las claves (como pd.unique).
+    """
+    def __init__(self):
+        self.total = None
+        self.orden = {}
+
+    def agregar(self, agregado, claves=None):
+        """`agregado`: Series/DataFrame indexado por clave; `claves`: en orden de aparición."""
+        self.orden.update(dict.fromkeys(agregado.index if claves is None else claves))
+        self.total = agregado if self.total is None else self.total.add(agregado, fill_value=0)
+
+    def resultado(self):
+        if self.total is None:
+            return pd.Series(dtype=float)
+        return self.total.reindex(list(self.orden))
@@ -8,100 +8,86 @@
 # 5. Devuelve CSV mínimo con VALOR 3 / 2 / 1
 # -------------------------------------------------------------
 
-import pandas as pd, re
+import pandas as pd, numpy as np, re
 from pathlib import Path
 from datetime import datetime
 
+from lector_pedidos import leer_rango, leer_csv, tipar
+
 CSV_DIR      = Path('csv')
 PEDIDOS_CSV  = CSV_DIR / 'Pedidos.csv'
-
-# ---------- localizar archivo de prioridades -----------------
-prior_csv = next(CSV_DIR.glob('prioridad_clientes*_A_*.csv'))
-
-# ---------- rango de fechas ----------------------------------
-m = re.search(r'_(\d{4}-\d{2}-\d{2})_A_(\d{4}-\d{2}-\d{2})', prior_csv.stem, re.I)
-desde_dt, hasta_dt = map(datetime.fromisoformat, m.groups())
-
-# ---------- mapa de prioridades históricas (1/2/3) ----------
-hist_prio = pd.read_csv(prior_csv).set_index('CLIENTE')['Prioridad']
-
-# ---------- cargar Pedidos -----------------------------------
-df = pd.read_csv(PEDIDOS_CSV, low_memory=False)
-df['FECHA DE PEDIDO'] = pd.to_datetime(df['FECHA DE PEDIDO'],
-                                       format='%d/%m/%Y', errors='coerce')
-
-# filtrar rango global
-df = df[(df['FECHA DE PEDIDO'] >= desde_dt) & (df['FECHA DE PEDIDO'] <= hasta_dt)]
-
-# ---------- prioridad trimestral previa (> 2.5 M) -------------
-if 'FECHA FACTURA VENTA' in df.columns:
-    df['FECHA FACTURA VENTA'] = pd.to_datetime(df['FECHA FACTURA VENTA'],
-                                               format='%d/%m/%Y', errors='coerce')
-    df['ANIO'] = df['FECHA FACTURA VENTA'].dt.year
-    df['TRIM'] = df['FECHA FACTURA VENTA'].dt.month.sub(1).floordiv(3).add(1)
-    df['PERIODO'] = df['ANIO'].astype(str) + '-' + df['TRIM'].astype(str)
-
-    litros_trim = (df.groupby(['CLIENTE', 'PERIODO'])['LITROS REALES']
-                     .sum()
-                     .reset_index())
-
-    # convertir a numérico antes de construir el diccionario
-    litros_trim['LITROS REALES'] = pd.to_numeric(litros_trim['LITROS REALES'],
-                                                 errors='coerce').fillna(0)
-
-    litros_trim['PERIODO_VAL'] = litros_trim['PERIODO'].apply(
-        lambda p: int(p.split('-')[0]) * 10 + int(p.split('-')[1]))
-
-    litros_dict = {
-        (r['CLIENTE'], r['PERIODO_VAL']): r['LITROS REALES']
-        for _, r in litros_trim.iterrows()
-    }
-
-    # función prioridad trimestral
-    def prio_trim(cliente, periodo_val):
-        prev = litros_dict.get((cliente, periodo_val - 1), 0)
-        return 1 if prev > 2_500_000 else 2
-
-    df['PERIODO_VAL'] = (df['ANIO'].astype(int) * 10 + df['TRIM'].astype(int))
-    df['PRIO_TRIM'] = df.apply(
-        lambda r: prio_trim(r['CLIENTE'], r['PERIODO_VAL']),
-        axis=1)
-else:
-    df['PRIO_TRIM'] = 2
-
-# ---------- combinar reglas -----------------------------------
-def prioridad_final(cliente, prio_trim):
-    hist = hist_prio.get(cliente, 2)
-    if hist == 1 or prio_trim == 1:
-        return 1
-    if hist == 3:
-        return 3
-    return 2
-
-df['PRIORIDAD'] = df.apply(
-    lambda r: prioridad_final(r['CLIENTE'], r['PRIO_TRIM']),
-    axis=1)
-
-# ---------- limpiar litros y utilidad -------------------------------
-df['LITROS'] = pd.to_numeric(
-    df['LITROS REALES'].astype(str).replace(r'[^0-9.\-]', '', regex=True),
-    errors='coerce').fillna(0)
-
-df['UTILIDAD'] = pd.to_numeric(
-    df.get('UTILIDAD', 0).astype(str).replace(r'[^0-9.\-]', '', regex=True),
-    errors='coerce').fillna(0)
-
-df['VALOR']  = df['PRIORIDAD'].map({1:3, 2:2, 3:1})
-df['ID']     = df.get('IDPEDIDO', df.get('PEDIDO', range(len(df))))
-df['FECHA']  = df['FECHA DE PEDIDO']
-
-# ---------- exportar -------------------------------------------------
-out_cols = ['ID', 'CLIENTE', 'FECHA', 'LITROS',
-               'PRIORIDAD', 'VALOR', 'UTILIDAD']   # ← añadida
-
-clean_df = df[out_cols]
-sufijo   = f"{desde_dt:%Y-%m-%d}_A_{hasta_dt:%Y-%m-%d}"
-outfile  = CSV_DIR / f'pedidos_limpios_{sufijo}.csv'
-clean_df.to_csv(outfile, index=False)
-
-print(f"✔ pedidos_limpios_{sufijo}.csv  ({len(clean_df)} filas)")
+COLS_PEDIDOS = ['FECHA DE PEDIDO', 'FECHA FACTURA VENTA', 'CLIENTE',
+                'LITROS REALES', 'UTILIDAD', 'IDPEDIDO', 'PEDIDO']
+OUT_COLS     = ['ID', 'CLIENTE', 'FECHA', 'LITROS',
+                'PRIORIDAD', 'VALOR', 'UTILIDAD']   # ← añadida
+
+def rango_prioridades(csv_dir=CSV_DIR):
+    """Localiza prioridad_clientes_<rango>.csv → (ruta, desde_dt, hasta_dt)."""
+    prior_csv = next(csv_dir.glob('prioridad_clientes*_A_*.csv'))
+    m = re.search(r'_(\d{4}-\d{2}-\d{2})_A_(\d{4}-\d{2}-\d{2})', prior_csv.stem, re.I)
+    desde_dt, hasta_dt = map(datetime.fromisoformat, m.groups())
+    return prior_csv, desde_dt, hasta_dt
+
+def limpiar_pedidos(pedidos_df, hist_prio, desde_dt, hasta_dt):
+    """
+    Pedidos del rango con PRIORIDAD final y VALOR 3/2/1.
+    `hist_prio` es la serie CLIENTE → Prioridad de prioridad_cliente.
+    No modifica `pedidos_df` (crudo o ya tipado con lector_pedidos).
+    """
+    df = tipar(pedidos_df)
+
+    # filtrar rango global
+    df = df[(df['FECHA DE PEDIDO'] >= desde_dt) & (df['FECHA DE PEDIDO'] <= hasta_dt)]
+
+    # ---------- litros y utilidad (ya limpios por tipar) ----------------
+    df['LITROS'] = df['LITROS REALES']
+    if 'UTILIDAD' not in df.columns:
+        df['UTILIDAD'] = 0.0
+
+    cliente, nombres = pd.factorize(df['CLIENTE'])           # NaN → -1
+
+    # ---------- prioridad trimestral previa (> 2.5 M) -------------
+    # llave entera cliente·10⁵ + PERIODO_VAL (año·10 + trimestre): se suman
+    # litros por llave y cada pedido busca la de su PERIODO_VAL - 1
+    if 'FECHA FACTURA VENTA' in df.columns:
+        fac = df['FECHA FACTURA VENTA']
+        periodo_val = (fac.dt.year * 10 + (fac.dt.month - 1) // 3 + 1).to_numpy()
+        valida = (cliente >= 0) & ~np.isnan(periodo_val)
+        llave  = np.where(valida, cliente * 100_000 + np.nan_to_num(periodo_val), -1).astype(np.int64)
+
+        litros_trim = df['LITROS'][valida].groupby(llave[valida]).sum()
+        pos    = litros_trim.index.get_indexer(llave - 1)
+        previo = np.where(valida & (pos >= 0), litros_trim.to_numpy()[pos], 0)
+        prio_trim = np.where(previo > 2_500_000, 1, 2)
+    else:
+        prio_trim = np.full(len(df), 2)
+
+    # ---------- combinar reglas -----------------------------------
+    # histórica 1 o trimestral 1 → 1 ; histórica 3 → 3 ; resto → 2
+    # (histórica por nombre distinto; el código -1 cae en el 2 agregado al final)
+    hist = np.append(hist_prio.reindex(nombres).fillna(2).to_numpy(), 2)[cliente]
+    df['PRIORIDAD'] = np.where((hist == 1) | (prio_trim == 1), 1,
+                               np.where(hist == 3, 3, 2))
+
+    df['VALOR']  = df['PRIORIDAD'].map({1:3, 2:2, 3:1})
+    df['ID']     = df.get('IDPEDIDO', df.get('PEDIDO', range(len(df))))
+    df['FECHA']  = df['FECHA DE PEDIDO']
+    return df[OUT_COLS]
+
+if __name__ == "__main__":
+    # ---------- localizar archivo de prioridades y rango ----------
+    prior_csv, desde_dt, hasta_dt = rango_prioridades()
+
+    # ---------- mapa de prioridades históricas (1/2/3) ----------
+    hist_prio = leer_csv(prior_csv).set_index('CLIENTE')['Prioridad']
+
+    # ---------- cargar Pedidos (por bloques, sólo el rango) y limpiar ----
+    pedidos = leer_rango(PEDIDOS_CSV, COLS_PEDIDOS, 'FECHA DE PEDIDO', desde_dt, hasta_dt)
+    clean_df = limpiar_pedidos(pedidos, hist_prio, desde_dt, hasta_dt)
+
+    # ---------- exportar -------------------------------------------------
+    sufijo   = f"{desde_dt:%Y-%m-%d}_A_{hasta_dt:%Y-%m-%d}"
+    outfile  = CSV_DIR / f'pedidos_limpios_{sufijo}.csv'
+    clean_df.to_csv(outfile, index=False)
+
+    print(f"✔ pedidos_limpios_{sufijo}.csv  ({len(clean_df)} filas)")
@@ -0,0 +1,138 @@
+# -------------------------------------------------------------------
+# Pipeline completo en memoria:
+#   prioridad_cliente → limpiar_datos → algoritmo_mochila →
+#   programacion_final → utilidad_posterior / utilidad_previa →
+#   resultados (+ validador_final)
+#
+# Cada etapa recibe y devuelve DataFrames; Pedidos.csv y
+# PedidosCancelados.csv se leen y tipan una sola vez (lector_pedidos) y
+# no se re-parsea ningún CSV intermedio ni ninguna columna. Escribir
+# los CSV de siempre es opcional (exportar).
+#
+# Cada etapa se mide con subcarpeta.metricas (tiempo, pico de memoria y
+# una fila por día de mochila); al exportar, el resumen de la corrida
+# queda en metricas_<rango>.json junto a los CSV.
+#
+# Uso:
+#   python pipeline.py 01/12/2024 31/05/2025            → corre y exporta a csv/
+#   python pipeline.py 01/12/2024 31/05/2025 --sin-csv  → sólo en memoria
+#
+# Desde código:
+#   res = pipeline.correr(pedidos_df, cancelados_df, desde_dt, hasta_dt)
+#   res["programacion"], res["utilidad_final"], …
+# y, para tener también el resumen de métricas:
+#   with metricas.corrida("pipeline") as c:
+#       res = pipeline.correr(…)
+# -------------------------------------------------------------------
+
+import sys
+import pandas as pd
+from pathlib import Path
+from datetime import datetime
+
+from prioridad_cliente import calcular_prioridades, ask_date, FMT
+from limpiar_datos import limpiar_pedidos
+from algoritmo_mochila import programar
+from programacion_final import detallar
+from utilidad_posterior import utilidad_posterior
+from utilidad_previa import utilidad_previa
+from resultados import comparar
+from validador_final import validar, infracciones
+from lector_pedidos import cargar_pedidos, cargar_cancelados
+from subcarpeta import metricas
+
+CSV_DIR         = Path("csv")
+PEDIDOS_CSV     = CSV_DIR / "Pedidos.csv"
+CANCELADOS_CSV  = CSV_DIR / "PedidosCancelados.csv"
+
+def correr(pedidos_df, cancelados_df, desde_dt, hasta_dt, exportar_a=None):
+    """
+    Corre todas las etapas sobre los DataFrames crudos y devuelve un dict
+    con el resultado de cada una. Si `exportar_a` es una carpeta, además
+    escribe los CSV con los nombres que usan los scripts sueltos y, si
+    hay una metricas.corrida() abierta (la de __main__), su resumen.
+    """
+    with metricas.etapa("prioridad"):
+        prioridades = calcular_prioridades(pedidos_df, cancelados_df, desde_dt, hasta_dt)
+        prio_map    = prioridades.set_index("CLIENTE")["Prioridad"]
+
+    with metricas.etapa("limpieza"):
+        limpios = limpiar_pedidos(pedidos_df, prio_map, desde_dt, hasta_dt)
+    programacion, pipas = programar(limpios, prio_map, desde_dt)   # fragmentacion + mochila
+    with metricas.etapa("pipas"):
+        detallada, _    = detallar(programacion, desde_dt, hasta_dt)
+
+    with metricas.etapa("utilidad"):
+        previa    = utilidad_previa(pedidos_df, desde_dt, hasta_dt)
+        posterior = utilidad_posterior(programacion, desde_dt, hasta_dt)
+        final     = comparar(previa, posterior)
+
+    with metricas.etapa("validacion"):
+        validacion = validar(programacion)
+        infr       = infracciones(programacion, limpios, pipas=pipas)
+
+    res = {
+        "prioridades":      prioridades,
+        "pedidos_limpios":  limpios,
+        "programacion":     programacion,
+        "pipas_rentadas":   pipas,
+        "detallada":        detallada,
+        "utilidad_previa":  previa,
+        "utilidad_posterior": posterior,
+        "utilidad_final":   final,
+        "validacion":       validacion,
+        "infracciones":     infr,
+    }
+    if exportar_a is not None:
+        with metricas.etapa("exportar"):
+            exportar(res, desde_dt, hasta_dt, Path(exportar_a))
+        corrida = metricas.actual()
+        if corrida is not None:
+            corrida.extra.update(desde=f"{desde_dt:%Y-%m-%d}", hasta=f"{hasta_dt:%Y-%m-%d}",
+                                 pedidos=len(pedidos_df), fragmentos=len(programacion))
+            suf = f"{desde_dt:%Y-%m-%d}_A_{hasta_dt:%Y-%m-%d}"
+            corrida.guardar(Path(exportar_a) / f"metricas_{suf}.json")
+    return res
+
+def exportar(res, desde_dt, hasta_dt, csv_dir=CSV_DIR):
+    """Sink opcional: los mismos CSV que deja la cadena de scripts."""
+    suf  = f"{desde_dt:%Y-%m-%d}_A_{hasta_dt:%Y-%m-%d}"
+    prog = res["programacion"]
+    res["prioridades"].to_csv(csv_dir / f"prioridad_clientes_{suf}.csv", index=False)
+    res["pedidos_limpios"].to_csv(csv_dir / f"pedidos_limpios_{suf}.csv", index=False)
+    prog.to_csv(csv_dir / f"programacion_{suf}.csv", index=False)
+    prog[pd.isna(prog["FECHA_ASIGNADA"])].to_csv(csv_dir / f"pendientes_{suf}.csv", index=False)
+    res["detallada"].to_csv(csv_dir / f"programacion_detallada_{suf}.csv", index=False)
+    res["utilidad_previa"].to_csv(csv_dir / f"utilidad_previa_{suf}.csv", index=False, float_format="%.6f")
+    res["utilidad_posterior"].to_csv(csv_dir / f"utilidad_posterior_{suf}.csv", index=False)
+    res["utilidad_final"].to_csv(csv_dir / f"utilidad_final_{suf}.csv", index=False, float_format="%.6f")
+    res["validacion"].to_csv(csv_dir / f"validador_diario_programacion_{suf}.csv", index=False)
+    res["infracciones"].to_csv(csv_dir / f"validador_infracciones_programacion_{suf}.csv", index=False)
+
+if __name__ == "__main__":
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    if len(args) == 2:
+        try:
+            desde_dt, hasta_dt = (datetime.strptime(a, FMT) for a in args)
+        except ValueError:
+            sys.exit("Formato incorrecto. Use dd/mm/yyyy, p. ej. 03/01/2024")
+    else:
+        desde_dt = ask_date("Fecha DESDE (dd/mm/yyyy): ")
+        hasta_dt = ask_date("Fecha HASTA (dd/mm/yyyy): ")
+    if not (desde_dt and hasta_dt):
+        sys.exit("El pipeline necesita rango DESDE y HASTA.")
+
+    with metricas.corrida("pipeline") as corrida:      # lectura + etapas en el mismo resumen
+        print("→ Cargando CSV…")
+        with metricas.etapa("lectura"):
+            pedidos_df    = cargar_pedidos(PEDIDOS_CSV)
+            cancelados_df = cargar_cancelados(CANCELADOS_CSV)
+
+        res = correr(pedidos_df, cancelados_df, desde_dt, hasta_dt,
+                     exportar_a=None if "--sin-csv" in sys.argv else CSV_DIR)
+
+    print(f"✓ Fragmentos: {len(res['programacion'])}. "
+          f"Pipas rentadas: {sum(res['pipas_rentadas'].values())}. "
+          f"Infracciones: {len(res['infracciones'])}.")
+    print(res["utilidad_final"].to_string(index=False))
+    print("\nEtapas: " + " · ".join(f"{n} {e['segundos']:.2f}s" for n, e in corrida.etapas.items()))
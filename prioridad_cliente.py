@@ -24,112 +24,153 @@ import unicodedata, re
 from pathlib import Path
 from datetime import datetime
 
-print("\n=== Generador de Prioridades de Clientes ===\n")
-FMT = "%d/%m/%Y"
-
-def ask_date(prompt: str):
-    raw = input(prompt).strip()
-    if not raw:
-        return None
-    try:
-        return datetime.strptime(raw, FMT)
-    except ValueError:
-        raise SystemExit("Formato incorrecto. Use dd/mm/yyyy, p. ej. 03/01/2024")
+from lector_pedidos import (leer_por_partes, encabezado, limpiar_num, tipar, Acumulador, CHUNK,
+                            ESQUEMA_CANCELADOS)
 
-desde_dt = ask_date("Fecha DESDE (dd/mm/yyyy) o Enter para histórico: ")
-hasta_dt = ask_date("Fecha HASTA (dd/mm/yyyy) o Enter para hoy: ")
+FMT = "%d/%m/%Y"
 
 # ------------------------------ Archivos ------------------------------------
 PEDIDOS_FILE    = Path('csv/Pedidos.csv')
 CANCELADOS_FILE = Path('csv/PedidosCancelados.csv')
 
-print("\n→ Cargando CSV…")
-pedidos_df    = pd.read_csv(PEDIDOS_FILE,    low_memory=False)
-cancelados_df = pd.read_csv(CANCELADOS_FILE, low_memory=False)
-
 # ------------------------------ Helpers -------------------------------------
 normalize = lambda t: unicodedata.normalize('NFKD', str(t)).encode('ascii', 'ignore').decode().upper()
 clean_key = lambda t: re.sub(r'[^A-Z0-9]', '', normalize(t))
-num_clean  = lambda x: float(re.sub(r'[^0-9.\-]', '', str(x)) or 0)
 
-# ------------------------------ Fechas --------------------------------------
+def claves_cliente(nombres):
+    """
+    CLIENTE → CLIENTE_KEY categórico. clean_key corre una vez por nombre
+    distinto (factorize) y se reparte a las filas por código; las
+    categorías quedan en orden de primera aparición.
+    """
+    codigos, unicos = pd.factorize(nombres, use_na_sentinel=False)
+    por_nombre, categorias = pd.factorize(pd.Index([clean_key(u) for u in unicos], dtype=object))
+    return pd.Series(pd.Categorical.from_codes(por_nombre[codigos], categories=categorias),
+                     index=nombres.index, name='CLIENTE_KEY')
+
 FECHA_PEDIDOS_COLS = ['FECHA FACTURA VENTA', 'FECHA DE PEDIDO', 'FECHA DE ENTREGA']
-fecha_ped_col = next((c for c in FECHA_PEDIDOS_COLS if c in pedidos_df.columns), None)
-if not fecha_ped_col:
-    raise ValueError('No se encontró columna de fecha en Pedidos.csv')
-
-pedidos_df[fecha_ped_col] = pd.to_datetime(pedidos_df[fecha_ped_col], errors='coerce')
-cancelados_df['fecha_fac'] = pd.to_datetime(cancelados_df['fecha_fac'], errors='coerce')
-
-if desde_dt:
-    pedidos_df    = pedidos_df[pedidos_df[fecha_ped_col] >= desde_dt]
-    cancelados_df = cancelados_df[cancelados_df['fecha_fac'] >= desde_dt]
-if hasta_dt:
-    pedidos_df    = pedidos_df[pedidos_df[fecha_ped_col] <= hasta_dt]
-    cancelados_df = cancelados_df[cancelados_df['fecha_fac'] <= hasta_dt]
-
-# ------------------------------ Claves --------------------------------------
-pedidos_df['CLIENTE_KEY']    = pedidos_df['CLIENTE'].apply(clean_key)
-cancelados_df['CLIENTE_KEY'] = cancelados_df['cliente'].apply(clean_key)
-
-# ------------------------------ Litros facturados ---------------------------
-col_litros = next((c for c in pedidos_df.columns if all(k in clean_key(c) for k in ['LITROS', 'FACT'])), None) or 'LITROS REALES'
-print(f"→ Columna de litros utilizada: {col_litros}")
-
-pedidos_df[col_litros] = pedidos_df[col_litros].apply(num_clean)
-
-litros_por_cliente = (
-    pedidos_df.groupby('CLIENTE_KEY', as_index=False)[col_litros]
-    .sum()
-    .rename(columns={col_litros: 'LitrosFacturados'})
-)
-
-cancelaciones_por_cliente = (
-    cancelados_df.groupby('CLIENTE_KEY').size().reset_index(name='Cancelaciones')
-)
-
-# ------------------------------ Unión ---------------------------------------
-all_keys = pd.DataFrame({'CLIENTE_KEY': pd.unique(
-    pd.concat([pedidos_df['CLIENTE_KEY'], cancelados_df['CLIENTE_KEY']])
-)})
-
-clientes_df = (
-    all_keys
-    .merge(litros_por_cliente,       on='CLIENTE_KEY', how='left')
-    .merge(cancelaciones_por_cliente, on='CLIENTE_KEY', how='left')
-)
-
-# Sustituir NaN: numéricos → 0 ; texto → ""
-clientes_df['LitrosFacturados'] = clientes_df['LitrosFacturados'].fillna(0).astype(float)
-clientes_df['Cancelaciones']    = clientes_df['Cancelaciones'].fillna(0).astype(int)
-
-# ------------------------------ Prioridad -----------------------------------
-clientes_df['Prioridad'] = 2
-clientes_df.loc[clientes_df['LitrosFacturados'] >= 5_000_000, 'Prioridad'] = 1
-mask_p3 = (clientes_df['Prioridad'] != 1) & (clientes_df['Cancelaciones'] > 5)
-clientes_df.loc[mask_p3, 'Prioridad'] = 3
-
-# ------------------------------ Nombre original -----------------------------
-map_orig = (
-    pedidos_df[['CLIENTE_KEY', 'CLIENTE']].drop_duplicates('CLIENTE_KEY')
-    .set_index('CLIENTE_KEY')['CLIENTE']
-)
-clientes_df['CLIENTE'] = clientes_df['CLIENTE_KEY'].map(map_orig).fillna(clientes_df['CLIENTE_KEY'])
-
-# ------------------------------ Exportar ------------------------------------
-# Construir nombre de archivo según rango
-if desde_dt and hasta_dt:
-    file_name = f"prioridad_clientes_{desde_dt.strftime('%Y-%m-%d')}_A_{hasta_dt.strftime('%Y-%m-%d')}.csv"
-elif desde_dt and not hasta_dt:
-    file_name = f"prioridad_clientes_desde_{desde_dt.strftime('%Y-%m-%d')}.csv"
-elif hasta_dt and not desde_dt:
-    file_name = f"prioridad_clientes_hasta_{hasta_dt.strftime('%Y-%m-%d')}.csv"
-else:
-    file_name = "prioridad_clientes.csv"
-
-OUTPUT_FILE = Path(file_name)
-
-out_cols = ['CLIENTE', 'LitrosFacturados', 'Cancelaciones', 'Prioridad']
-clientes_df[out_cols].to_csv(OUTPUT_FILE, index=False)
-
-print(f"\n✔ CSV generado sin NaN: {OUTPUT_FILE}  ({len(clientes_df)} clientes)")
+OUT_COLS           = ['CLIENTE', 'LitrosFacturados', 'Cancelaciones', 'Prioridad']
+
+def ask_date(prompt: str):
+    raw = input(prompt).strip()
+    if not raw:
+        return None
+    try:
+        return datetime.strptime(raw, FMT)
+    except ValueError:
+        raise SystemExit("Formato incorrecto. Use dd/mm/yyyy, p. ej. 03/01/2024")
+
+def _columnas(columnas):
+    """(columna de fecha, columna de litros) según el encabezado de Pedidos."""
+    fecha_ped_col = next((c for c in FECHA_PEDIDOS_COLS if c in columnas), None)
+    if not fecha_ped_col:
+        raise ValueError('No se encontró columna de fecha en Pedidos.csv')
+    col_litros = next((c for c in columnas if all(k in clean_key(c) for k in ['LITROS', 'FACT'])), None) or 'LITROS REALES'
+    print(f"→ Columna de litros utilizada: {col_litros}")
+    return fecha_ped_col, col_litros
+
+def _clasificar(claves, litros, cancelaciones, map_orig):
+    """
+    Regla de prioridad sobre los agregados por CLIENTE_KEY (Series
+    indexadas por clave); `claves` en orden de primera aparición.
+    """
+    clientes_df = pd.DataFrame({'CLIENTE_KEY': claves})
+    clientes_df['LitrosFacturados'] = clientes_df['CLIENTE_KEY'].map(litros)
+    clientes_df['Cancelaciones']    = clientes_df['CLIENTE_KEY'].map(cancelaciones)
+
+    # Sustituir NaN: numéricos → 0 ; texto → ""
+    clientes_df['LitrosFacturados'] = clientes_df['LitrosFacturados'].fillna(0).astype(float)
+    clientes_df['Cancelaciones']    = clientes_df['Cancelaciones'].fillna(0).astype(int)
+
+    # ------------------------------ Prioridad -------------------------------
+    clientes_df['Prioridad'] = 2
+    clientes_df.loc[clientes_df['LitrosFacturados'] >= 5_000_000, 'Prioridad'] = 1
+    mask_p3 = (clientes_df['Prioridad'] != 1) & (clientes_df['Cancelaciones'] > 5)
+    clientes_df.loc[mask_p3, 'Prioridad'] = 3
+
+    # ------------------------------ Nombre original -------------------------
+    clientes_df['CLIENTE'] = clientes_df['CLIENTE_KEY'].map(map_orig).fillna(clientes_df['CLIENTE_KEY'])
+    return clientes_df[OUT_COLS]
+
+def calcular_prioridades(pedidos_df, cancelados_df, desde_dt=None, hasta_dt=None):
+    """
+    Ranking de clientes a partir de Pedidos y PedidosCancelados ya leídos
+    (crudos o tipados con lector_pedidos). No modifica los DataFrames de
+    entrada. Devuelve CLIENTE, LitrosFacturados, Cancelaciones, Prioridad.
+    """
+    # ------------------------------ Fechas ----------------------------------
+    pedidos_df    = tipar(pedidos_df)
+    cancelados_df = tipar(cancelados_df, ESQUEMA_CANCELADOS)
+    fecha_ped_col, col_litros = _columnas(pedidos_df.columns)
+
+    if desde_dt:
+        pedidos_df    = pedidos_df[pedidos_df[fecha_ped_col] >= desde_dt]
+        cancelados_df = cancelados_df[cancelados_df['fecha_fac'] >= desde_dt]
+    if hasta_dt:
+        pedidos_df    = pedidos_df[pedidos_df[fecha_ped_col] <= hasta_dt]
+        cancelados_df = cancelados_df[cancelados_df['fecha_fac'] <= hasta_dt]
+
+    # ------------------------------ Claves ----------------------------------
+    pedidos_df['CLIENTE_KEY']    = claves_cliente(pedidos_df['CLIENTE'])
+    cancelados_df['CLIENTE_KEY'] = claves_cliente(cancelados_df['cliente'])
+
+    # ------------------------------ Agregados -------------------------------
+    pedidos_df[col_litros] = limpiar_num(pedidos_df[col_litros])
+    litros        = pedidos_df.groupby('CLIENTE_KEY', observed=True)[col_litros].sum()
+    cancelaciones = cancelados_df.groupby('CLIENTE_KEY', observed=True).size()
+
+    claves   = list(dict.fromkeys([*pedidos_df['CLIENTE_KEY'].cat.categories,
+                                   *cancelados_df['CLIENTE_KEY'].cat.categories]))
+    map_orig = pedidos_df.drop_duplicates('CLIENTE_KEY').set_index('CLIENTE_KEY')['CLIENTE']
+    return _clasificar(claves, litros, cancelaciones, map_orig)
+
+def prioridades_por_partes(pedidos_csv=PEDIDOS_FILE, cancelados_csv=CANCELADOS_FILE,
+                           desde_dt=None, hasta_dt=None, chunksize=CHUNK):
+    """
+    Igual que calcular_prioridades() pero leyendo los CSV por bloques:
+    sólo CLIENTE, fecha y litros, filtrando el rango al leer y sumando
+    litros / cancelaciones por cliente bloque a bloque.
+    """
+    fecha_ped_col, col_litros = _columnas(encabezado(pedidos_csv))
+
+    litros, map_orig = Acumulador(), {}
+    for parte in leer_por_partes(pedidos_csv, ['CLIENTE', fecha_ped_col, col_litros],
+                                 fecha_ped_col, desde_dt, hasta_dt, chunksize=chunksize):
+        clave = claves_cliente(parte['CLIENTE'])
+        litros.agregar(limpiar_num(parte[col_litros]).groupby(clave, observed=True).sum(), clave.cat.categories)
+        primeros = pd.DataFrame({'k': clave, 'c': parte['CLIENTE']}).drop_duplicates('k')
+        for k, c in zip(primeros['k'], primeros['c']):
+            map_orig.setdefault(k, c)
+
+    cancelaciones = Acumulador()
+    for parte in leer_por_partes(cancelados_csv, ['cliente', 'fecha_fac'],
+                                 'fecha_fac', desde_dt, hasta_dt, ESQUEMA_CANCELADOS, chunksize):
+        clave = claves_cliente(parte['cliente'])
+        cancelaciones.agregar(clave.groupby(clave, observed=True).size(), clave.cat.categories)
+
+    claves = list(dict.fromkeys([*litros.orden, *cancelaciones.orden]))
+    return _clasificar(claves, litros.resultado(), cancelaciones.resultado(), pd.Series(map_orig, dtype=object))
+
+def nombre_salida(desde_dt=None, hasta_dt=None):
+    """Nombre de archivo según rango."""
+    if desde_dt and hasta_dt:
+        return f"prioridad_clientes_{desde_dt.strftime('%Y-%m-%d')}_A_{hasta_dt.strftime('%Y-%m-%d')}.csv"
+    if desde_dt:
+        return f"prioridad_clientes_desde_{desde_dt.strftime('%Y-%m-%d')}.csv"
+    if hasta_dt:
+        return f"prioridad_clientes_hasta_{hasta_dt.strftime('%Y-%m-%d')}.csv"
+    return "prioridad_clientes.csv"
+
+if __name__ == "__main__":
+    print("\n=== Generador de Prioridades de Clientes ===\n")
+    desde_dt = ask_date("Fecha DESDE (dd/mm/yyyy) o Enter para histórico: ")
+    hasta_dt = ask_date("Fecha HASTA (dd/mm/yyyy) o Enter para hoy: ")
+
+    print("\n→ Cargando CSV por bloques…")
+    clientes_df = prioridades_por_partes(PEDIDOS_FILE, CANCELADOS_FILE, desde_dt, hasta_dt)
+
+    # ------------------------------ Exportar --------------------------------
+    OUTPUT_FILE = Path(nombre_salida(desde_dt, hasta_dt))
+    clientes_df.to_csv(OUTPUT_FILE, index=False)
+
+    print(f"\n✔ CSV generado sin NaN: {OUTPUT_FILE}  ({len(clientes_df)} clientes)")
@@ -8,91 +8,208 @@
 # Parámetros de negocio:
 #   • CAP_PROPIA: litros/día propios
 #   • CAP_PIPA:   litros por pipa rentada
+#
+# Uso:
+#   python programacion_final.py          → carga secuencial (la de siempre)
+#   python programacion_final.py --ffd    → first-fit decreasing (menos rentadas)
 # -------------------------------------------------------------------
 
 import math
 import re
 import sys
+import numpy as np
 import pandas as pd
 from pathlib import Path
 from datetime import datetime
 
+from lector_pedidos import leer_csv
+
 # --- Parámetros de negocio ---
-CAP_PROPIA = 1_920_000    # litros propios/día
-CAP_PIPA   =    64_000    # litros por pipa rentada
-
-# --- Localizar archivo de programación ---
-CSV_DIR    = Path("csv")
-prog_files = sorted(CSV_DIR.glob("programacion_*.csv"))
-if not prog_files:
-    sys.exit("No se encontró ningún archivo programacion_<rango>.csv en la carpeta csv/")
-prog_file = prog_files[-1]
-print(f"Generando detalle desde: {prog_file.name}")
-
-# --- Extraer rango para el nombre de salida ---
-m = re.search(r'_(\d{4}-\d{2}-\d{2})_A_(\d{4}-\d{2}-\d{2})', prog_file.stem)
-if not m:
-    sys.exit("El nombre del archivo de programación no contiene un rango válido.")
-ini_dt, fin_dt = map(datetime.fromisoformat, m.groups())
-
-# --- Cargar datos ---
-df = pd.read_csv(prog_file, parse_dates=["FECHA_ASIGNADA", "FECHA", "FECHA_ENTREGA"])
-# Filtrar solo dentro del rango de asignación
-df = df[(df.FECHA_ASIGNADA >= ini_dt) & (df.FECHA_ASIGNADA <= fin_dt)]
-
-# --- Preparar estructuras ---
-pipas_por_dia = {}
-rows = []
-
-for fecha, grupo in df.groupby("FECHA_ASIGNADA"):
-    dia = fecha.date()
-    prop_usado = 0
-    total_dia  = grupo["LITROS"].sum()
-    extra      = max(0, total_dia - CAP_PROPIA)
-    rented_needed = math.ceil(extra / CAP_PIPA)
-    pipas_por_dia[dia] = rented_needed
-
-    # Orden greedy por prioridad y litros
-    ent = grupo.sort_values(["PRIORIDAD","LITROS"], ascending=[True,True])
-    rent_loaded = 0  # acumula litros en rentada
-
-    for _, p in ent.iterrows():
-        litros = p["LITROS"]
-        # Asignar a propia o rentada?
-        if prop_usado + litros <= CAP_PROPIA:
-            tipo = "PROPIA"
-            pid  = (prop_usado // (CAP_PROPIA // 30)) + 1
-            prop_usado += litros
-        else:
-            tipo = "RENTADA"
-            pid_index = rent_loaded // CAP_PIPA
-            pid       = 31 + pid_index
-            rent_loaded += litros
-
-        pid = int(pid)
-        pipa_id = f"PIP{pid:02d}"
-        litros_pipa = litros
-
-        rows.append({
-            "FechaAsignada":   dia,
-            "PedidoID":        p["ID"],
-            "Cliente":         p["CLIENTE"],
-            "Prioridad":       p["PRIORIDAD"],
-            "Valor":           p["VALOR"],
-            "TipoPipa":        tipo,
-            "PipaID":          pipa_id,
-            "Litros_Pipa":     litros_pipa,
-            "Litros_Rentados": p["LITROS_RENTADOS"],
-            "Ganancia_Ajust":  p.get("GANANCIA_AJUST", p.get("UTILIDAD", 0))
-        })
-
-# --- Guardar detalle ---
-det_df   = pd.DataFrame(rows)
-out_file = CSV_DIR / f"programacion_detallada_{ini_dt:%Y-%m-%d}_A_{fin_dt:%Y-%m-%d}.csv"
-det_df.to_csv(out_file, index=False)
-print(f"Cronograma detallado guardado en: {out_file}")
-
-# --- Resumen pipas rentadas por día ---
-print("\nPipas rentadas por día:")
-for dia, n in sorted(pipas_por_dia.items()):
-    print(f"{dia}: {n} pipas")
+CAP_PROPIA    = 1_920_000    # litros propios/día
+CAP_PIPA      =    64_000    # litros por pipa rentada
+PIPAS_PROPIAS = 30           # PIP01…PIP30; las rentadas siguen desde PIP31
+CSV_DIR       = Path("csv")
+
+# --- Modos de carga ---
+#   secuencial: la regla de siempre, orden (prioridad, litros ↑); cada
+#               pedido a propia si cabe en lo que queda del día, si no a
+#               rentada. Las rentadas del día son un estimado (ceil).
+#   ffd:        respeta qué rentó la mochila (LITROS_RENTADOS) y acomoda
+#               first-fit decreasing en pipas propias y rentadas de CAP_PIPA;
+#               las rentadas del día son las que de verdad se abren.
+MODOS    = ("secuencial", "ffd")
+DET_COLS = ["FechaAsignada", "PedidoID", "Cliente", "Prioridad", "Valor", "TipoPipa",
+            "PipaID", "Litros_Pipa", "Litros_Rentados", "Ganancia_Ajust"]
+
+def _carga_secuencial(dia, prio, litros, cap_propia, cap_pipa):
+    """
+    Regla secuencial para todos los días a la vez (arreglos ordenados por
+    día, prioridad y litros). Dentro de un (día, prioridad) los litros
+    van en orden creciente, así que los que caben en la capacidad propia
+    restante son un prefijo: basta una suma acumulada por bloque,
+    prioridad por prioridad. Devuelve (es_propia, número de pipa).
+    """
+    propia = np.zeros(len(litros), dtype=bool)
+    pipa   = np.zeros(len(litros))
+    usado  = np.zeros(dia.max() + 1)                    # litros propios por día
+
+    for p in np.unique(prio):
+        idx = np.flatnonzero(prio == p)
+        d   = dia[idx]
+        ini = np.r_[True, d[1:] != d[:-1]]              # primer pedido del día en el bloque
+
+        # lo ya usado del día entra como primer sumando: mismas sumas que el bucle
+        vals = litros[idx].copy()
+        vals[ini] += usado[d[ini]]
+        acum  = pd.Series(vals).groupby(d).cumsum().to_numpy()
+        antes = np.where(ini, usado[d], np.r_[0.0, acum[:-1]])
+        cabe  = acum <= cap_propia
+
+        propia[idx] = cabe
+        pipa[idx]   = antes // (cap_propia // PIPAS_PROPIAS) + 1
+        np.maximum.at(usado, d[cabe], acum[cabe])
+
+    # rentadas: litros rentados acumulados del día *antes* de cada pedido
+    rent  = pd.Series(np.where(propia, 0.0, litros))
+    acum  = rent.groupby(dia).cumsum()
+    antes = acum.groupby(dia).shift(fill_value=0.0).to_numpy()
+    pipa  = np.where(propia, pipa, PIPAS_PROPIAS + 1 + antes // cap_pipa)
+    return propia, pipa.astype(np.int64)
+
+def _carga_ffd(dia, litros, rentados, cap_propia, cap_pipa):
+    """
+    First-fit decreasing por día sobre lo que ya decidió la mochila: los
+    pedidos con LITROS_RENTADOS > 0 van a rentadas y el resto a las
+    PIPAS_PROPIAS propias. De mayor a menor, cada pedido a la primera pipa
+    de su tipo con espacio. Uno propio que no cabe entero en ninguna se
+    reparte entre las propias con espacio (la mochila ya respetó
+    CAP_PROPIA); si ni así cabe, se renta completo. En rentadas se abre
+    otra si no cabe en ninguna abierta, y un pedido más grande que
+    CAP_PIPA ocupa las que necesite.
+
+    First-fit depende de lo que cargaron los pedidos anteriores del mismo
+    día, así que dentro del día es secuencial; los días son
+    independientes y van todos a la vez: el paso r acomoda el r-ésimo
+    pedido más grande de cada día sobre matrices día × pipa. El bucle es
+    de tantos pasos como pedidos tiene el día más cargado.
+    Devuelve (es_propia, número de la primera pipa que ocupa, rentadas por día).
+    """
+    pipa, propia = np.zeros(len(litros), dtype=np.int64), np.zeros(len(litros), dtype=bool)
+    if not len(litros):
+        return propia, pipa, {}
+    n_dias = int(dia.max()) + 1
+    orden  = np.lexsort((-litros, dia))                 # por día, de mayor a menor (estable)
+    paso   = pd.Series(dia[orden]).groupby(dia[orden]).cumcount().to_numpy()
+
+    libres   = np.full((n_dias, PIPAS_PROPIAS), float(cap_propia // PIPAS_PROPIAS))
+    cupo     = np.bincount(dia, weights=np.ceil(litros / cap_pipa), minlength=n_dias)
+    resto    = np.zeros((n_dias, max(1, int(cupo.max()))))       # rentadas de cada día
+    abiertas = np.zeros(n_dias, dtype=np.int64)
+
+    for r in range(paso.max() + 1):
+        i = orden[paso == r]                            # a lo más un pedido por día
+        d, l = dia[i], litros[i]
+
+        # propias: primera pipa donde cabe entero, si no repartido entre las que tienen espacio
+        prop = rentados[i] <= 0
+        cabe = libres[d] >= l[:, None]
+        ent  = prop & cabe.any(axis=1)
+        j    = cabe[ent].argmax(axis=1)
+        libres[d[ent], j] -= l[ent]
+        pipa[i[ent]] = j + 1
+
+        rep  = prop & ~ent & (libres[d].sum(axis=1) >= l)
+        lib  = libres[d[rep]]
+        antes = np.cumsum(lib, axis=1) - lib
+        libres[d[rep]] -= np.minimum(lib, np.maximum(l[rep, None] - antes, 0))
+        pipa[i[rep]] = (lib > 0).argmax(axis=1) + 1
+        propia[i[ent | rep]] = True
+
+        # rentadas (o propias que ya no caben en el espacio propio que queda)
+        ren  = ~(ent | rep)
+        d, l = d[ren], l[ren]
+        cabe = (resto[d] >= l[:, None]) & (np.arange(resto.shape[1]) < abiertas[d][:, None])
+        hay  = cabe.any(axis=1)
+        j    = np.where(hay, cabe.argmax(axis=1), abiertas[d])
+        resto[d[hay], j[hay]] -= l[hay]
+        n    = np.maximum(1, np.ceil(l[~hay] / cap_pipa)).astype(np.int64)
+        resto[d[~hay], j[~hay] + n - 1] = n * cap_pipa - l[~hay]    # las n-1 primeras quedan llenas
+        abiertas[d[~hay]] += n
+        pipa[i[ren]] = PIPAS_PROPIAS + j + 1
+
+    return propia, pipa, {d: int(abiertas[d]) for d in np.unique(dia).tolist()}
+
+def detallar(df, ini_dt, fin_dt, cap_propia=CAP_PROPIA, cap_pipa=CAP_PIPA, modo="secuencial"):
+    """
+    Cronograma por pipa a partir de la programación (en memoria).
+    `modo` es "secuencial" o "ffd" (ver MODOS).
+    Devuelve (detalle, {día: pipas rentadas}).
+    """
+    if modo not in MODOS:
+        raise ValueError(f"modo desconocido: {modo!r} (use {' / '.join(MODOS)})")
+
+    # Filtrar solo dentro del rango de asignación y ordenar como se carga
+    df = df[(df.FECHA_ASIGNADA >= ini_dt) & (df.FECHA_ASIGNADA <= fin_dt)]
+    if df.empty:
+        return pd.DataFrame(columns=DET_COLS), {}
+    df = df.sort_values(["FECHA_ASIGNADA", "PRIORIDAD", "LITROS"], kind="stable")
+
+    dia, dias = pd.factorize(df["FECHA_ASIGNADA"])
+    litros    = df["LITROS"].to_numpy(dtype=np.float64)
+
+    if modo == "ffd":
+        rentados = (df["LITROS_RENTADOS"].to_numpy(dtype=np.float64) if "LITROS_RENTADOS" in df.columns
+                    else np.zeros(len(df)))
+        propia, pipa, rentadas = _carga_ffd(dia, litros, rentados, cap_propia, cap_pipa)
+        pipas_por_dia = {dias[d].date(): n for d, n in rentadas.items()}
+    else:
+        propia, pipa = _carga_secuencial(dia, df["PRIORIDAD"].to_numpy(), litros,
+                                         cap_propia, cap_pipa)
+        total = df.groupby("FECHA_ASIGNADA")["LITROS"].sum()
+        pipas_por_dia = {f.date(): math.ceil(max(0, t - cap_propia) / cap_pipa)
+                         for f, t in total.items()}
+
+    ganancia = df["GANANCIA_AJUST"] if "GANANCIA_AJUST" in df.columns else df.get("UTILIDAD", 0)
+    det = pd.DataFrame({
+        "FechaAsignada":   df["FECHA_ASIGNADA"].dt.date,
+        "PedidoID":        df["ID"],
+        "Cliente":         df["CLIENTE"],
+        "Prioridad":       df["PRIORIDAD"],
+        "Valor":           df["VALOR"],
+        "TipoPipa":        np.where(propia, "PROPIA", "RENTADA"),
+        "PipaID":          [f"PIP{p:02d}" for p in pipa],
+        "Litros_Pipa":     litros,
+        "Litros_Rentados": df["LITROS_RENTADOS"],
+        "Ganancia_Ajust":  ganancia,
+    })
+    return det.reset_index(drop=True), pipas_por_dia
+
+if __name__ == "__main__":
+    # --- Localizar archivo de programación ---
+    prog_files = [p for p in sorted(CSV_DIR.glob("programacion_*.csv"))
+                  if not p.stem.startswith("programacion_detallada")]
+    if not prog_files:
+        sys.exit("No se encontró ningún archivo programacion_<rango>.csv en la carpeta csv/")
+    prog_file = prog_files[-1]
+    print(f"Generando detalle desde: {prog_file.name}")
+
+    # --- Extraer rango para el nombre de salida ---
+    m = re.search(r'_(\d{4}-\d{2}-\d{2})_A_(\d{4}-\d{2}-\d{2})', prog_file.stem)
+    if not m:
+        sys.exit("El nombre del archivo de programación no contiene un rango válido.")
+    ini_dt, fin_dt = map(datetime.fromisoformat, m.groups())
+
+    # --- Cargar datos y generar detalle ---
+    df = leer_csv(prog_file, parse_dates=["FECHA_ASIGNADA", "FECHA", "FECHA_ENTREGA"])
+    det_df, pipas_por_dia = detallar(df, ini_dt, fin_dt,
+                                     modo="ffd" if "--ffd" in sys.argv else "secuencial")
+
+    # --- Guardar detalle ---
+    out_file = CSV_DIR / f"programacion_detallada_{ini_dt:%Y-%m-%d}_A_{fin_dt:%Y-%m-%d}.csv"
+    det_df.to_csv(out_file, index=False)
+    print(f"Cronograma detallado guardado en: {out_file}")
+
+    # --- Resumen pipas rentadas por día ---
+    print("\nPipas rentadas por día:")
+    for dia, n in sorted(pipas_por_dia.items()):
+        print(f"{dia}: {n} pipas")
@@ -0,0 +1,19 @@
+# Las pruebas corren desde la raíz del repo: los scripts sueltos se
+# importan tal cual y el paquete de la app (subcarpeta) por la misma
+# ruta que agrega lector_pedidos.
+import sys
+from pathlib import Path
+
+import pytest
+
+RAIZ = Path(__file__).resolve().parents[1]
+APP  = RAIZ / "TSO INTERSEMESTRAL"
+for ruta in (RAIZ, APP):
+    if str(ruta) not in sys.path:
+        sys.path.insert(0, str(ruta))
+
+@pytest.fixture
+def en_raiz(monkeypatch):
+    """Corre la prueba con la raíz como directorio actual (csv/ de la muestra)."""
+    monkeypatch.chdir(RAIZ)
+    return RAIZ
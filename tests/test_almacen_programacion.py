@@ -0,0 +1,28 @@
+import pandas as pd
+
+from subcarpeta import algoritmo_mochila as am
+from subcarpeta.almacen_programacion import AlmacenProgramacion
+
+def programacion(litros):
+    return pd.DataFrame({"ID": ["1-1", "2-1"], "CLIENTE": ["A", "B"],
+                         "FECHA_ASIGNADA": pd.to_datetime(["2025-01-10", "2025-01-11"]),
+                         "LITROS": litros})
+
+def test_otros_parametros_u_otro_solver_son_otra_corrida(en_raiz, monkeypatch, tmp_path):
+    clave = am.clave_corrida()
+    assert am.clave_corrida() == clave
+    for nombre, valor in [("CAP_PROPIA", am.CAP_PROPIA // 2), ("PENALIZ", 0.5), ("MAX_DIAS_ESPERA", 5),
+                          ("VALOR_MAP", {1: 5, 2: 2, 3: 1}), ("VERSION_SOLVER", am.VERSION_SOLVER + 1)]:
+        with monkeypatch.context() as m:
+            m.setattr(am, nombre, valor)
+            assert am.clave_corrida() != clave, nombre
+
+    alm = AlmacenProgramacion(tmp_path / "programacion.sqlite")
+    primera = alm.guardar(programacion([10.0, 20.0]), clave)
+    assert alm.guardar(programacion([10.0, 20.0]), clave) == primera        # misma clave: no duplica
+    with monkeypatch.context() as m:
+        m.setattr(am, "CAP_PROPIA", am.CAP_PROPIA // 2)
+        otra = alm.guardar(programacion([30.0, 40.0]), am.clave_corrida())
+        assert otra != primera and alm.corrida(am.clave_corrida()) == otra
+    assert alm.rango(otra, pd.Timestamp("2025-01-01"), pd.Timestamp("2025-01-31"))["LITROS"].tolist() == [30.0, 40.0]
+    assert alm.corrida(clave) == primera
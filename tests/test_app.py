@@ -0,0 +1,131 @@
+import threading
+import time
+
+import pandas as pd
+import pytest
+from matplotlib.figure import Figure
+
+import app
+from subcarpeta import algoritmo_mochila
+from subcarpeta.cache_memoria import CacheMemoria
+
+@pytest.fixture
+def datos(tmp_path, monkeypatch):
+    """Carpeta data/ propia y cache vacía."""
+    monkeypatch.setattr(app, "DATA_FOLDER", str(tmp_path))
+    monkeypatch.setattr(app, "cache", CacheMemoria())
+    pd.DataFrame({"Año-Mes": ["2024-12", "2025-01", "2025-02"],
+                  "Total_Utilidad": [6.8e6, 7.0e6, 6.9e6]}).to_csv(tmp_path / "Utilidad.csv", index=False)
+    return tmp_path
+
+def grafica(**headers):
+    with app.app.test_request_context(headers=headers):
+        resp = app.app.make_response(app.generar_grafica("Utilidad.csv", "Utilidad", "Año-Mes", "Total_Utilidad"))
+        resp.direct_passthrough = False
+        return resp
+
+def test_grafica_etag_y_304(datos):
+    primera = grafica()
+    etag = primera.headers["ETag"].strip('"')
+    assert primera.status_code == 200 and primera.mimetype == "image/png"
+    assert primera.get_data().startswith(b"\x89PNG")
+
+    no_cambio = grafica(**{"If-None-Match": f'"{etag}"'})
+    assert no_cambio.status_code == 304 and no_cambio.headers["ETag"] == primera.headers["ETag"]
+    assert app.cache.resumen()["aciertos"] >= 1                 # el PNG no se volvió a dibujar
+
+    pd.DataFrame({"Año-Mes": ["2024-12"], "Total_Utilidad": [1.0]}).to_csv(datos / "Utilidad.csv", index=False)
+    otra = grafica(**{"If-None-Match": f'"{etag}"'})            # cambió el CSV → otro PNG
+    assert otra.status_code == 200 and otra.headers["ETag"].strip('"') != etag
+
+def test_grafica_errores(datos):
+    with app.app.test_request_context():
+        assert app.generar_grafica("NoExiste.csv", "x", "Año-Mes", "Total_Utilidad")[1] == 404
+        assert app.generar_grafica("Utilidad.csv", "x", "Año-Mes", "Otra")[1] == 400
+
+def test_semaforo_limita_graficas_simultaneas(monkeypatch):
+    activas, maximo, lock = [0], [0], threading.Lock()
+    guardar = Figure.savefig
+
+    def savefig_lento(self, *a, **kw):
+        with lock:
+            activas[0] += 1
+            maximo[0] = max(maximo[0], activas[0])
+        time.sleep(0.05)
+        try:
+            return guardar(self, *a, **kw)
+        finally:
+            with lock:
+                activas[0] -= 1
+
+    monkeypatch.setattr(Figure, "savefig", savefig_lento)
+    df = pd.DataFrame({"x": ["a", "b"], "y": [1, 2]})
+    hilos = [threading.Thread(target=app.dibujar_grafica, args=(df, f"t{i}", "x", "y"))
+             for i in range(2 * app.HILOS_GRAFICA + 1)]
+    for h in hilos: h.start()
+    for h in hilos: h.join()
+    assert maximo[0] == app.HILOS_GRAFICA
+
+class AlmacenFalso:
+    def __init__(self):
+        self.corridas = {}
+
+    def corrida(self, clave):
+        return self.corridas.get(clave)
+
+    def dia(self, corrida, fecha, columnas):
+        return pd.DataFrame({"ID": ["1-1"], "CLIENTE": ["Norte"]})
+
+def test_procesando_consulta_el_trabajo_hasta_el_resultado(monkeypatch):
+    almacen, soltar = AlmacenFalso(), threading.Event()
+    clave = f"prueba-{time.time_ns()}"                          # la cola de la app es global
+
+    def correr():
+        soltar.wait(5)
+        almacen.corridas[clave] = 1
+        return "✅ listo"
+
+    monkeypatch.setattr(algoritmo_mochila, "almacen", almacen)
+    monkeypatch.setattr(app, "corrida_actual", lambda: (clave, almacen.corrida(clave)))
+    monkeypatch.setattr(app, "correr_mochila", correr)
+    cliente = app.app.test_client()
+
+    espera = cliente.get("/mochila/2025-01-10")
+    html = espera.get_data(as_text=True)
+    assert espera.status_code == 202
+    tid = app.cola.enviar(("mochila", clave), correr).id        # single-flight: el mismo trabajo
+    assert f'fetch("/api/trabajos/{tid}"' in html
+    assert 'window.location.href = "/mochila/2025-01-10"' in html
+    assert cliente.get(f"/api/trabajos/{tid}").get_json()["estado"] in ("en_cola", "corriendo")
+
+    soltar.set()
+    for _ in range(500):
+        estado = cliente.get(f"/api/trabajos/{tid}").get_json()
+        if estado["estado"] == "listo":
+            break
+        time.sleep(0.01)
+    assert estado["estado"] == "listo" and estado["error"] is None
+
+    final = cliente.get("/mochila/2025-01-10")
+    assert final.status_code == 200 and "Norte" in final.get_data(as_text=True)
+
+def test_procesando_muestra_el_error_del_trabajo(monkeypatch):
+    clave, soltar = f"falla-{time.time_ns()}", threading.Event()
+
+    def falla():
+        soltar.wait(5)
+        raise RuntimeError("❌ sin pedidos")
+
+    monkeypatch.setattr(app, "corrida_actual", lambda: (clave, None))
+    monkeypatch.setattr(app, "correr_mochila", falla)
+    cliente = app.app.test_client()
+
+    assert cliente.get("/mochila/2025-01-10").status_code == 202
+    trabajo = app.cola.enviar(("mochila", clave), falla)
+    soltar.set()
+    for _ in range(500):
+        if not trabajo.pendiente:
+            break
+        time.sleep(0.01)
+    estado = cliente.get(f"/api/trabajos/{trabajo.id}").get_json()
+    assert estado["estado"] == "error" and estado["error"] == "❌ sin pedidos"
@@ -0,0 +1,52 @@
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+APP = Path(__file__).resolve().parents[1] / "TSO INTERSEMESTRAL"
+
+PESADOS = ("pandas", "numpy", "matplotlib", "ortools")
+
+PROBAR = """
+import json, sys
+import app
+antes = sorted(m for m in {pesados} if m in sys.modules)
+precarga = app.precargar(datos=False) if {precargar} else app.ARRANQUE["precarga_s"]
+print(json.dumps({{"antes": antes, "precarga_s": precarga,
+                  "despues": sorted(m for m in {pesados} if m in sys.modules),
+                  "arranque": app.app.test_client().get("/api/arranque").get_json()}}))
+"""
+
+def importar_app(precargar=False, **env):
+    """`import app` en un intérprete nuevo, desde la carpeta de la app."""
+    res = subprocess.run([sys.executable, "-c", PROBAR.format(pesados=PESADOS, precargar=precargar)],
+                         cwd=APP, capture_output=True, text=True, check=True,
+                         env=dict(os.environ, **{"TSO_PRECARGAR": "0", **env}))
+    return json.loads(res.stdout.splitlines()[-1])
+
+def test_importar_app_no_carga_pandas_ortools_ni_matplotlib():
+    r = importar_app()
+    assert r["antes"] == []
+    assert r["arranque"]["importar_s"] > 0 and r["arranque"]["precarga_s"] is None
+    assert not any(r["arranque"]["cargados"].values())
+    assert "pandas" not in r["despues"]                         # tampoco por servir /api/arranque
+
+def test_precargar_trae_lo_pesado():
+    r = importar_app(precargar=True)
+    assert r["antes"] == [] and r["precarga_s"] is not None
+    assert set(r["despues"]) == set(PESADOS)
+    assert all(r["arranque"]["cargados"].values())
+
+def test_tso_precargar_precarga_al_importar():
+    r = importar_app(TSO_PRECARGAR="1")
+    assert set(r["antes"]) == set(PESADOS) and r["precarga_s"] is not None
+    assert all(r["arranque"]["cargados"].values())
+
+def test_reporte_arranque(monkeypatch):
+    monkeypatch.chdir(APP)
+    import reporte_arranque
+    resumen, modulos = reporte_arranque.corrida()
+    assert resumen["importar_s"] > 0 and resumen["precarga_s"] is None
+    assert not any(resumen["cargados"].values())
+    assert any(nombre == "app" for _, _, nombre in modulos)
@@ -0,0 +1,33 @@
+from pathlib import Path
+
+import pytest
+
+import benchmark
+from subcarpeta import algoritmo_mochila as am
+
+def etapas(**segundos):
+    total = sum(segundos.values())
+    return {e: {"segundos": segundos.get(e, 0.0), "fraccion": segundos.get(e, 0.0) / total, "pico_mb": None}
+            for e, _ in benchmark.ETAPAS}
+
+def test_mochila_restaura_la_cache(en_raiz):
+    raw, prio_map, desde_dt, _ = am.cargar(Path("csv"))
+    antes = am.cache
+    benchmark._mochila({"fragmentos": am.preparar(raw, prio_map), "desde": desde_dt})
+    assert am.cache is antes
+
+    with pytest.raises(KeyError):
+        benchmark._mochila({"desde": desde_dt})
+    assert am.cache is antes
+
+def test_otro_equipo_compara_fracciones():
+    base = etapas(lectura=1.0, mochila=1.0)
+    # todo el doble de lento (otra máquina): sin regresión por fracción, regresión en segundos
+    lento = etapas(lectura=2.0, mochila=2.0)
+    assert {f[-1] for f in benchmark.comparar_base(lento, base, mismo_equipo=False)} == {"ok"}
+    assert "REGRESIÓN tiempo" in {f[-1] for f in benchmark.comparar_base(lento, base)}
+
+    # sólo la mochila se dispara: regresión también entre equipos
+    peor = etapas(lectura=2.0, mochila=6.0)
+    estados = {f[0]: f[-1] for f in benchmark.comparar_base(peor, base, mismo_equipo=False)}
+    assert estados["mochila"] == "REGRESIÓN tiempo" and estados["lectura"] == "ok"
@@ -0,0 +1,57 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import lector_pedidos as lp
+from subcarpeta import cache_csv
+
+@pytest.fixture
+def npz(monkeypatch):
+    """Sin pyarrow (como aquí): el binario es .npz."""
+    monkeypatch.setattr(cache_csv, "PARQUET", False)
+    monkeypatch.setattr(cache_csv, "stats", {"aciertos": 0, "fallos": 0})
+
+def escribir(tmp_path):
+    ruta = tmp_path / "Pedidos.csv"
+    pd.DataFrame({
+        "CLIENTE":         ["NORTE", None, "Gas  Sur", "ÑANDÚ"],
+        "FECHA DE PEDIDO": ["02/01/2025", "03/01/2025", "", "05/01/2025"],
+        "LITROS REALES":   ["$3,000", "10,000", "", "7"],
+        "ENTERO":          [1, 2, 3, 4],
+    }).to_csv(ruta, index=False)
+    return ruta
+
+def test_npz_ida_y_vuelta_sin_pickle(npz, tmp_path):
+    ruta = escribir(tmp_path)
+    for kw in ({}, {"parse_dates": ["FECHA DE PEDIDO"], "dayfirst": True}):
+        fresco = cache_csv.leer_csv(ruta, **kw)
+        leido  = cache_csv.leer_csv(ruta, **kw)
+        pd.testing.assert_frame_equal(leido, fresco)
+    assert cache_csv.stats == {"aciertos": 2, "fallos": 2}
+
+    tipado = lp.cargar_pedidos(ruta)
+    pd.testing.assert_frame_equal(lp.cargar_pedidos(ruta), tipado)
+    assert tipado["LITROS REALES"].tolist() == [3_000.0, 10_000.0, 0.0, 7.0]
+
+    cache = tmp_path / cache_csv.CARPETA
+    assert sorted(p.suffix for p in cache.iterdir()) == [".json"] * 3 + [".npz"] * 3
+    for p in cache.glob("*.npz"):
+        with np.load(p, allow_pickle=False) as z:
+            assert all(z[k].dtype != object for k in z.files)
+
+def test_version_en_la_llave(npz, tmp_path, monkeypatch):
+    ruta = escribir(tmp_path)
+    lp.cargar_pedidos(ruta)
+    monkeypatch.setattr(lp, "VERSION", lp.VERSION + 1)          # cambió tipar()
+    lp.cargar_pedidos(ruta)
+    monkeypatch.setattr(cache_csv, "VERSION", cache_csv.VERSION + 1)
+    lp.cargar_pedidos(ruta)
+    assert cache_csv.stats == {"aciertos": 0, "fallos": 3}
+
+def test_lo_que_no_es_texto_ni_arreglo_no_se_guarda(npz, tmp_path):
+    ruta = escribir(tmp_path)
+    mixto = lambda d: d.assign(ENTERO=d["ENTERO"].astype(object).where(d.index > 0, "uno"))
+    df = cache_csv.leer_csv(ruta, preparar=mixto, variante="mixto")
+    pd.testing.assert_frame_equal(cache_csv.leer_csv(ruta, preparar=mixto, variante="mixto"), df)
+    assert cache_csv.stats["aciertos"] == 0
+    assert not any((tmp_path / cache_csv.CARPETA).iterdir())
@@ -0,0 +1,65 @@
+import os
+
+import pandas as pd
+
+from subcarpeta.cache_memoria import CacheMemoria, tamano
+
+def contador():
+    """(llamadas, calc): calc(v) es un calcular() que anota v y lo devuelve."""
+    llamadas = []
+    def calc(valor):
+        return lambda: llamadas.append(valor) or valor
+    return llamadas, calc
+
+def test_lru_acotado_por_bytes():
+    cache, (llamadas, calc) = CacheMemoria(max_bytes=25), contador()
+    for clave in "abc":
+        cache.obtener(clave, calc(clave * 10))
+    assert cache.resumen() == {"entradas": 2, "bytes": 20, "aciertos": 0, "fallos": 3}   # salió "a"
+
+    cache.obtener("b", calc("x"))                               # "b" pasa a ser la más reciente
+    cache.obtener("d", calc("d" * 10))                          # → sale "c", no "b"
+    assert cache.obtener("b", calc("x")) == "b" * 10
+    assert cache.obtener("c", calc("C" * 5)) == "C" * 5         # justo en el límite: no saca a nadie
+    assert llamadas == ["a" * 10, "b" * 10, "c" * 10, "d" * 10, "C" * 5]
+    assert cache.resumen() == {"entradas": 3, "bytes": 25, "aciertos": 2, "fallos": 5}
+
+    assert cache.obtener("grande", calc("g" * 26)) == "g" * 26  # más que todo el límite: no se guarda
+    assert cache.resumen()["entradas"] == 3 and cache.bytes == 25
+
+def test_reemplazo_descuenta_los_bytes_previos(tmp_path):
+    ruta = tmp_path / "Pedidos.csv"
+    ruta.write_text("x")
+    cache, (_, calc) = CacheMemoria(max_bytes=100), contador()
+    cache.obtener("k", calc("v" * 40), [ruta])
+    ruta.write_text("xy")
+    cache.obtener("k", calc("w" * 30), [ruta])
+    assert cache.bytes == 30 and cache.resumen()["entradas"] == 1
+
+def test_invalida_por_mtime_tamano_y_archivo_borrado(tmp_path):
+    ruta = tmp_path / "Pedidos.csv"
+    ruta.write_text("ID,LITROS\n1,100\n")
+    cache, (llamadas, calc) = CacheMemoria(), contador()
+    leer = lambda v: cache.obtener("pedidos", calc(v), [ruta, tmp_path / "opcional.csv"])
+
+    assert leer(1) == 1 and leer(2) == 1                        # misma firma: acierto
+
+    st = ruta.stat()
+    os.utime(ruta, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+    assert leer(3) == 3                                         # sólo cambió el mtime
+
+    mtime = ruta.stat().st_mtime_ns
+    ruta.write_text("ID,LITROS\n1,1000\n")                      # otro tamaño, mismo mtime
+    os.utime(ruta, ns=(mtime, mtime))
+    assert leer(4) == 4
+
+    (tmp_path / "opcional.csv").write_text("")                  # aparece un archivo que faltaba
+    assert leer(5) == 5
+    ruta.unlink()
+    assert leer(6) == 6 and leer(7) == 6
+    assert llamadas == [1, 3, 4, 5, 6]
+
+def test_tamano_de_dataframes_y_tuplas():
+    df = pd.DataFrame({"CLIENTE": ["Norte", "Sur"], "LITROS": [1.0, 2.0]})
+    assert tamano(df) == int(df.memory_usage(deep=True).sum())
+    assert tamano((df, "abc", b"de")) == tamano(df) + 5
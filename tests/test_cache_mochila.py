@@ -0,0 +1,43 @@
+import json
+
+from subcarpeta import cache_mochila as cm
+
+PESOS, VALORES, CAP = [50, 30, 20, 40], [3, 2, 1, 3], 100
+
+def test_disco_opcional_y_reordenado(tmp_path):
+    ruta = tmp_path / "cache.sqlite"
+    sel, info = cm.CacheMochila(ruta=ruta).resolver(PESOS, VALORES, CAP)
+    assert not info["cache"] and info["gap"] == 0
+
+    otra = cm.CacheMochila(ruta=ruta)                   # otro proceso / corrida
+    orden = [3, 2, 1, 0]
+    sel2, info2 = otra.resolver([PESOS[i] for i in orden], [VALORES[i] for i in orden], CAP)
+    assert info2["cache"] and otra.aciertos_disco == 1
+    assert sorted(orden[j] for j in sel2) == sel
+
+def test_no_guarda_lo_cortado_por_tiempo(tmp_path, monkeypatch):
+    def cortado(pesos, valores, capacidad, metodo, limite_s):
+        return [0], {"metodo": "cpsat", "gap": 0.1, "segundos": limite_s, "valor": valores[0], "cota": 10}
+    monkeypatch.setattr(cm, "resolver", cortado)
+
+    cache = cm.CacheMochila(ruta=tmp_path / "cache.sqlite")
+    cache.resolver(PESOS, VALORES, CAP, "cpsat", limite_s=0.5)
+    _, info = cache.resolver(PESOS, VALORES, CAP, "cpsat", limite_s=5.0)
+    assert not info["cache"] and cache.fallos == 2 and cache.stats()["entradas"] == 0
+    assert cm.CacheMochila(ruta=tmp_path / "cache.sqlite")._leer_disco(cm.huella(PESOS, VALORES, CAP, "cpsat")[0]) is None
+
+def test_disco_en_json_y_filas_ajenas_se_ignoran(tmp_path):
+    ruta  = tmp_path / "cache.sqlite"
+    cache = cm.CacheMochila(ruta=ruta)
+    sel, _ = cache.resolver(PESOS, VALORES, CAP)
+    llave  = cm.huella(PESOS, VALORES, CAP, "auto")[0]
+    texto, = cache._disco().execute("SELECT dato FROM mochila WHERE llave = ?", (llave,)).fetchone()
+    posiciones, info = json.loads(texto)
+    assert info["gap"] == 0 and len(posiciones) == len(sel)
+
+    # una fila que no es JSON (p. ej. un pickle viejo) no se deserializa: cuenta como fallo
+    with cache._disco() as con:
+        con.execute("UPDATE mochila SET dato = ? WHERE llave = ?", (b"\x80\x04\x95 pickle", llave))
+    otra = cm.CacheMochila(ruta=ruta)
+    assert otra._leer_disco(llave) is None
+    assert otra.resolver(PESOS, VALORES, CAP)[0] == sel and otra.fallos == 1
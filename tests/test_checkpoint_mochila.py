@@ -0,0 +1,67 @@
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from subcarpeta import algoritmo_mochila as am
+from subcarpeta import checkpoint_mochila as cm
+from subcarpeta import solver_mochila as sm
+
+@pytest.fixture
+def muestra(en_raiz):
+    raw, prio_map, desde_dt, _ = am.cargar(Path("csv"))
+    return raw, prio_map, desde_dt
+
+def simulado(raw, prio_map, desde_dt, ckpt=None, **kw):
+    df  = am.preparar(raw, prio_map, valor_map=kw.get("valor_map", am.VALOR_MAP))
+    alm = am.AlmacenPedidos(df)
+    pipas, ckpt, inicio = cm.replanificar(alm, desde_dt, ckpt, prio_map=prio_map, **kw)
+    return alm.a_dataframe(df), pipas, ckpt, inicio
+
+def test_json_ida_y_vuelta_y_reanudacion(muestra, tmp_path):
+    raw, prio_map, desde_dt = muestra
+    ruta = tmp_path / "checkpoint.json"
+    out, pipas, ckpt, _ = simulado(raw, prio_map, desde_dt)
+    cm.guardar(ruta, ckpt)
+    leido = cm.cargar(ruta)
+    assert leido == ckpt
+
+    # sin cambios: no se vuelve a simular ningún día ya cortado
+    out2, pipas2, _, inicio = simulado(raw, prio_map, desde_dt, leido)
+    assert inicio > max(ckpt["dias"])
+    pd.testing.assert_frame_equal(out2, out)
+    assert pipas2 == pipas
+
+    # un pedido modificado: reanuda en su día y queda igual que correr completo
+    cambiado = raw.copy()
+    i = cambiado.index[len(cambiado) // 2]
+    cambiado.loc[i, "LITROS"] = cambiado.loc[i, "LITROS"] + 1_000
+    parcial, pipas_p, _, inicio = simulado(cambiado, prio_map, desde_dt, leido)
+    completo, pipas_c, _, _ = simulado(cambiado, prio_map, desde_dt)
+    assert pd.Timestamp(desde_dt) < inicio <= max(ckpt["dias"])
+    pd.testing.assert_frame_equal(parcial, completo)
+    assert pipas_p == pipas_c
+
+def test_otro_valor_map_o_prioridades_corre_completo(muestra):
+    raw, prio_map, desde_dt = muestra
+    _, _, ckpt, _ = simulado(raw, prio_map, desde_dt)
+    _, _, _, inicio = simulado(raw, prio_map, desde_dt, ckpt, valor_map={1: 5, 2: 2, 3: 1})
+    assert inicio == pd.Timestamp(desde_dt)
+
+    otra = prio_map.copy()
+    otra.iloc[0] = 3 if otra.iloc[0] != 3 else 1
+    _, _, _, inicio = simulado(raw, otra, desde_dt, ckpt)
+    assert inicio == pd.Timestamp(desde_dt)
+
+def test_otra_version_del_solver_corre_completo(muestra, monkeypatch):
+    raw, prio_map, desde_dt = muestra
+    _, _, ckpt, _ = simulado(raw, prio_map, desde_dt)
+    monkeypatch.setattr(sm, "VERSION", sm.VERSION + 1)       # p. ej. otro desempate entre óptimos
+    _, _, _, inicio = simulado(raw, prio_map, desde_dt, ckpt)
+    assert inicio == pd.Timestamp(desde_dt)
+
+def test_archivo_ajeno_no_se_carga(tmp_path):
+    ruta = tmp_path / "checkpoint.json"
+    ruta.write_bytes(b"\x80\x04\x95 pickle viejo")
+    assert cm.cargar(ruta) is None
+    assert cm.cargar(tmp_path / "no_existe.json") is None
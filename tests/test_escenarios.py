@@ -0,0 +1,33 @@
+import numpy as np
+import pandas as pd
+
+from subcarpeta import algoritmo_mochila as am
+from subcarpeta import escenarios
+
+DESDE = pd.Timestamp("2025-01-01")
+
+def cargar_falso(csv_dir):
+    """Lo que devuelve am.cargar(): 300 pedidos en 20 días, ~1/3 con deadline."""
+    rng = np.random.default_rng(5)
+    n   = 300
+    raw = pd.DataFrame({
+        "ID":        np.arange(n),
+        "CLIENTE":   rng.choice(["A", "B", "C"], n),
+        "FECHA":     DESDE + pd.to_timedelta(rng.integers(0, 20, n), unit="D"),
+        "LITROS":    rng.choice([20_000, 45_000, 64_000, 150_000], n).astype(float),
+        "PRIORIDAD": rng.integers(1, 4, n),
+        "UTILIDAD":  rng.uniform(1_000, 50_000, n).round(2),
+    })
+    entrega = raw["FECHA"] + pd.to_timedelta(rng.integers(3, 8, n), unit="D")
+    raw["FECHA_ENTREGA"] = entrega.where(rng.random(n) < 0.35, pd.Timestamp.max)
+    return raw, pd.Series(dtype=int), DESDE, DESDE + pd.Timedelta(days=19)
+
+def test_pool_de_procesos_igual_que_en_serie(monkeypatch):
+    monkeypatch.setattr(am, "cargar", cargar_falso)
+    grid = {"CAP_PROPIA": [300_000, 500_000], "PENALIZ": [0.05, 0.2],
+            "VALOR_MAP": [{1: 3, 2: 2, 3: 1}, {1: 5, 2: 2, 3: 1}]}
+
+    serie    = escenarios.barrer(grid, procesos=1, exportar=False)
+    paralelo = escenarios.barrer(grid, procesos=2, exportar=False)
+    assert len(serie) == 8 and serie["Litros_Rentados"].gt(0).all()
+    pd.testing.assert_frame_equal(paralelo, serie)
@@ -0,0 +1,29 @@
+import pandas as pd
+
+import lector_pedidos as lp
+
+def pedidos(tmp_path, n=11):
+    ruta = tmp_path / "Pedidos.csv"
+    pd.DataFrame({
+        "CLIENTE":         [f"C{i % 3}" for i in range(n)],
+        "FECHA DE PEDIDO": [f"{1 + i:02d}/01/2025" for i in range(n)],
+        "LITROS REALES":   [f"${1_000 * (i + 1):,}" for i in range(n)],
+        "OTRA":            "x",
+    }).to_csv(ruta, index=False)
+    return ruta
+
+def test_bloques_respetan_chunksize_y_llegan_tipados(tmp_path):
+    ruta = pedidos(tmp_path)
+    cols = ["CLIENTE", "FECHA DE PEDIDO", "LITROS REALES"]
+    partes = list(lp.leer_por_partes(ruta, cols, chunksize=3))
+
+    assert [len(p) for p in partes] == [3, 3, 3, 2]
+    junto = pd.concat(partes, ignore_index=True)
+    pd.testing.assert_frame_equal(junto, lp.cargar_pedidos(ruta, usecols=cols))
+    assert junto["LITROS REALES"].tolist() == [1_000.0 * (i + 1) for i in range(11)]
+
+def test_rango_filtrado_por_bloque(tmp_path):
+    ruta = pedidos(tmp_path)
+    df = lp.leer_rango(ruta, ["CLIENTE", "FECHA DE PEDIDO"], "FECHA DE PEDIDO",
+                       pd.Timestamp("2025-01-03"), pd.Timestamp("2025-01-07"), chunksize=2)
+    assert df["FECHA DE PEDIDO"].dt.day.tolist() == [3, 4, 5, 6, 7]
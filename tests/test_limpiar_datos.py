@@ -0,0 +1,98 @@
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import limpiar_datos as ld
+
+DESDE, HASTA = datetime(2025, 1, 1), datetime(2025, 6, 30)
+
+def trimestres(litros):
+    """NORTE factura dos pedidos en el 1er trimestre y pide otro en el 2º."""
+    return pd.DataFrame({
+        "IDPEDIDO":            [1, 2, 3],
+        "CLIENTE":             ["NORTE"] * 3,
+        "FECHA DE PEDIDO":     ["10/01/2025", "20/02/2025", "15/04/2025"],
+        "FECHA FACTURA VENTA": ["12/01/2025", "22/02/2025", "16/04/2025"],
+        "LITROS REALES":       litros,
+        "UTILIDAD":            ["100", "100", "100"],
+    })
+
+@pytest.mark.parametrize("litros, antes, ahora", [
+    ([1_500_000, 1_500_000, 40_000],          1, 1),    # columna numérica: igual que antes
+    (["1,500,000", "1,500,000", "40,000"],    2, 1),    # antes NaN → 0 litros previos
+    (["1000", "2000", "40000"],               1, 2),    # antes "10002000" → 10 ML
+])
+def test_trimestre_previo_suma_litros_numericos(litros, antes, ahora):
+    crudo = trimestres(litros)
+    # regla anterior: groupby().sum() de la columna tal cual la dejó read_csv
+    # (el texto se concatenaba) y después to_numeric
+    previo = pd.to_numeric(pd.Series([crudo["LITROS REALES"][:2].sum()]), errors="coerce").fillna(0)
+    assert (1 if previo.item() > 2_500_000 else 2) == antes
+
+    out = ld.limpiar_pedidos(crudo, pd.Series(dtype=int), DESDE, HASTA)
+    assert out["PRIORIDAD"].tolist() == [2, 2, ahora]
+
+def pedidos(semilla, n=200):
+    """Pedidos crudos (texto) con clientes repetidos, uno sin nombre y facturas faltantes."""
+    rng = np.random.default_rng(semilla)
+    pedido  = pd.Timestamp("2024-11-01") + pd.to_timedelta(rng.integers(0, 270, n), unit="D")
+    factura = pedido + pd.to_timedelta(rng.integers(0, 20, n), unit="D")
+    df = pd.DataFrame({
+        "IDPEDIDO":            np.arange(n) + 1_000,
+        "CLIENTE":             rng.choice(["NORTE", "SUR", "ESTE", "OESTE", "CENTRO", None], n),
+        "FECHA DE PEDIDO":     pedido.strftime("%d/%m/%Y"),
+        "FECHA FACTURA VENTA": factura.strftime("%d/%m/%Y").where(rng.random(n) > 0.1, ""),
+        "LITROS REALES":       rng.choice([40_000, 300_000, 900_000], n).astype(str),
+        "UTILIDAD":            rng.uniform(0, 9_000, n).round(2).astype(str),
+    })
+    return df
+
+def limpiar_original(df, hist_prio):
+    """
+    Reglas de la versión original fila por fila (dict de litros por
+    trimestre + apply), con los litros ya numéricos al sumar (ver la prueba
+    anterior); una factura sin fecha cuenta como prioridad trimestral 2.
+    """
+    df = df.copy()
+    df["FECHA DE PEDIDO"] = pd.to_datetime(df["FECHA DE PEDIDO"], format="%d/%m/%Y", errors="coerce")
+    df = df[(df["FECHA DE PEDIDO"] >= DESDE) & (df["FECHA DE PEDIDO"] <= HASTA)]
+    df["LITROS"] = pd.to_numeric(df["LITROS REALES"], errors="coerce").fillna(0)
+
+    fac = pd.to_datetime(df["FECHA FACTURA VENTA"], format="%d/%m/%Y", errors="coerce")
+    df["PERIODO_VAL"] = fac.dt.year * 10 + (fac.dt.month - 1) // 3 + 1
+    litros_dict = df.groupby(["CLIENTE", "PERIODO_VAL"])["LITROS"].sum().to_dict()
+
+    def prio_trim(cliente, periodo_val):
+        if pd.isna(periodo_val):
+            return 2
+        return 1 if litros_dict.get((cliente, periodo_val - 1), 0) > 2_500_000 else 2
+
+    def prioridad_final(cliente, prio_trim):
+        hist = hist_prio.get(cliente, 2)
+        if hist == 1 or prio_trim == 1:
+            return 1
+        if hist == 3:
+            return 3
+        return 2
+
+    df["PRIORIDAD"] = df.apply(lambda r: prioridad_final(r["CLIENTE"], prio_trim(r["CLIENTE"], r["PERIODO_VAL"])),
+                               axis=1)
+    df["UTILIDAD"] = pd.to_numeric(df["UTILIDAD"], errors="coerce").fillna(0)
+    df["VALOR"]    = df["PRIORIDAD"].map({1: 3, 2: 2, 3: 1})
+    df["ID"]       = df["IDPEDIDO"]
+    df["FECHA"]    = df["FECHA DE PEDIDO"]
+    return df[ld.OUT_COLS]
+
+@pytest.mark.parametrize("semilla", range(4))
+def test_limpiar_igual_que_fila_por_fila(semilla):
+    crudo = pedidos(semilla)
+    hist  = pd.Series({"NORTE": 3, "SUR": 1, "ESTE": 2}, name="Prioridad")   # OESTE/CENTRO sin histórica
+    antes = crudo.copy()
+
+    out = ld.limpiar_pedidos(crudo, hist, DESDE, HASTA)
+    ref = limpiar_original(crudo, hist)
+    pd.testing.assert_frame_equal(out, ref, check_dtype=False)
+    pd.testing.assert_frame_equal(crudo, antes)                  # no modifica la entrada
+    assert set(out["PRIORIDAD"]) == {1, 2, 3}
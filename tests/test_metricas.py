@@ -0,0 +1,71 @@
+import threading
+
+import pytest
+
+from subcarpeta import metricas
+
+@pytest.fixture
+def reinicios(monkeypatch):
+    """Cuenta los reinicios de VmHWM (sin escribir de verdad en clear_refs)."""
+    monkeypatch.setattr(metricas, "MEMORIA", "rss_por_etapa")
+    monkeypatch.setattr(metricas, "_rss", lambda: (100 * 2**20, 200 * 2**20))
+    llamadas = []
+    monkeypatch.setattr(metricas, "_reiniciar_pico", lambda: llamadas.append(1) or True)
+    return llamadas
+
+def etapas():
+    with metricas.corrida("prueba") as c:
+        with metricas.etapa("externa"):
+            with metricas.etapa("interna"):
+                pass
+    return c.etapas
+
+def otro_hilo(abrir_etapa):
+    """Hilo vivo (como los de la app), con o sin una etapa abierta, hasta soltar()."""
+    listo, fin = threading.Event(), threading.Event()
+
+    def cuerpo():
+        if abrir_etapa:
+            with metricas.etapa("del_otro_hilo"):
+                listo.set(); fin.wait(5)
+        else:
+            listo.set(); fin.wait(5)
+
+    hilo = threading.Thread(target=cuerpo)
+    hilo.start()
+    listo.wait(5)
+
+    def soltar():
+        fin.set()
+        hilo.join()
+    return soltar
+
+def test_reinicia_el_pico_por_etapa_aunque_haya_otros_hilos(reinicios):
+    soltar = otro_hilo(abrir_etapa=False)           # p. ej. los hilos de peticiones de Flask
+    try:
+        e = etapas()
+    finally:
+        soltar()
+    assert len(reinicios) == 2
+    assert {v["memoria"] for v in e.values()} == {"rss_etapa"}
+
+def test_con_etapa_abierta_en_otro_hilo_no_toca_el_pico(reinicios):
+    soltar = otro_hilo(abrir_etapa=True)
+    try:
+        e = etapas()
+    finally:
+        soltar()
+    assert len(reinicios) == 1                      # sólo la del otro hilo, que abrió primero
+    assert {v["memoria"] for v in e.values()} == {"pico_proceso"}
+    assert e["externa"]["pico_rss_mb"] == 200.0
+
+def test_etapa_que_se_cruza_con_otro_hilo_queda_como_pico_del_proceso(reinicios):
+    with metricas.corrida("prueba") as c:
+        with metricas.etapa("larga"):
+            otro_hilo(abrir_etapa=True)()           # abre y cierra una etapa mientras tanto
+        with metricas.etapa("sola"):
+            pass
+    assert len(reinicios) == 2                      # "larga" y "sola"; la del otro hilo no reinicia
+    assert c.etapas["larga"]["memoria"] == "pico_proceso"
+    assert c.etapas["sola"]["memoria"] == "rss_etapa"
+    assert metricas._abiertas == {}
@@ -0,0 +1,38 @@
+from datetime import datetime
+
+import pandas as pd
+import pytest
+
+import prioridad_cliente as pc
+
+@pytest.fixture
+def archivos(tmp_path):
+    # DIAZ GAS cruza los bloques de 2 filas y sólo llega a 5 ML sumando ambos;
+    # "Gas  Sur" / "GAS SUR" son el mismo cliente; ROJAS sólo tiene cancelaciones
+    pedidos = pd.DataFrame([
+        ("DIAZ GAS",  "02/01/2025", "$3,000,000"),
+        ("Gas  Sur",  "03/01/2025", "10,000"),
+        ("DÍAZ GAS",  "04/01/2025", "2,500,000"),
+        ("GAS SUR",   "05/01/2025", "7,000"),
+        ("NORTE",     "06/01/2025", "1,000"),
+        ("DIAZ GAS",  "15/02/2025", "9,000,000"),          # fuera del rango
+    ], columns=["CLIENTE", "FECHA DE PEDIDO", "LITROS REALES"])
+    cancelados = pd.DataFrame(
+        [("GAS SUR", f"2025-01-{d:02d}") for d in range(2, 9)] + [("Rojas", "2025-01-03")],
+        columns=["cliente", "fecha_fac"])
+    rutas = tmp_path / "Pedidos.csv", tmp_path / "PedidosCancelados.csv"
+    pedidos.to_csv(rutas[0], index=False)
+    cancelados.to_csv(rutas[1], index=False)
+    return rutas
+
+def test_por_partes_igual_que_de_una_vez(archivos):
+    desde, hasta = datetime(2025, 1, 1), datetime(2025, 1, 31)
+    partes = pc.prioridades_por_partes(*archivos, desde, hasta, chunksize=2)
+    junto  = pc.calcular_prioridades(pd.read_csv(archivos[0], dtype=str), pd.read_csv(archivos[1], dtype=str),
+                                     desde, hasta)
+    pd.testing.assert_frame_equal(partes, junto)
+
+    prio = partes.set_index("CLIENTE")
+    assert prio.loc["DIAZ GAS", "LitrosFacturados"] == 5_500_000 and prio.loc["DIAZ GAS", "Prioridad"] == 1
+    assert prio.loc["Gas  Sur", "Cancelaciones"] == 7 and prio.loc["Gas  Sur", "Prioridad"] == 3
+    assert prio.loc["NORTE", "Prioridad"] == 2 and prio.loc["ROJAS", "LitrosFacturados"] == 0
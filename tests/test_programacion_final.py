@@ -0,0 +1,118 @@
+import math
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import programacion_final as pf
+
+def programacion(filas):
+    """filas: (fecha, id, prioridad, litros, litros_rentados)."""
+    df = pd.DataFrame(filas, columns=["FECHA_ASIGNADA", "ID", "PRIORIDAD", "LITROS", "LITROS_RENTADOS"])
+    df["FECHA_ASIGNADA"] = pd.to_datetime(df["FECHA_ASIGNADA"])
+    df["CLIENTE"], df["VALOR"], df["GANANCIA_AJUST"] = "C", 1, 0.0
+    return df
+
+def detalle_ffd(df):
+    return pf.detallar(df, df.FECHA_ASIGNADA.min(), df.FECHA_ASIGNADA.max(), modo="ffd")
+
+def test_ffd_pedido_mayor_a_una_pipa_en_dia_vacio_va_en_propias():
+    det, rentadas = detalle_ffd(programacion([("2025-01-10", 1, "ALTA", 100_000, 0)]))
+    assert det.TipoPipa.tolist() == ["PROPIA"]
+    assert det.PipaID.tolist() == ["PIP01"]
+    assert rentadas == {pd.Timestamp("2025-01-10").date(): 0}
+
+def test_ffd_respeta_lo_que_rento_la_mochila():
+    # 1.9 ML propios en pedidos de 95 kL (ninguno cabe entero en una pipa) + uno rentado
+    filas  = [("2025-01-10", i, "MEDIA", 95_000, 0) for i in range(20)]
+    filas += [("2025-01-10", 99, "BAJA", 70_000, 70_000)]
+    det, rentadas = detalle_ffd(programacion(filas))
+
+    rentada = det.set_index("PedidoID").TipoPipa.eq("RENTADA")
+    assert rentada.tolist() == (det.set_index("PedidoID").Litros_Rentados > 0).tolist()
+    assert rentadas == {pd.Timestamp("2025-01-10").date(): 2}     # 70 kL → 2 rentadas
+    assert det.loc[det.PedidoID == 99, "PipaID"].item() == "PIP31"
+
+def test_ffd_sin_columna_de_rentados_renta_solo_lo_que_no_cabe():
+    dia    = np.zeros(3, dtype=np.int64)
+    litros = np.array([1_000_000.0, 900_000.0, 50_000.0])
+    propia, pipa, rentadas = pf._carga_ffd(dia, litros, np.zeros(3), pf.CAP_PROPIA, pf.CAP_PIPA)
+    assert propia.tolist() == [True, True, False]
+    assert rentadas == {0: 1}
+    assert pipa.tolist() == [1, 16, 31]
+
+def detalle_original(df, cap_propia, cap_pipa):
+    """Bucle por día y fila de la versión original (orden estable para los empates)."""
+    filas, pipas_por_dia = [], {}
+    for fecha, grupo in df.groupby("FECHA_ASIGNADA"):
+        prop_usado, rent_loaded = 0, 0
+        pipas_por_dia[fecha.date()] = math.ceil(max(0, grupo["LITROS"].sum() - cap_propia) / cap_pipa)
+        for _, p in grupo.sort_values(["PRIORIDAD", "LITROS"], kind="stable").iterrows():
+            if prop_usado + p["LITROS"] <= cap_propia:
+                tipo, pid = "PROPIA", prop_usado // (cap_propia // 30) + 1
+                prop_usado += p["LITROS"]
+            else:
+                tipo, pid = "RENTADA", 31 + rent_loaded // cap_pipa
+                rent_loaded += p["LITROS"]
+            filas.append((p["ID"], tipo, f"PIP{int(pid):02d}"))
+    return pd.DataFrame(filas, columns=["PedidoID", "TipoPipa", "PipaID"]), pipas_por_dia
+
+@pytest.mark.parametrize("semilla", range(5))
+def test_secuencial_igual_que_el_bucle_original(semilla):
+    rng = np.random.default_rng(semilla)
+    n   = 300
+    # litros repetidos (empates) y días desde holgados hasta muy excedidos
+    filas = list(zip(pd.Timestamp("2025-01-01") + pd.to_timedelta(rng.integers(0, 6, n), unit="D"),
+                     range(n), rng.integers(1, 4, n),
+                     rng.choice([10_000.0, 25_000.0, 40_000.0, 64_000.0, 90_000.0], n), np.zeros(n)))
+    df = programacion(filas)
+    for cap in (300_000, 1_000_000, pf.CAP_PROPIA):
+        det, pipas = pf.detallar(df, df.FECHA_ASIGNADA.min(), df.FECHA_ASIGNADA.max(), cap_propia=cap)
+        ref, pipas_ref = detalle_original(df, cap, pf.CAP_PIPA)
+        pd.testing.assert_frame_equal(det[ref.columns], ref, check_dtype=False)
+        assert pipas == pipas_ref
+
+def ffd_por_pedido(dia, litros, rentados, cap_propia, cap_pipa):
+    """First-fit decreasing pedido por pedido, día por día (la versión anterior)."""
+    pipa, propia, rentadas = np.zeros(len(litros), dtype=np.int64), np.zeros(len(litros), dtype=bool), {}
+    for d, pos in pd.Series(np.arange(len(dia))).groupby(dia).indices.items():
+        libres = np.full(pf.PIPAS_PROPIAS, float(cap_propia // pf.PIPAS_PROPIAS))
+        resto, abiertas = np.zeros(int(np.ceil(litros[pos] / cap_pipa).sum())), 0
+        for i in pos[np.argsort(-litros[pos], kind="stable")]:
+            l = litros[i]
+            if rentados[i] <= 0:
+                j = int(np.argmax(libres >= l))
+                if libres[j] >= l:
+                    libres[j] -= l
+                    pipa[i], propia[i] = j + 1, True
+                    continue
+                if libres.sum() >= l:
+                    con = np.flatnonzero(libres > 0)
+                    libres[con] -= np.minimum(libres[con], np.maximum(l - np.r_[0.0, np.cumsum(libres[con])[:-1]], 0))
+                    pipa[i], propia[i] = con[0] + 1, True
+                    continue
+            j = int(np.argmax(resto[:abiertas] >= l)) if abiertas else 0
+            if abiertas and resto[j] >= l:
+                resto[j] -= l
+            else:
+                n, j = max(1, math.ceil(l / cap_pipa)), abiertas
+                resto[j + n - 1] = n * cap_pipa - l
+                abiertas += n
+            pipa[i] = pf.PIPAS_PROPIAS + j + 1
+        rentadas[d] = abiertas
+    return propia, pipa, rentadas
+
+@pytest.mark.parametrize("semilla", range(5))
+def test_ffd_todos_los_dias_a_la_vez_igual_que_pedido_por_pedido(semilla):
+    rng = np.random.default_rng(semilla)
+    n   = 400
+    dia = rng.integers(0, 7, n)
+    # pedidos mayores que una pipa, empates y días con propias llenas
+    litros   = rng.choice([10_000.0, 25_000.0, 40_000.0, 64_000.0, 90_000.0, 150_000.0], n)
+    rentados = np.where(rng.random(n) < 0.2, litros, 0.0)
+    for cap in (300_000, pf.CAP_PROPIA):
+        obtenido = pf._carga_ffd(dia, litros, rentados, cap, pf.CAP_PIPA)
+        esperado = ffd_por_pedido(dia, litros, rentados, cap, pf.CAP_PIPA)
+        assert obtenido[0].tolist() == esperado[0].tolist()
+        assert obtenido[1].tolist() == esperado[1].tolist()
+        assert obtenido[2] == esperado[2]
@@ -0,0 +1,81 @@
+import math
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from subcarpeta import algoritmo_mochila as am
+from subcarpeta.almacen_pedidos import AlmacenPedidos
+
+DESDE = pd.Timestamp("2025-01-01")
+
+def fragmentos(semilla, n=400):
+    """
+    Pedidos con litros repetidos y tres prioridades; ~1/3 con deadline entre
+    FECHA + 3 y FECHA + 7 días (los anteriores a FECHA_DISP nunca se asignan).
+    """
+    rng = np.random.default_rng(semilla)
+    raw = pd.DataFrame({
+        "ID":        np.arange(n),
+        "CLIENTE":   rng.choice(["A", "B", "C", "D"], n),
+        "FECHA":     DESDE + pd.to_timedelta(rng.integers(0, 30, n), unit="D"),
+        "LITROS":    rng.choice([20_000, 30_000, 45_000, 64_000, 150_000], n).astype(float),
+        "PRIORIDAD": rng.integers(1, 4, n),
+        "UTILIDAD":  rng.uniform(1_000, 50_000, n).round(2),
+    })
+    entrega = raw["FECHA"] + pd.to_timedelta(rng.integers(3, 8, n), unit="D")
+    raw["FECHA_ENTREGA"] = entrega.where(rng.random(n) < 0.35, pd.Timestamp.max)
+    return am.preparar(raw, pd.Series(dtype=int))
+
+def simulacion_original(df, cap_propia, cap_pipa, penaliz, max_espera):
+    """
+    Bucle día por día de la versión original (registros dict), con el único
+    cambio de la serie: lo que vence sin asignarse queda sin FECHA_ASIGNADA.
+    La mochila es la misma (am.solve_knapsack) para comparar sólo el bucle.
+    """
+    pend  = df.to_dict("records")
+    pipas = {}
+    fecha = DESDE
+    while any(pd.isna(p["FECHA_ASIGNADA"]) and fecha <= p["FECHA_ENTREGA"] for p in pend):
+        hoy = [p for p in pend if pd.isna(p["FECHA_ASIGNADA"]) and p["FECHA_DISP"] <= fecha <= p["FECHA_ENTREGA"]]
+        if not hoy:
+            fecha += timedelta(days=1)
+            continue
+
+        for p in hoy: p["ESPERA_DIAS"] += 1
+        cand = [p for p in hoy if p["ESPERA_DIAS"] <= max_espera]
+
+        pos, _ = am.solve_knapsack(np.array([int(p["LITROS"]) for p in cand], dtype=np.int64),
+                                   np.array([int(p["VALOR"]) for p in cand], dtype=np.int32), cap_propia)
+        for i in pos:
+            cand[i]["FECHA_ASIGNADA"] = fecha
+
+        rent_total = 0
+        for p in hoy:
+            if pd.notna(p["FECHA_ASIGNADA"]): continue
+            p["FECHA_ASIGNADA"]  = fecha
+            p["LITROS_RENTADOS"] = p["LITROS"]
+            rent_total          += p["LITROS"]
+            gxl = p["GANANCIA"] / p["LITROS"] if p["LITROS"] else 0
+            p["GANANCIA_AJUST"]  = p["GANANCIA"] - p["LITROS"] * gxl * penaliz
+        pipas[fecha.date()] = math.ceil(rent_total / cap_pipa)
+        fecha += timedelta(days=1)
+    return pd.DataFrame(pend), pipas
+
+@pytest.mark.parametrize("semilla", range(3))
+def test_simular_igual_que_el_bucle_original(semilla):
+    df   = fragmentos(semilla)
+    kw   = dict(cap_propia=300_000, cap_pipa=am.CAP_PIPA, penaliz=am.PENALIZ, max_espera=am.MAX_DIAS_ESPERA)
+    ref, pipas_ref = simulacion_original(df, **kw)
+
+    alm   = AlmacenPedidos(df)
+    pipas = am.simular(alm, DESDE, **kw)
+    out   = alm.a_dataframe(df)
+
+    cols = ["ID", "FECHA_ASIGNADA", "LITROS_RENTADOS", "GANANCIA_AJUST", "ESPERA_DIAS"]
+    ref["FECHA_ASIGNADA"] = ref["FECHA_ASIGNADA"].astype(out["FECHA_ASIGNADA"].dtype)
+    pd.testing.assert_frame_equal(out[cols], ref[cols], check_dtype=False)
+    assert pipas == pipas_ref
+    # el caso interesante sí ocurre: hay rentados y vencidos sin asignar
+    assert out["LITROS_RENTADOS"].gt(0).any() and out["FECHA_ASIGNADA"].isna().any()
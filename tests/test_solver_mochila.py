@@ -0,0 +1,103 @@
+import random
+from pathlib import Path
+
+import numpy as np
+import pytest
+from ortools.algorithms.python import knapsack_solver
+
+from subcarpeta import solver_mochila as sm
+
+DP = knapsack_solver.SolverType.KNAPSACK_DYNAMIC_PROGRAMMING_SOLVER
+
+def suma(xs, sel):
+    return sum(xs[i] for i in sel)
+
+def instancia(semilla, n=30, clases=(3, 2, 1)):
+    """Candidatos chicos (la DP de OR-Tools es instantánea) con ≤ 3 valores."""
+    rng = random.Random(semilla)
+    pesos   = [rng.randint(20, 400) for _ in range(n)]
+    valores = [rng.choice(clases) for _ in range(n)]
+    return pesos, valores, sum(pesos) // rng.choice((2, 3, 4))
+
+def lexicografico(pesos, valores, capacidad):
+    """Óptimo (máximo valor, luego máximos litros): DP con objetivo valor·(C+1) + litros."""
+    m = capacidad + 1
+    sel, _ = sm._ortools(DP, pesos, [v * m + w for v, w in zip(valores, pesos)], capacidad)
+    return suma(valores, sel), suma(pesos, sel)
+
+@pytest.mark.parametrize("semilla", range(150))
+def test_por_clases_contra_dp_en_valor_y_litros(semilla):
+    pesos, valores, cap = instancia(semilla, clases=random.Random(semilla).choice(((3, 2, 1), (5, 2, 1))))
+    sel   = sm.por_clases(pesos, valores, cap)
+    dp, _ = sm._ortools(DP, pesos, valores, cap)
+
+    assert suma(pesos, sel) <= cap
+    assert suma(valores, sel) == suma(valores, dp)
+    assert suma(pesos, sel) >= suma(pesos, dp)              # nunca más renta que la DP
+    assert (suma(valores, sel), suma(pesos, sel)) == lexicografico(pesos, valores, cap)
+
+@pytest.mark.parametrize("semilla", range(100))
+def test_intercambios_sin_tabla_dp(semilla, monkeypatch):
+    """Camino de los días reales (tabla demasiado grande para la DP exacta)."""
+    monkeypatch.setattr(sm, "MAX_CELDAS_DP", 0)
+    rng = random.Random(semilla)
+    pesos, valores, cap = instancia(semilla, n=rng.choice((30, 60, 120)), clases=rng.choice(((3, 2, 1), (5, 2, 1))))
+    sel   = sm.por_clases(pesos, valores, cap)
+    dp, _ = sm._ortools(DP, pesos, valores, cap)
+    valor, litros = lexicografico(pesos, valores, cap)
+
+    assert suma(pesos, sel) <= cap and suma(valores, sel) == valor
+    assert suma(pesos, sel) >= suma(pesos, dp)
+    if suma(pesos, sel) < litros:                   # sin garantía de óptimo: nunca llena la capacidad
+        assert suma(pesos, sel) < cap and litros - suma(pesos, sel) <= 0.01 * cap
+
+@pytest.mark.parametrize("celdas_dp", [sm.MAX_CELDAS_DP, 0])
+def test_empate_que_no_es_prefijo(celdas_dp, monkeypatch):
+    # valor 9 con el 40 L o con el 80 L de la clase 1; por prefijos (más ligero) quedaban 210 L
+    monkeypatch.setattr(sm, "MAX_CELDAS_DP", celdas_dp)
+    pesos, valores = [110, 40, 80, 50, 10], [2, 1, 1, 3, 3]
+    sel = sm.por_clases(pesos, valores, 250)
+    assert (suma(valores, sel), suma(pesos, sel)) == (9, 250)
+
+def test_resolver_auto_usa_clases_sin_perder_litros():
+    pesos, valores, cap = instancia(7, n=60)
+    sel, info = sm.resolver(pesos, valores, cap)
+    assert info["metodo"] == "clases" and info["gap"] == 0
+    assert (suma(valores, sel), suma(pesos, sel)) == lexicografico(pesos, valores, cap)
+
+def test_muestra_no_renta_mas_que_la_dp(en_raiz, monkeypatch):
+    """Rango de la muestra: los días donde el desempate por prefijos rentaba de más."""
+    from subcarpeta import algoritmo_mochila as am
+    from subcarpeta.cache_mochila import CacheMochila
+    monkeypatch.setattr(am, "cache", CacheMochila())
+
+    raw, prio_map, desde_dt, _ = am.cargar(Path("csv"))
+    df  = am.preparar(raw, prio_map)
+    alm = am.AlmacenPedidos(df)
+    pipas = am.simular(alm, desde_dt)
+    out   = alm.a_dataframe(df)
+
+    propios = out[out.LITROS_RENTADOS == 0].groupby(out.FECHA_ASIGNADA.dt.strftime("%Y-%m-%d")).LITROS.sum()
+    # litros propios con la DP de OR-Tools de la versión original
+    assert propios["2024-12-15"] >= 1_919_758
+    assert propios["2025-04-22"] >= 1_919_978
+    assert sum(pipas.values()) <= 174
+    assert out.LITROS_RENTADOS.sum() <= 9_908_748
+
+def test_repartos_por_bloques_igual_que_la_malla_completa(monkeypatch):
+    rng = np.random.default_rng(3)
+    W   = [np.sort(rng.integers(20, 400, n)) for n in (40, 35, 30)]
+    completo = [np.concatenate(x) for x in zip(*sm._repartos(W, (3, 2, 1), 6_000, 120))]
+    monkeypatch.setattr(sm, "MAX_PARES", 7)                 # bloques de una fila de k1
+    bloques = list(sm._repartos(W, (3, 2, 1), 6_000, 120))
+    assert len(bloques) > 1 and all(len(k) <= 7 * 36 for k, _, _ in bloques)
+    for a, b in zip(completo, (np.concatenate(x) for x in zip(*bloques))):
+        assert np.array_equal(a, b)
+
+@pytest.mark.parametrize("semilla", range(20))
+def test_sin_intercambios_por_memoria_conserva_el_valor(semilla, monkeypatch):
+    monkeypatch.setattr(sm, "MAX_CELDAS_DP", 0)
+    monkeypatch.setattr(sm, "MAX_PARES", 0)
+    pesos, valores, cap = instancia(semilla, n=120)
+    sel = sm.por_clases(pesos, valores, cap)
+    assert suma(pesos, sel) <= cap and suma(valores, sel) == lexicografico(pesos, valores, cap)[0]
@@ -0,0 +1,91 @@
+import io
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from subcarpeta.tabla_remota import TablaIndexada, parametros
+
+@pytest.fixture
+def df():
+    # muchos empates en CLIENTE / PRIORIDAD para que cuente la estabilidad del orden
+    rng = np.random.default_rng(0)
+    n   = 157
+    return pd.DataFrame({
+        "ID":        np.arange(n),
+        "CLIENTE":   rng.choice(["Norte", "SUR", "Este"], n),
+        "PRIORIDAD": rng.integers(1, 4, n),
+        "LITROS":    rng.choice([20_000.0, 64_000.0, 150_000.0], n),
+        "NOTA":      pd.Series(rng.choice(["urgente", "normal", None], n), dtype=object),
+    })
+
+def paginas(tabla, tam, **consulta):
+    """Todas las páginas concatenadas y la última página reportada."""
+    primera = json.loads(tabla.pagina(1, tam, **consulta))
+    filas   = [f for p in range(1, primera["last_page"] + 1)
+               for f in json.loads(tabla.pagina(p, tam, **consulta))["data"]]
+    return pd.DataFrame(filas, columns=primera["columns"]), primera
+
+ORDENES = [
+    (),
+    (("LITROS", True),),
+    (("CLIENTE", False), ("PRIORIDAD", True)),
+    (("PRIORIDAD", False), ("LITROS", True), ("CLIENTE", False)),
+]
+
+@pytest.mark.parametrize("orden", ORDENES)
+def test_paginas_igual_que_ordenar_y_cortar_en_pandas(df, orden):
+    tabla = TablaIndexada(df)
+    filtros = (("PRIORIDAD", "<=", "2"), ("NOTA", "like", "URG"))
+    for consulta in (dict(orden=orden), dict(orden=orden, filtros=filtros), dict(orden=orden, q="sur")):
+        esperado = df
+        if "filtros" in consulta:
+            esperado = esperado[(esperado.PRIORIDAD <= 2) & esperado.NOTA.fillna("").str.contains("urg")]
+        if "q" in consulta:
+            texto = esperado.astype(str).apply(lambda c: c.str.lower()).where(esperado.notna(), "")
+            esperado = esperado[texto.apply(lambda c: c.str.contains("sur")).any(axis=1)]
+        if orden:
+            esperado = esperado.sort_values([c for c, _ in orden], ascending=[not d for _, d in orden],
+                                            kind="stable")
+
+        obtenido, primera = paginas(tabla, 20, **consulta)
+        assert primera["last_row"] == len(esperado)
+        assert primera["last_page"] == max(1, -(-len(esperado) // 20))
+        assert obtenido["ID"].tolist() == esperado["ID"].tolist()
+
+        # la consulta repetida sale del LRU con las mismas posiciones
+        assert tabla.posiciones(**consulta) is tabla.posiciones(**consulta)
+        csv = pd.read_csv(io.StringIO(tabla.csv(**consulta)))
+        assert csv["ID"].tolist() == esperado["ID"].tolist()
+
+def test_pagina_fuera_de_rango_y_parametros(df):
+    tabla = TablaIndexada(df)
+    ultima = json.loads(tabla.pagina(99, 50))
+    assert ultima["last_page"] == 4 and [f["ID"] for f in ultima["data"]] == list(range(150, 157))
+
+    args = {"page": "2", "size": "5000", "sort[0][field]": "LITROS", "sort[0][dir]": "desc",
+            "sort[1][field]": "ID", "filter[0][field]": "CLIENTE", "filter[0][type]": "=",
+            "filter[0][value]": "SUR", "filter[1][field]": "NOTA", "filter[1][value]": "", "q": " Norte "}
+    assert parametros(args) == (2, 1000, (("CLIENTE", "=", "SUR"),),
+                                (("LITROS", True), ("ID", False)), "norte")
+
+def test_ordena_fechas_dd_mm_y_montos_de_texto_por_su_valor():
+    # como PedidosCancelados: todo llega como texto
+    df = pd.DataFrame({
+        "ID":         ["a", "b", "c", "d", "e", "f"],
+        "fecha_fac":  ["02/01/2025", "15/12/2024", "01/02/2025", None, "3/1/2025", "31/12/2024 08:30"],
+        "Monto":      ["$1,000", "200", "15,000.50", "-5", None, "99.9"],
+        "fac_compra": ["323356-", "10", "9", "323414", "100", None],     # no todo número: texto
+        "ISO":        ["2025-01-02", "2024-12-15", "2025-02-01", "2024-12-31", None, "2025-01-03"],
+    }, dtype=object)
+    tabla = TablaIndexada(df)
+
+    def ids(orden):
+        return [f["ID"] for p in range(1, 3) for f in json.loads(tabla.pagina(p, 3, orden=orden))["data"]]
+
+    assert ids((("fecha_fac", False),)) == ["b", "f", "a", "e", "c", "d"]
+    assert ids((("fecha_fac", True),))  == ["d", "c", "e", "a", "f", "b"]
+    assert ids((("Monto", False),))     == ["d", "f", "b", "a", "c", "e"]
+    assert ids((("fac_compra", False),)) == ["b", "e", "a", "d", "c", "f"]
+    assert ids((("ISO", False), ("Monto", True))) == ["b", "d", "a", "f", "c", "e"]
@@ -0,0 +1,56 @@
+import threading
+import time
+
+from subcarpeta.trabajos import ColaTrabajos, CORRIENDO, ERROR, LISTO
+
+def esperar(trabajo, limite_s=5):
+    fin = time.time() + limite_s
+    while trabajo.pendiente and time.time() < fin:
+        time.sleep(0.005)
+    return trabajo
+
+def test_misma_llave_es_una_sola_corrida():
+    cola, soltar, llamadas = ColaTrabajos(), threading.Event(), []
+
+    def lento(x):
+        llamadas.append(x)
+        soltar.wait(5)
+        return x * 2
+
+    primero = cola.enviar("huella-a", lento, 21)
+    assert cola.enviar("huella-a", lento, 99) is primero        # en cola / corriendo
+    otro = cola.enviar("huella-b", lento, 1)
+    assert otro is not primero
+
+    soltar.set()
+    assert esperar(primero).estado == LISTO and primero.resultado == 42
+    assert cola.enviar("huella-a", lento, 99) is primero        # ya terminó con esas entradas
+    assert esperar(otro).resultado == 2
+    assert llamadas == [21, 1]
+    assert {t["id"] for t in cola.listar()} == {primero.id, otro.id}
+
+def test_error_se_reporta_y_no_se_reutiliza():
+    cola, intentos = ColaTrabajos(), []
+
+    def falla():
+        intentos.append(1)
+        if len(intentos) == 1:
+            raise ValueError("CSV de pedidos vacío")
+        return "ok"
+
+    malo = esperar(cola.enviar("huella", falla))
+    assert malo.estado == ERROR and malo.error == "CSV de pedidos vacío" and malo.resultado is None
+    assert cola.obtener(malo.id).a_dict()["estado"] == ERROR
+
+    bueno = esperar(cola.enviar("huella", falla))               # el siguiente reintenta
+    assert bueno is not malo and bueno.estado == LISTO and bueno.resultado == "ok"
+    assert len(intentos) == 2
+
+def test_recorta_terminados_pero_no_pendientes():
+    cola, soltar = ColaTrabajos(hilos=2, max_trabajos=2), threading.Event()
+    corriendo = cola.enviar("lento", soltar.wait, 5)
+    hechos = [esperar(cola.enviar(f"k{i}", int, i)) for i in range(3)]
+    assert corriendo.estado == CORRIENDO and cola.obtener(corriendo.id) is corriendo
+    assert cola.obtener(hechos[0].id) is None and cola.obtener(hechos[-1].id) is hechos[-1]
+    soltar.set()
+    esperar(corriendo)
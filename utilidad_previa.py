@@ -4,108 +4,106 @@
 # Calcula los KPIs mensuales *previos* al algoritmo-mochila.
 #
 # 1. Detecta el mismo rango de fechas que prioridad_clientes_*.csv
-# 2. Suma litros, utilidad, monto y costo en Pedidos.csv
-# 3. ESTIMA los litros que habrías tenido que rentar:
+# 2. Suma litros y utilidad en Pedidos.csv (leído por bloques)
+# 3. ESTIMA los litros que habrías tenido que rentar, día por día de
+#    factura:
 #      · Capacidad propia = 1 920 000 L por día
-#      · Litros rentados  = excedente / 64 000 L (pipa)  → redondeo arriba
+#      · Litros rentados  = excedente del día / 64 000 L (pipa) → redondeo arriba
 # 4. Aplica una penalización económica del 5 % sobre la utilidad de
 #    esos litros rentados (aproximación del costo de renta).
-# 5. Exporta csv/utilidad_previa_<rango>.csv
+# 5. Suma los días a meses y exporta csv/utilidad_previa_<rango>.csv
 # ------------------------------------------------------------------
 
-import math
 import re
+import numpy as np
 import pandas as pd
 from pathlib import Path
 from datetime import datetime
 
+from lector_pedidos import leer_por_partes, tipar, Acumulador, CHUNK
+
 # ------------ parámetros de negocio --------------------------------
 CAP_PROPIA_DIA = 1_920_000          # litros propios/día
 LITROS_PIPA    = 64_000             # capacidad pipa rentada
 COSTO_RENTA    = 0.05               # penalización 5 %
 
-# ------------ localizar archivos -----------------------------------
 CSV_DIR   = Path("csv")
 PEDIDOS   = CSV_DIR / "Pedidos.csv"
-prior_csv = next(CSV_DIR.glob("prioridad_clientes*_A_*.csv"))
-
-m = re.search(r'_(\d{4}-\d{2}-\d{2})_A_(\d{4}-\d{2}-\d{2})', prior_csv.stem, re.I)
-ini_dt, fin_dt = map(datetime.fromisoformat, m.groups())
-
-print("Archivo prioridades :", prior_csv.name)
-print("Rango               :", ini_dt.date(), "→", fin_dt.date())
-
-# ------------ cargar Pedidos.csv -----------------------------------
-df = pd.read_csv(PEDIDOS, low_memory=False)
-df['FECHA FACTURA VENTA'] = pd.to_datetime(
-    df['FECHA FACTURA VENTA'],
-    format='%d/%m/%Y',
-    errors='coerce'
-)
-
-# filtrar al rango
-df = df[
-    (df['FECHA FACTURA VENTA'] >= ini_dt) &
-    (df['FECHA FACTURA VENTA'] <= fin_dt)
-]
-
-# numéricos seguros
-clean = lambda s: pd.to_numeric(
-    s.astype(str).replace(r'[^0-9.\-]', '', regex=True),
-    errors='coerce'
-).fillna(0.0)
-
-df['Litros']   = clean(df['LITROS REALES'])
-df['Utilidad'] = clean(df.get('UTILIDAD', 0))
-df['Monto']    = clean(df.get('MONTO',    0))
-df['Costo']    = clean(df.get('COSTO',    0))
-
-# ------------ litros rentados ESTIMADOS por mes --------------------
-df['Año-Mes'] = df['FECHA FACTURA VENTA'].dt.to_period('M')
-
-# Exceso sobre capacidad propia *diaria* (se asume 1 día simplificado)
-exceso_mes = (
-    df.groupby('Año-Mes')['Litros'].sum()
-    - CAP_PROPIA_DIA
-).clip(lower=0)
-
-# Número de pipas rentadas al mes (ceil)
-pipas_mes = (exceso_mes / LITROS_PIPA).apply(math.ceil)
-
-# inicializo Litros_Rentados como float para no romper dtype
-df['Litros_Rentados'] = 0.0
-
-for per, n_pipas in pipas_mes.items():
-    if n_pipas == 0:
-        continue
-    mask = df['Año-Mes'] == per
-    litros_mes   = df.loc[mask, 'Litros'].sum()
-    litros_renta = n_pipas * LITROS_PIPA
-    # distribuyo proporcionalmente esos litros rentados
-    df.loc[mask, 'Litros_Rentados'] = (
-        df.loc[mask, 'Litros'] / litros_mes * litros_renta
-    )
-
-# penalización 5 % sobre la utilidad de los litros rentados
-#    ganancia por litro = Utilidad / Litros
-#    costo renta = Litros_Rentados * ganancia_x_litro * COSTO_RENTA
-df['Ganancia_por_L'] = (df['Utilidad'] / df['Litros']).fillna(0.0)
-df['Costo_Renta']    = df['Litros_Rentados'] * df['Ganancia_por_L'] * COSTO_RENTA
-df['Utilidad_adj']   = df['Utilidad'] - df['Costo_Renta']
-
-# ------------ agregación mensual -----------------------------------
-agg = (
-    df.groupby('Año-Mes')
-      .agg(
-        Total_Litros    = ('Litros',        'sum'),
-        Litros_Rentados = ('Litros_Rentados','sum'),
-        Total_Utilidad  = ('Utilidad_adj',  'sum')
-      )
-      .reset_index()
-)
-agg['Util_prom_litro'] = agg['Total_Utilidad'] / agg['Total_Litros']
-
-# ------------ guardar ----------------------------------------------
-out = CSV_DIR / f'utilidad_previa_{ini_dt:%Y-%m-%d}_A_{fin_dt:%Y-%m-%d}.csv'
-agg.to_csv(out, index=False, float_format="%.6f")
-print("✔ utilidad PREVIA guardada en", out)
+
+def _agregar_dia(df):
+    """
+    Agregados por día de factura que bastan para los KPIs: litros
+    totales y utilidad de los pedidos con litros (los de 0 L con utilidad
+    quedaban fuera por ganancia/litro infinita). Se pueden sumar bloque a
+    bloque.
+    """
+    dia = df['FECHA FACTURA VENTA'].dt.normalize().rename('Día')
+    con_litros = df['Litros'] != 0
+    return pd.DataFrame({
+        'Litros':   df['Litros'],
+        'Utilidad': df['Utilidad'].where(con_litros, 0.0),
+    }).groupby(dia).sum()
+
+def _kpis(dia):
+    """KPIs mensuales a partir de _agregar_dia()."""
+    # Exceso de cada día sobre la capacidad propia diaria → pipas (ceil)
+    exceso   = (dia['Litros'] - CAP_PROPIA_DIA).clip(lower=0)
+    rentados = np.ceil(exceso / LITROS_PIPA) * LITROS_PIPA
+
+    # los litros rentados del día se reparten en proporción a los litros
+    # de cada pedido, así que la penalización 5 % sobre su utilidad es:
+    #   Σ rentados_i · (utilidad_i / litros_i) · COSTO = utilidad · rentados / litros_día · COSTO
+    fraccion = (rentados / dia['Litros']).where(rentados > 0, 0.0)
+    mes = pd.DataFrame({
+        'Total_Litros':    dia['Litros'],
+        'Litros_Rentados': rentados,
+        'Total_Utilidad':  dia['Utilidad'] * (1 - fraccion * COSTO_RENTA),
+    }).groupby(dia.index.to_period('M').rename('Año-Mes')).sum()
+
+    agg = mes.reset_index()
+    agg['Util_prom_litro'] = agg['Total_Utilidad'] / agg['Total_Litros']
+    return agg
+
+def utilidad_previa(pedidos_df, ini_dt, fin_dt):
+    """KPIs mensuales sin mochila a partir de Pedidos (en memoria)."""
+    df = tipar(pedidos_df)
+
+    # filtrar al rango
+    df = df[
+        (df['FECHA FACTURA VENTA'] >= ini_dt) &
+        (df['FECHA FACTURA VENTA'] <= fin_dt)
+    ]
+
+    df['Litros']   = df['LITROS REALES']
+    df['Utilidad'] = df['UTILIDAD'] if 'UTILIDAD' in df.columns else 0.0
+    return _kpis(_agregar_dia(df))
+
+def utilidad_previa_por_partes(pedidos_csv, ini_dt, fin_dt, chunksize=CHUNK):
+    """Igual que utilidad_previa() leyendo Pedidos por bloques (memoria acotada)."""
+    dia = Acumulador()
+    for parte in leer_por_partes(pedidos_csv, ['FECHA FACTURA VENTA', 'LITROS REALES', 'UTILIDAD'],
+                                 'FECHA FACTURA VENTA', ini_dt, fin_dt, chunksize=chunksize):
+        parte['Litros']   = parte['LITROS REALES']
+        parte['Utilidad'] = parte['UTILIDAD'] if 'UTILIDAD' in parte.columns else 0.0
+        dia.agregar(_agregar_dia(parte))
+    if dia.total is None:
+        return _kpis(pd.DataFrame({'Litros': [], 'Utilidad': []},
+                                  index=pd.DatetimeIndex([], name='Día')))
+    return _kpis(dia.resultado().sort_index())
+
+if __name__ == "__main__":
+    # ------------ localizar archivos -------------------------------
+    prior_csv = next(CSV_DIR.glob("prioridad_clientes*_A_*.csv"))
+
+    m = re.search(r'_(\d{4}-\d{2}-\d{2})_A_(\d{4}-\d{2}-\d{2})', prior_csv.stem, re.I)
+    ini_dt, fin_dt = map(datetime.fromisoformat, m.groups())
+
+    print("Archivo prioridades :", prior_csv.name)
+    print("Rango               :", ini_dt.date(), "→", fin_dt.date())
+
+    agg = utilidad_previa_por_partes(PEDIDOS, ini_dt, fin_dt)
+
+    # ------------ guardar ------------------------------------------
+    out = CSV_DIR / f'utilidad_previa_{ini_dt:%Y-%m-%d}_A_{fin_dt:%Y-%m-%d}.csv'
+    agg.to_csv(out, index=False, float_format="%.6f")
+    print("✔ utilidad PREVIA guardada en", out)
@@ -2,61 +2,182 @@
 # Valida que tu asignación nunca exceda la capacidad propia más
 # el bloque de pipas rentadas, y comprueba la coherencia de
 # Litros_Rentados vs. pipas calculadas.
+#
+# Además revisa, en una sola pasada con agregaciones por día / pedido,
+# todas las invariantes de la programación (ver infracciones()):
+# capacidad propia diaria, renta vs. pipas, FECHA_DISP ≤ FECHA_ASIGNADA
+# ≤ FECHA_ENTREGA, fragmentos que suman el pedido original e IDs únicos.
+# Se puede llamar en memoria justo después de la mochila.
 # -------------------------------------------------------------------
 
 import sys
-import math
+import numpy as np
 import pandas as pd
 from pathlib import Path
 
+from lector_pedidos import leer_csv
+
 # ---------------------- Parámetros de negocio ----------------------
 CAP_PROPIA = 1_920_000   # litros propios/día
 CAP_PIPA   =   64_000    # capacidad pipa rentada
-
-# ---------------------- Localizar archivo --------------------------
 CSV_DIR    = Path("csv")
-prog_files = sorted(CSV_DIR.glob("programacion_*.csv"))
-if not prog_files:
-    sys.exit("No se encontró ningún programacion_<rango>.csv en csv/")
-prog_file  = prog_files[-1]   # toma el más reciente
-print(f"Validando capacidad usando: {prog_file.name}\n")
-
-# ---------------------- Cargar datos --------------------------------
-df = pd.read_csv(prog_file, parse_dates=["FECHA_ASIGNADA"])
-if df["FECHA_ASIGNADA"].isna().all():
-    sys.exit("Todas las FECHA_ASIGNADA están vacías; revisa tu algoritmo.")
-
-# ---------------------- Agrupar por día ------------------------------
-res = []
-for fecha, grupo in df.groupby("FECHA_ASIGNADA"):
-    total_litros     = grupo["LITROS"].sum()
-    litros_rentados  = grupo["LITROS_RENTADOS"].sum()
-
-    # cuántas pipas es necesario alquilar
-    exceso = max(0, total_litros - CAP_PROPIA)
-    pipas_necesarias = math.ceil(exceso / CAP_PIPA)
-
-    # capacidad total provista por pipas rentadas
-    capacidad_rentada = pipas_necesarias * CAP_PIPA
-
-    # validación: que la cobertura en litros alcance los 'litros_rentados'
-    renta_valida = litros_rentados <= capacidad_rentada
-
-    res.append({
-        "Fecha":                   fecha.date(),
-        "Total_Litros_Diarios":    total_litros,
-        "Litros_Asignados_Renta":  litros_rentados,
+
+FECHAS   = ["FECHA_ASIGNADA", "FECHA_DISP", "FECHA_ENTREGA"]
+INF_COLS = ["Regla", "Fila", "ID", "Fecha", "Detalle"]
+
+def _por_dia(df):
+    """Litros totales, rentados y propios por FECHA_ASIGNADA (sin asignar fuera)."""
+    litros   = df["LITROS"].astype(float)
+    rentados = df["LITROS_RENTADOS"].astype(float)
+    return pd.DataFrame({
+        "Litros":   litros,
+        "Rentados": rentados,
+        # la mochila pesa cada pedido con int(litros): mismos enteros aquí
+        "Propios":  np.trunc(litros - rentados),
+    }).groupby(df["FECHA_ASIGNADA"]).sum()
+
+def validar(df, cap_propia=CAP_PROPIA, cap_pipa=CAP_PIPA):
+    """Validación diaria de capacidad sobre la programación (en memoria)."""
+    dia    = _por_dia(df)
+    exceso = (dia["Litros"] - cap_propia).clip(lower=0)
+
+    # cuántas pipas es necesario alquilar y la capacidad que proveen
+    pipas_necesarias  = np.ceil(exceso / cap_pipa).astype(int)
+    capacidad_rentada = pipas_necesarias * cap_pipa
+
+    return pd.DataFrame({
+        "Fecha":                   dia.index.date,
+        "Total_Litros_Diarios":    dia["Litros"],
+        "Litros_Asignados_Renta":  dia["Rentados"],
         "Pipas_Necesarias":        pipas_necesarias,
         "Capacidad_Rentada_L":     capacidad_rentada,
-        "Validación_Renta_OK":     renta_valida
-    })
+        # validación: que la cobertura en litros alcance los 'litros_rentados'
+        "Validación_Renta_OK":     dia["Rentados"] <= capacidad_rentada,
+        "Litros_Propios":          dia["Propios"],
+        "Capacidad_Propia_OK":     dia["Propios"] <= cap_propia,
+    }).reset_index(drop=True)
+
+def _fecha(df, col):
+    return pd.to_datetime(df[col], errors="coerce") if col in df.columns else None
+
+def _filas(regla, mask, df, detalle):
+    """Infracciones por fila; `detalle` ya viene sólo para las filas de `mask` (o es texto fijo)."""
+    sub = df[mask]
+    return pd.DataFrame({"Regla": regla, "Fila": sub.index, "ID": sub["ID"],
+                         "Fecha": sub["FECHA_ASIGNADA"], "Detalle": detalle})
+
+def infracciones(df, pedidos=None, cap_propia=CAP_PROPIA, cap_pipa=CAP_PIPA, pipas=None):
+    """
+    Todas las invariantes de la programación:
+
+      capacidad_propia  litros propios del día ≤ cap_propia
+      renta_vs_pipas    litros rentados del día ≤ pipas · cap_pipa; `pipas`
+                        es el {día: pipas} de la mochila, si no el estimado
+                        de validar()
+      fecha_disp        FECHA_DISP ≤ FECHA_ASIGNADA
+      fecha_entrega     FECHA_ASIGNADA ≤ FECHA_ENTREGA
+      id_duplicado      cada ID de fragmento aparece una sola vez
+      fragmentos        los fragmentos ID-1, ID-2, … suman los LITROS del
+                        pedido en `pedidos` (pedidos_limpios), si se pasa
+
+    Devuelve una fila por infracción (Regla, Fila = índice en df, ID,
+    Fecha, Detalle); vacía si todo cuadra.
+    """
+    partes = []
+
+    # ---------------- por día ----------------------------------------
+    dia = _por_dia(df)
+    if pipas is None:
+        n_pipas = np.ceil((dia["Litros"] - cap_propia).clip(lower=0) / cap_pipa)
+    else:
+        n_pipas = pd.Series([pipas.get(f.date(), 0) for f in dia.index], index=dia.index)
+    m = dia["Propios"] > cap_propia
+    partes.append(pd.DataFrame({"Regla": "capacidad_propia", "Fila": pd.NA, "ID": pd.NA,
+                                "Fecha": dia.index[m],
+                                "Detalle": [f"propios {v:,.0f} > {cap_propia:,}" for v in dia["Propios"][m]]}))
+    m = dia["Rentados"] > n_pipas * cap_pipa
+    partes.append(pd.DataFrame({"Regla": "renta_vs_pipas", "Fila": pd.NA, "ID": pd.NA,
+                                "Fecha": dia.index[m],
+                                "Detalle": [f"rentados {r:,.2f} > {n:.0f} pipas × {cap_pipa:,}"
+                                            for r, n in zip(dia["Rentados"][m], n_pipas[m])]}))
+
+    # ---------------- por fila ---------------------------------------
+    asignada = _fecha(df, "FECHA_ASIGNADA")
+    disp     = _fecha(df, "FECHA_DISP")
+    entrega  = _fecha(df, "FECHA_ENTREGA")
+    if disp is not None:
+        m = asignada < disp
+        partes.append(_filas("fecha_disp", m, df, "disponible " + disp[m].dt.strftime("%Y-%m-%d")))
+    if entrega is not None:
+        m = asignada > entrega
+        partes.append(_filas("fecha_entrega", m, df, "entrega " + entrega[m].dt.strftime("%Y-%m-%d")))
+    partes.append(_filas("id_duplicado", df["ID"].duplicated(keep=False), df, "ID repetido"))
+
+    # ---------------- fragmentos vs. pedido original -----------------
+    if pedidos is not None:
+        # ID-k → ID; arreglos object (agrupar sobre el dtype str de pandas es mucho más lento)
+        base = df["ID"].astype(str).str.rsplit("-", n=1).str[0].to_numpy(dtype=object)
+        orig = pedidos[pedidos["LITROS"] > 0]
+        comp = pd.concat({
+            "Fragmentos": df["LITROS"].groupby(base).sum(),
+            "Pedido":     orig["LITROS"].groupby(orig["ID"].astype(str).to_numpy(dtype=object)).sum(),
+        }, axis=1).fillna(0.0)
+        malo = comp[~np.isclose(comp["Fragmentos"], comp["Pedido"])]
+
+        # referencia: primer fragmento de cada pedido (sin fragmentos → vacía)
+        primero = pd.DataFrame({"Fila": df.index, "Fecha": df["FECHA_ASIGNADA"].to_numpy()},
+                               index=base)[~pd.Series(base).duplicated().to_numpy()]
+        ref = primero.reindex(malo.index)
+        partes.append(pd.DataFrame({
+            "Regla":   "fragmentos",
+            "Fila":    ref["Fila"],
+            "ID":      malo.index,
+            "Fecha":   ref["Fecha"],
+            "Detalle": [f"fragmentos {f:,.2f} ≠ pedido {p:,.2f}"
+                        for f, p in zip(malo["Fragmentos"], malo["Pedido"])],
+        }))
+
+    partes = [p for p in partes if not p.empty]
+    if not partes:
+        return pd.DataFrame(columns=INF_COLS)
+    res = pd.concat(partes, ignore_index=True)[INF_COLS]
+    res["Fila"] = res["Fila"].astype("Int64")
+    return res
+
+if __name__ == "__main__":
+    # ---------------------- Localizar archivo ----------------------
+    prog_files = [p for p in sorted(CSV_DIR.glob("programacion_*.csv"))
+                  if not p.stem.startswith("programacion_detallada")]
+    if not prog_files:
+        sys.exit("No se encontró ningún programacion_<rango>.csv en csv/")
+    prog_file  = prog_files[-1]   # toma el más reciente
+    print(f"Validando capacidad usando: {prog_file.name}\n")
+
+    # ---------------------- Cargar datos ---------------------------
+    df = leer_csv(prog_file)
+    df = df.assign(**{c: pd.to_datetime(df[c], errors="coerce") for c in FECHAS if c in df.columns})
+    if df["FECHA_ASIGNADA"].isna().all():
+        sys.exit("Todas las FECHA_ASIGNADA están vacías; revisa tu algoritmo.")
+
+    df_res = validar(df)
+
+    # pedidos_limpios del mismo rango → revisar también los fragmentos
+    ped_csv = CSV_DIR / prog_file.name.replace("programacion_", "pedidos_limpios_", 1)
+    pedidos = leer_csv(ped_csv) if ped_csv.exists() else None
+    df_inf  = infracciones(df, pedidos)
 
-df_res = pd.DataFrame(res).sort_values("Fecha")
+    # Mostrar en pantalla
+    print(df_res.to_string(index=False))
 
-# Mostrar en pantalla
-print(df_res.to_string(index=False))
+    # ---------------------- Guardar resultados ---------------------
+    out_file = CSV_DIR / f"validador_diario_{prog_file.stem}.csv"
+    df_res.to_csv(out_file, index=False)
+    print(f"\nResultados de validación guardados en {out_file}")
 
-# ---------------------- Guardar resultados --------------------------
-out_file = CSV_DIR / f"validador_diario_{prog_file.stem}.csv"
-df_res.to_csv(out_file, index=False)
-print(f"\nResultados de validación guardados en {out_file}")
+    inf_file = CSV_DIR / f"validador_infracciones_{prog_file.stem}.csv"
+    df_inf.to_csv(inf_file, index=False)
+    if df_inf.empty:
+        print("✓ Sin infracciones" + ("" if pedidos is not None else " (sin pedidos_limpios: fragmentos no revisados)"))
+    else:
+        print(f"⚠️ {len(df_inf)} infracciones → {inf_file}")
+        print(df_inf["Regla"].value_counts().to_string())